@@ -6,28 +6,40 @@ warnings.filterwarnings("ignore", category=DeprecationWarning)
 import logging
 logging.getLogger("paramiko").setLevel(logging.WARNING)
 
+import hashlib
+import multiprocessing
 import requests
-from flask import Flask, render_template, Response, jsonify, send_from_directory
+from datetime import datetime, timezone
+from flask import Flask, render_template, Response, jsonify, send_from_directory, request
 import os
+import time
 from flask_socketio import SocketIO
 
 from utilities.config import (
     RASPBERRY_PI_IP, SSH_USERNAME, SSH_PASSWORD, FILE_STATUS,
-    LOCATION_PROFILES
+    LOCATION_PROFILES, PATH_CACHE_PREWARM
 )
 from utilities.network_utils import run_pi_ssh_command
 
 from modules.weather_module import WeatherForecast
 from modules.astro_module import AstroPosition
+from modules.ephemeris_module import PACKED_VERSION
+from modules.planning_module import PathPlanner, parse_range_request
 
 from modules import file_module
 
 from modules.server_module import IndigoRemoteServer
 from modules.server_module import indigo_client, start_indigo_client
 from utilities.logger import emit_log, set_socketio as set_log_socketio, get_log_history
+from utilities.publisher import DeltaPublisher
+from utilities.telemetry_buffer import to_json as telemetry_json
+from utilities.latency_trace import tracer, set_socketio as set_trace_socketio
 
 from modules.nstep_module import NStepFocuser, set_socketio as set_nstep_socketio
-from modules.mount_module import MountControl, set_socketio as set_mount_socketio
+from modules.mount_module import (
+    MountControl, set_socketio as set_mount_socketio, set_astro_publisher,
+)
+from modules.track_module import TargetTracker, TrackingAnalyzer, residuals, set_socketio as set_track_socketio
 from modules import arduino_module
 
 # === App Init ===
@@ -38,20 +50,34 @@ set_log_socketio(socketio)
 # === Module Instances ===
 weather_forecast = WeatherForecast(profile="chapel_hill")
 astro = AstroPosition()
+planner = PathPlanner(cache=astro.path_cache)
 indigo = IndigoRemoteServer(RASPBERRY_PI_IP, SSH_USERNAME, SSH_PASSWORD)
 mount = MountControl(indigo_client=indigo_client)
 nstep = NStepFocuser(indigo_client=indigo_client)
+tracker = TargetTracker(mount, astro)
+analyzer = TrackingAnalyzer(mount)
 
 file_module.set_socketio_instance(socketio)
 
-try:
-    start_indigo_client()
-except Exception as e:
-    print(f"[APP] Warning: INDIGO client failed to start — {e}")
+# astro_update carries only changed fields; new clients get snapshot()
+astro_publisher = DeltaPublisher(socketio, "astro_update", source=astro.build_frontend_payload,
+                                 volatile=("sun_time", "moon_time"))
+astro.set_publisher(astro_publisher, motion_hint=mount.is_moving)
+
+# Planner worker processes may re-import this module (spawn); only the parent connects
+if multiprocessing.parent_process() is None:
+    try:
+        start_indigo_client()
+        analyzer.start()
+    except Exception as e:
+        print(f"[APP] Warning: INDIGO client failed to start — {e}")
 
 # Attach shared socket
 set_nstep_socketio(socketio)
 set_mount_socketio(socketio)
+set_track_socketio(socketio)
+set_trace_socketio(socketio)
+set_astro_publisher(astro_publisher)
 arduino_module.set_socketio(socketio)
 
 # === Routes ===
@@ -85,8 +111,8 @@ def send_weather_now():
 # === Astro (Sun + Moon) ===
 @socketio.on('get_solar')
 def send_astro_now():
-    # unified payload mapped to your existing solar_* keys
-    socketio.emit("astro_update", astro.build_frontend_payload())
+    # full payload (mapped to your existing solar_* keys) for the asking client only
+    socketio.emit("astro_update", astro_publisher.snapshot(), to=request.sid)
 
 @socketio.on("get_mount_solar_state")
 def handle_get_mount_target_state():
@@ -107,24 +133,146 @@ def handle_get_mount_target_state():
         formatted["alt_mount"] = round(altaz[0], 2)
         formatted["az_mount"]  = round(altaz[1], 2)
 
+    # pointing error against the target, in the mount's epoch
+    if mount_coords["ra"] is not None and mount_coords["dec"] is not None:
+        target = mount.target_position()  # cached per 0.5 s bucket, shared with telemetry
+        ra_off, dec_off, sep = residuals(mount_coords["ra"], mount_coords["dec"], target["ra"], target["dec"])
+        formatted["sep_arcsec"] = round(float(sep), 1)
+        formatted["ra_offset_arcsec"] = round(float(ra_off), 1)
+        formatted["dec_offset_arcsec"] = round(float(dec_off), 1)
+
     socketio.emit("mount_solar_state", formatted)
 
 # Paths
+# JSON by default; ?format=packed (or {"format": "packed"} on the socket) sends
+# the binary DayPath layout. HTTP responses are revalidated by ETag.
+def _path_response(target):
+    key, path = astro.get_day_path(target)
+    packed = request.args.get("format") == "packed"
+    if packed:
+        resp = Response(path.packed(), mimetype="application/octet-stream")
+    else:
+        resp = jsonify(path.points)
+    # the cache key (and the packed layout version) fully determine the body, so it is a stable validator
+    resp.set_etag(hashlib.sha1(repr((key, packed and PACKED_VERSION)).encode()).hexdigest()[:20])
+    resp.last_modified = datetime.fromtimestamp(path.created, timezone.utc)
+    resp.cache_control.no_cache = True
+    return resp.make_conditional(request)
+
+def _emit_path(event, target, data):
+    path = astro.get_day_path(target)[1]
+    if (data or {}).get("format") == "packed":
+        socketio.emit(event, path.packed(), to=request.sid)
+    else:
+        socketio.emit(event, path.points)
+
 @app.route("/get_solar_path")
 def get_solar_path():
-    return jsonify(astro.get_full_day_path(target="sun"))
+    return _path_response("sun")
 
 @socketio.on("get_solar_path")
-def handle_get_solar_path():
-    socketio.emit("solar_path_data", astro.get_full_day_path(target="sun"))
+def handle_get_solar_path(data=None):
+    _emit_path("solar_path_data", "sun", data)
 
 @app.route("/get_moon_path")
 def get_moon_path():
-    return jsonify(astro.get_full_day_path(target="moon"))
+    return _path_response("moon")
 
 @socketio.on("get_moon_path")
-def handle_get_moon_path():
-    socketio.emit("moon_path_data", astro.get_full_day_path(target="moon"))
+def handle_get_moon_path(data=None):
+    _emit_path("moon_path_data", "moon", data)
+
+# Multi-day paths + events: {"target": sun|moon|both, "site": profile|"all",
+# "start": "YYYY-MM-DD", "days": N, "interval": minutes}
+@socketio.on("get_path_range")
+def handle_get_path_range(data):
+    sid = request.sid
+    try:
+        jobs, start, days, interval = parse_range_request(data or {}, astro.site())
+    except ValueError as e:
+        socketio.emit("path_range_done", {"error": str(e)}, to=sid)
+        return
+
+    def stream():
+        t0 = datetime.now()
+        count = 0
+        for label, target, site in jobs:
+            for bundle in planner.get_path_range(target, site, start, days, interval):
+                bundle["profile"] = label
+                socketio.emit("path_range_day", bundle, to=sid)
+                count += 1
+        socketio.emit("path_range_done", {
+            "days": count, "seconds": round((datetime.now() - t0).total_seconds(), 2),
+        }, to=sid)
+
+    socketio.start_background_task(stream)
+
+@app.route("/get_path_range")
+def get_path_range_route():
+    try:
+        jobs, start, days, interval = parse_range_request(request.args, astro.site())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    # never computes in the request thread: missing days are queued on the planner's pool
+    out, pending = [], 0
+    for label, target, site in jobs:
+        bundles, waiting = planner.range_status(target, site, start, days, interval)
+        pending += waiting
+        for bundle in bundles:
+            bundle["profile"] = label
+            out.append(bundle)
+    if pending:
+        return jsonify({"status": "computing", "ready": len(out), "pending": pending, "bundles": out}), 202
+    return jsonify(out)
+
+@app.route("/path_cache_stats")
+def path_cache_stats():
+    return jsonify(astro.path_cache_stats())
+
+@app.route("/tracking_status")
+def tracking_status():
+    return jsonify(tracker.status())
+
+@app.route("/tracking_quality")
+def tracking_quality():
+    return jsonify({"quality": analyzer.quality, "offsets": analyzer.offsets()})
+
+@app.route("/mount_state")
+def mount_state():
+    return jsonify(mount.motion_status())
+
+# Downsampled mount telemetry for charts: ?seconds=3600 (or start/end unix times), buckets, fields=ra,dec,...
+@app.route("/mount_history")
+def mount_history():
+    ring = mount.telemetry
+    try:
+        end = float(request.args["end"]) if "end" in request.args else None
+        start = float(request.args["start"]) if "start" in request.args else (end or time.time()) - float(request.args.get("seconds", 3600))
+        buckets = max(1, min(int(request.args.get("buckets", 500)), 5000))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    fields = [f for f in request.args.get("fields", "").split(",") if f]
+    unknown = [f for f in fields if f not in ring.fields]
+    if unknown:
+        return jsonify({"error": f"unknown fields: {', '.join(unknown)}", "fields": list(ring.fields)}), 400
+    history = telemetry_json(ring.decimate(start, end, buckets, fields or None))
+    history["stats"] = ring.stats()
+    return jsonify(history)
+
+@app.route("/indigo_stats")
+def indigo_stats():
+    return jsonify({
+        "connection": {"connected": indigo_client.is_connected(), "connects": indigo_client.connects,
+                       "retry_count": indigo_client.retry_count},
+        "router": indigo_client.router.stats(),
+        "properties": indigo_client.properties.stats(),
+        "decoder": indigo_client.decoder.stats(),
+        "writer": indigo_client.writer.stats(),
+    })
+
+@app.route("/command_latency")
+def command_latency():
+    return jsonify(tracer.stats())
 
 # === INDIGO Server ===
 @socketio.on('start_indigo')
@@ -148,25 +296,47 @@ def handle_get_mount_coordinates():
     socketio.emit("mount_coordinates", coords)
 
 @socketio.on("slew_mount")
+@tracer.traced("slew_mount")
 def handle_slew_mount(data):
     mount.slew(data["direction"], data.get("rate", "solar"))
 
+@socketio.on("jog_mount")
+@tracer.traced("jog_mount")
+def handle_jog_mount(data):
+    data = data or {}
+    mount.jog(data.get("direction"), data.get("rate", "slow"), data.get("duration_ms", 250))
+
+@socketio.on("jog_stop")
+@tracer.traced("jog_stop")
+def handle_jog_stop(data=None):
+    mount.end_jog((data or {}).get("direction"))
+
 @socketio.on("stop_mount")
+@tracer.traced("stop_mount")
 def handle_stop_mount():
+    tracker.stop()
     mount.stop()
 
 @socketio.on("track_sun")
 def handle_track_sun():
     mount.set_target("sun")
     astro.set_target_mode("sun")  # stays in sync with mount
-    socketio.emit("astro_update", astro.build_frontend_payload())
+    astro_publisher.publish()
     mount.emit_status("Target set to Sun")
+    tracker.start("sun")
+
+@socketio.on("stop_tracking")
+def handle_stop_tracking():
+    tracker.stop()
 
 @socketio.on("park_mount")
+@tracer.traced("park_mount")
 def handle_park_mount():
+    tracker.stop()
     mount.park()
 
 @socketio.on("unpark_mount")
+@tracer.traced("unpark_mount")
 def handle_unpark_mount():
     mount.unpark()
 
@@ -176,13 +346,17 @@ def handle_set_target(data):
     mode = str((data or {}).get("mode", "sun")).lower()
     mount.set_target(mode)
     astro.set_target_mode(mode)  # <<< keep astro payload mapping in sync
-    socketio.emit("astro_update", astro.build_frontend_payload())
+    astro_publisher.publish()
+    if tracker.active:
+        tracker.start(mode)
 
 @socketio.on("toggle_target")
 def handle_toggle_target():
     mount.toggle_target()
     astro.set_target_mode(getattr(mount, "target_mode", "sun"))  # <<<
-    socketio.emit("astro_update", astro.build_frontend_payload())
+    astro_publisher.publish()
+    if tracker.active:
+        tracker.start(mount.target_mode)
 
 @socketio.on("set_location_profile")
 def handle_set_location_profile(data):
@@ -193,19 +367,22 @@ def handle_set_location_profile(data):
     weather_forecast.refresh_now(socketio)
 
     prof = LOCATION_PROFILES.get(profile, {})
+    tz = None
     if isinstance(prof, dict):
-        lat, lon, elev = prof.get("lat"), prof.get("lon"), prof.get("elev")
+        lat, lon, elev, tz = prof.get("lat"), prof.get("lon"), prof.get("elev"), prof.get("tz")
     elif isinstance(prof, (list, tuple)) and len(prof) >= 3:
         lat, lon, elev = prof[0], prof[1], prof[2]
     else:
         lat = lon = elev = None
 
     if None not in (lat, lon, elev):
-        astro.set_observer(lat, lon, elev)
+        # paths are cached per site, so switching back and forth is instant
+        astro.set_observer(lat, lon, elev, tz)
         astro.set_location_profile_label(profile)
-        astro.clear_path_cache()  # <<< ensure new paths recompute for the new site
+        astro.update_solar_position()
+        astro.update_lunar_position()
 
-    socketio.emit("astro_update", astro.build_frontend_payload())
+    astro_publisher.publish()
 
 @socketio.on("toggle_location_profile")
 def handle_toggle_location_profile():
@@ -302,6 +479,8 @@ def ping_dome_status():
 if __name__ == '__main__':
     weather_forecast.start_monitor(socketio, interval=600)
     astro.start_monitor(socketio, interval=5)
+    if PATH_CACHE_PREWARM:
+        socketio.start_background_task(astro.prewarm_paths)
     arduino_module.start_monitor(interval=1)
 
     socketio.start_background_task(file_module.start_file_monitoring, 5)
@@ -0,0 +1,300 @@
+# Astro Benchmarks
+# Offline latency/throughput suite for AstroPosition at fixed dates and sites
+#
+#   python -m benchmarks.bench_astro                       # run and print
+#   python -m benchmarks.bench_astro --save base.json      # record a baseline
+#   python -m benchmarks.bench_astro --compare base.json   # exit 1 on regressions
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ephem
+import numpy as np
+
+from modules import astro_module
+from modules.astro_module import AstroPosition
+from modules.ephemeris_module import day_start, site_from_profile
+from utilities.config import LOCATION_PROFILES
+
+# UTC instants: solstices at local morning/afternoon, an equinox, a night-time sample
+FIXED_TIMES = [
+    datetime(2026, 6, 21, 14, 0),
+    datetime(2026, 6, 21, 20, 30),
+    datetime(2026, 12, 21, 17, 0),
+    datetime(2026, 3, 20, 3, 0),
+]
+PATH_INTERVALS = (1, 5, 15)
+
+
+# ---------------- Fixed clock ----------------
+
+class _FrozenDatetime(datetime):
+    frozen = datetime(2026, 6, 21, 14, 0)   # UTC
+
+    @classmethod
+    def utcnow(cls):
+        return cls.frozen
+
+    @classmethod
+    def now(cls, tz=None):
+        utc = cls.frozen.replace(tzinfo=timezone.utc)
+        return utc.astimezone(tz) if tz else utc.astimezone().replace(tzinfo=None)
+
+
+@contextlib.contextmanager
+def frozen_clock(when):
+    """Pin astro_module's datetime and ephem.now() to a UTC instant."""
+    saved = astro_module.datetime, ephem.now
+    _FrozenDatetime.frozen = when
+    astro_module.datetime = _FrozenDatetime
+    ephem.now = lambda: ephem.Date(_FrozenDatetime.frozen)
+    try:
+        yield
+    finally:
+        astro_module.datetime, ephem.now = saved
+
+
+class _NoTables:
+    """Stands in for EphemerisTables to time the plain PyEphem fallback."""
+    def lookup(self, site, body, t):
+        return None
+
+
+# ---------------- Measurement ----------------
+
+def summarize(samples_s, wall_s=None):
+    us = np.asarray(samples_s) * 1e6
+    wall = wall_s if wall_s is not None else float(np.sum(samples_s))
+    return {
+        "n": int(us.size),
+        "mean_us": round(float(us.mean()), 2),
+        "p50_us": round(float(np.percentile(us, 50)), 2),
+        "p90_us": round(float(np.percentile(us, 90)), 2),
+        "p99_us": round(float(np.percentile(us, 99)), 2),
+        "max_us": round(float(us.max()), 2),
+        "ops_per_s": round(us.size / wall, 1) if wall > 0 else None,
+    }
+
+
+def measure(fn, iterations, warmup=3, setup=None):
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    samples = []
+    for _ in range(iterations):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples)
+
+
+def warm_tables(astro, when):
+    """Build today's tables synchronously so live calls take the table path."""
+    start = day_start(ephem.Date(when))
+    for body in ("sun", "moon"):
+        astro.tables._build(astro.site(), body, start)
+
+
+# ---------------- Scenarios ----------------
+
+def single_thread_scenarios(astro, iterations):
+    results = {}
+    path_iters = max(5, iterations // 20)
+
+    def run(name, fn, n=iterations, setup=None):
+        results[name] = measure(fn, n, setup=setup)
+
+    run("update_solar_position", astro.update_solar_position)
+    run("update_lunar_position", astro.update_lunar_position)
+    run("get_equatorial_sun", lambda: astro.get_equatorial("sun"))
+    run("get_equatorial_moon", lambda: astro.get_equatorial("moon"))
+    run("build_frontend_payload", astro.build_frontend_payload)
+    run("update_sun_times", astro.update_sun_times, n=path_iters)
+    run("update_moon_times", astro.update_moon_times, n=path_iters)
+
+    tables, astro.tables = astro.tables, _NoTables()
+    run("update_solar_position_fallback", astro.update_solar_position)
+    run("get_equatorial_sun_fallback", lambda: astro.get_equatorial("sun"))
+    astro.tables = tables
+
+    for target in ("sun", "moon"):
+        for interval in PATH_INTERVALS:
+            fn = lambda t=target, i=interval: astro.get_full_day_path(t, interval_minutes=i)
+            run(f"day_path_{target}_{interval}m_cold", fn, n=path_iters, setup=astro.clear_path_cache)
+            run(f"day_path_{target}_{interval}m_cached", fn)
+    return results
+
+
+def contention_scenario(astro, threads, duration, profiles):
+    """
+    `threads` readers hammer the live API while one writer swaps sites via
+    set_observer() (the only _lock holder) every 50 ms.
+    """
+    ops = {
+        "update_solar_position": astro.update_solar_position,
+        "get_equatorial": lambda: astro.get_equatorial("sun"),
+        "build_frontend_payload": astro.build_frontend_payload,
+        "get_full_day_path": lambda: astro.get_full_day_path("sun"),
+    }
+    samples = {name: [] for name in ops}
+    sample_lock = threading.Lock()
+    stop = threading.Event()
+    errors = []
+    swaps = [0]
+
+    def reader(seed):
+        rng = random.Random(seed)
+        local = {name: [] for name in ops}
+        names = list(ops)
+        try:
+            while not stop.is_set():
+                name = rng.choice(names)
+                t0 = time.perf_counter()
+                ops[name]()
+                local[name].append(time.perf_counter() - t0)
+        except Exception as e:
+            errors.append(repr(e))
+        with sample_lock:
+            for name, vals in local.items():
+                samples[name].extend(vals)
+
+    def writer():
+        sites = [site_from_profile(p) for p in profiles]
+        i = 0
+        while not stop.wait(0.05):
+            s = sites[i % len(sites)]
+            astro.set_observer(s.lat, s.lon, s.elev, tz=s.tz)
+            swaps[0] += 1
+            i += 1
+
+    workers = [threading.Thread(target=reader, args=(k,)) for k in range(threads)]
+    workers.append(threading.Thread(target=writer))
+    t0 = time.perf_counter()
+    for w in workers:
+        w.start()
+    time.sleep(duration)
+    stop.set()
+    for w in workers:
+        w.join()
+    wall = time.perf_counter() - t0
+
+    total = sum(len(v) for v in samples.values())
+    out = {f"contention_{name}": summarize(vals, wall) for name, vals in samples.items() if vals}
+    out["contention_total"] = {
+        "threads": threads, "seconds": round(wall, 2), "ops": total,
+        "ops_per_s": round(total / wall, 1), "site_swaps": swaps[0], "errors": errors[:5],
+    }
+    return out
+
+
+# ---------------- Baselines ----------------
+
+def metadata(args):
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "ephem": ephem.__version__,
+        "iterations": args.iterations,
+        "threads": args.threads,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Scenarios whose p50 grew more than `tolerance` (fraction) over the baseline."""
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        cur = results.get(name)
+        if not cur or "p50_us" not in base or "p50_us" not in cur:
+            continue
+        if cur["p50_us"] > base["p50_us"] * (1.0 + tolerance):
+            regressions.append((name, base["p50_us"], cur["p50_us"]))
+    return regressions
+
+
+def print_table(results):
+    print(f"{'scenario':<60}{'p50 us':>11}{'p90 us':>11}{'p99 us':>11}{'ops/s':>12}")
+    for name, r in results.items():
+        if "p50_us" not in r:
+            continue
+        print(f"{name:<60}{r['p50_us']:>11.1f}{r['p90_us']:>11.1f}{r['p99_us']:>11.1f}{r['ops_per_s'] or 0:>12.0f}")
+    total = results.get("contention_total")
+    if total:
+        print(f"\ncontention: {total['threads']} threads, {total['ops']} ops in {total['seconds']} s "
+              f"({total['ops_per_s']} ops/s), {total['site_swaps']} site swaps, errors: {total['errors'] or 'none'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AstroPosition benchmarks (offline, fixed dates)")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=3.0, help="contention run length (s)")
+    parser.add_argument("--profiles", nargs="*", default=list(LOCATION_PROFILES))
+    parser.add_argument("--save", help="write results to this baseline JSON")
+    parser.add_argument("--compare", help="baseline JSON to check against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 growth (fraction)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    log = io.StringIO()
+    for profile in args.profiles:
+        site = site_from_profile(profile)
+        if site is None:
+            print(f"skipping unknown profile {profile}")
+            continue
+        for when in FIXED_TIMES:
+            tag = f"{profile}@{when:%Y%m%dT%H%M}"
+            print(f"running {tag} ...", file=sys.stderr)
+            with frozen_clock(when), contextlib.redirect_stdout(log):
+                astro = AstroPosition(site.lat, site.lon, site.elev, tz=site.tz)
+                astro.clear_path_cache()
+                warm_tables(astro, when)
+                for name, r in single_thread_scenarios(astro, args.iterations).items():
+                    results[f"{tag}/{name}"] = r
+
+    when = FIXED_TIMES[0]
+    site = site_from_profile(args.profiles[0]) if args.profiles else None
+    if site is not None and args.threads > 0:
+        print(f"running contention ({args.threads} threads) ...", file=sys.stderr)
+        with frozen_clock(when), contextlib.redirect_stdout(log):
+            astro = AstroPosition(site.lat, site.lon, site.elev, tz=site.tz)
+            warm_tables(astro, when)
+            results.update(contention_scenario(astro, args.threads, args.duration, args.profiles))
+
+    print_table(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"meta": metadata(args), "results": results}, f, indent=2)
+        print(f"\nbaseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.tolerance:.0%}:")
+            for name, base, cur in regressions:
+                print(f"  {name}: {base:.1f} us -> {cur:.1f} us")
+            return 1
+        print(f"\nno regressions over {args.tolerance:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
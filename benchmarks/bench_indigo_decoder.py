@@ -0,0 +1,115 @@
+# INDIGO Decoder Benchmarks
+# Old string-splitting reader vs FrameDecoder on property dumps and BLOBs
+#
+#   python -m benchmarks.bench_indigo_decoder [--props 5000] [--blob-mb 8]
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utilities import indigo_framing
+from utilities.indigo_framing import FrameDecoder
+
+
+def property_dump(count):
+    lines = []
+    for i in range(count):
+        lines.append({"defNumberVector": {
+            "device": f"Device {i % 12}", "name": f"PROPERTY_{i}", "group": "Main", "state": "Ok", "perm": "rw",
+            "items": [{"name": f"ITEM_{k}", "label": f"Item {k}", "min": 0, "max": 100, "step": 1,
+                       "format": "%g", "value": k * 1.5} for k in range(4)],
+        }})
+    return ("\n".join(json.dumps(m) for m in lines) + "\n").encode()
+
+
+def blob_frame(mb):
+    return (json.dumps({"setBLOBVector": {"device": "CCD", "name": "CCD_IMAGE",
+                                          "items": [{"name": "IMAGE", "value": "A" * int(mb * 1e6)}]}}) + "\n").encode()
+
+
+def legacy_reader(sock):
+    """The original _listen_loop: 4 KiB recv, str decode, split per line."""
+    buffer, frames = "", 0
+    while True:
+        data = sock.recv(4096).decode()
+        if not data:
+            return frames
+        buffer += data
+        while "\n" in buffer:
+            line, buffer = buffer.split("\n", 1)
+            json.loads(line.strip())
+            frames += 1
+
+
+def decoder_reader(sock):
+    decoder, frames = FrameDecoder(), 0
+    while decoder.recv_from(sock):
+        for _ in decoder.frames():
+            frames += 1
+    return frames, decoder
+
+
+def _once(reader, payload):
+    a, b = socket.socketpair()
+    writer = threading.Thread(target=lambda: (b.sendall(payload), b.close()))
+    t0 = time.perf_counter()
+    writer.start()
+    result = reader(a)
+    seconds = time.perf_counter() - t0
+    writer.join()
+    a.close()
+    return result, seconds
+
+
+def run(reader, payload):
+    """Timed run, then a separate traced run for peak memory (tracemalloc skews timing)."""
+    result, seconds = _once(reader, payload)
+    tracemalloc.start()
+    _once(reader, payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def report(label, payload, frames, seconds, peak, extra=""):
+    mb = len(payload) / 1e6
+    print(f"  {label:<22}{seconds * 1e3:>9.1f} ms{mb / seconds:>9.1f} MB/s{frames / seconds:>11.0f} msgs/s"
+          f"{peak / 1e6:>9.1f} MB peak  {extra}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="INDIGO frame decoder benchmark")
+    parser.add_argument("--props", type=int, default=5000)
+    parser.add_argument("--blob-mb", type=float, default=8.0)
+    args = parser.parse_args(argv)
+
+    cases = {
+        f"{args.props} defNumberVector": property_dump(args.props),
+        f"{args.blob_mb:g} MB BLOB + dump": blob_frame(args.blob_mb) + property_dump(args.props // 10),
+    }
+    backends = [("json", __import__("json").loads, False)]
+    if indigo_framing.JSON_BACKEND == "orjson":
+        backends.append(("orjson", indigo_framing._loads, True))
+
+    for name, payload in cases.items():
+        print(f"{name} ({len(payload) / 1e6:.1f} MB)")
+        frames, seconds, peak = run(legacy_reader, payload)
+        report("legacy str split", payload, frames, seconds, peak)
+        for backend, loads, zero_copy in backends:
+            indigo_framing._loads, indigo_framing._ZERO_COPY = loads, zero_copy
+            (frames, decoder), seconds, peak = run(decoder_reader, payload)
+            st = decoder.stats()
+            report(f"FrameDecoder/{backend}", payload, frames, seconds, peak,
+                   f"allocs={st['allocations']} copies={st['copies']} parse={st['parse_mb_s']} MB/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
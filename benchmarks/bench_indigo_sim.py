@@ -0,0 +1,170 @@
+# INDIGO Simulator Benchmarks
+# IndigoJSONClient vs AsyncIndigoJSONClient against the local simulator: telemetry bursts, goto, abort, reconnect
+#
+#   python -m benchmarks.bench_indigo_sim [--seconds 5] [--telemetry-hz 50] [--props 50] [--payload-bytes 1024]
+#       [--burst-size 500] [--latency-ms 2] [--jitter-ms 2] [--rounds 20] [--json results.json]
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.mount_module import MountControl
+from modules.nstep_module import NStepFocuser
+from utilities.indigo_async_client import AsyncIndigoJSONClient
+from utilities.indigo_json_client import IndigoJSONClient
+from utilities.indigo_simulator import IndigoSimulator
+
+CLIENTS = {"threaded": IndigoJSONClient, "asyncio": AsyncIndigoJSONClient}
+
+
+def pct(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 2)
+
+
+def wait_for(condition, timeout=15.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > end:
+            raise TimeoutError("benchmark condition not reached")
+        time.sleep(0.002)
+
+
+def ingest(client, sim, seconds):
+    """Telemetry messages per second: dispatched by the client vs sent by the simulator."""
+    seen = [0]
+    client.subscribe(lambda _m: seen.__setitem__(0, seen[0] + 1), "setNumberVector", "Simulator")
+    client.subscribe(lambda _m: seen.__setitem__(0, seen[0] + 1), "setTextVector", "Simulator")
+    sent0, t0 = sim.stats()["messages_out"], time.perf_counter()
+    time.sleep(seconds)
+    sent = sim.stats()["messages_out"] - sent0
+    return {"msgs_s": round(seen[0] / (time.perf_counter() - t0)), "sim_msgs_s": round(sent / seconds)}
+
+
+def gotos(mount, rounds):
+    """Command → arrival reported (Busy then Ok) for short gotos, ms."""
+    mount.goto(6.0, 20.0, timeout=30).result()     # acquisition slew, not timed
+    times = []
+    for i in range(rounds):
+        t0 = time.perf_counter()
+        mount.goto(6.0 + (i % 2) * 0.01, 20.0, timeout=10).result()
+        times.append((time.perf_counter() - t0) * 1e3)
+    return {"p50_ms": pct(times, 0.5), "p95_ms": pct(times, 0.95)}
+
+
+def aborts(mount, focuser, sim, rounds, flood):
+    """mount.stop() → the simulator reading the abort, with `flood` focuser commands queued ahead of it, ms."""
+    arrived = threading.Event()
+    sim.on_message = lambda m: arrived.set() if m.get("newSwitchVector", {}).get("name") == "MOUNT_MOTION_RA" else None
+    times = []
+    for _ in range(rounds):
+        arrived.clear()
+        for i in range(flood):
+            focuser.move("out", 1 + i % 100)
+        t0 = time.perf_counter()
+        mount.stop()
+        arrived.wait(5)
+        times.append((time.perf_counter() - t0) * 1e3)
+        mount.client.writer.flush(5)
+    focuser.move("stop")
+    sim.on_message = None
+    return {"p50_ms": pct(times, 0.5), "max_ms": pct(times, 1.0)}
+
+
+def focuser_reads(client, rounds):
+    """getProperties FOCUSER_POSITION → answer mirrored, ms."""
+    times = []
+    for _ in range(rounds):
+        version = client.properties.version("nSTEP", "FOCUSER_POSITION")
+        t0 = time.perf_counter()
+        future = client.when("nSTEP", "FOCUSER_POSITION", timeout=5, newer_than=version)
+        client.send({"getProperties": {"device": "nSTEP", "name": "FOCUSER_POSITION"}}, quiet=True)
+        future.result()
+        times.append((time.perf_counter() - t0) * 1e3)
+    return {"p50_ms": pct(times, 0.5), "p95_ms": pct(times, 0.95)}
+
+
+def reconnects(client, sim, outage):
+    """Dropped connection → reconnected and resynced; server restart after `outage` s → reconnected, ms."""
+    n = client.connects
+    t0 = time.perf_counter()
+    sim.drop_connections()
+    wait_for(lambda: client.connects > n and client.is_connected())
+    drop_ms = (time.perf_counter() - t0) * 1e3
+
+    n = client.connects
+    sim.stop()
+    time.sleep(outage)
+    t0 = time.perf_counter()
+    sim.start()
+    wait_for(lambda: client.connects > n and client.is_connected(), timeout=30)
+    return {"drop_ms": round(drop_ms, 1), "restart_ms": round((time.perf_counter() - t0) * 1e3, 1)}
+
+
+def run(kind, args):
+    sim = IndigoSimulator(goto_deg_s=30.0, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                          telemetry_hz=args.telemetry_hz, telemetry_props=args.props,
+                          payload_bytes=args.payload_bytes, burst_size=args.burst_size)
+    port = sim.start()
+    client = CLIENTS[kind]("127.0.0.1")
+    client.port = port
+    client.start()
+    wait_for(client.is_connected)
+    mount, focuser = MountControl(client), NStepFocuser(client)
+    wait_for(lambda: client.get_property("Mount Agent", "MOUNT_EQUATORIAL_COORDINATES") is not None)
+    try:
+        return {
+            "ingest": ingest(client, sim, args.seconds),
+            "goto": gotos(mount, args.rounds),
+            "abort": aborts(mount, focuser, sim, args.rounds, args.flood),
+            "focuser_read": focuser_reads(client, args.rounds),
+            "reconnect": reconnects(client, sim, args.outage),
+        }
+    finally:
+        mount.shutdown()
+        client.close()
+        sim.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="INDIGO client benchmark against the local simulator")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--telemetry-hz", type=float, default=50.0)
+    parser.add_argument("--props", type=int, default=50)
+    parser.add_argument("--payload-bytes", type=int, default=1024)
+    parser.add_argument("--burst-size", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--jitter-ms", type=float, default=2.0)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--flood", type=int, default=500)
+    parser.add_argument("--outage", type=float, default=1.0)
+    parser.add_argument("--clients", default=",".join(CLIENTS))
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    print(f"load: {args.props} props x {args.telemetry_hz:g} Hz, {args.payload_bytes} B payloads, "
+          f"{args.burst_size}-msg bursts/s, latency {args.latency_ms:g}±{args.jitter_ms:g} ms")
+    results = {}
+    for kind in args.clients.split(","):
+        results[kind] = r = run(kind, args)
+        print(f"{kind}")
+        print(f"  telemetry   {r['ingest']['msgs_s']:>8} msgs/s dispatched (server sent {r['ingest']['sim_msgs_s']}/s)")
+        print(f"  goto        p50 {r['goto']['p50_ms']} ms   p95 {r['goto']['p95_ms']} ms")
+        print(f"  abort       p50 {r['abort']['p50_ms']} ms   max {r['abort']['max_ms']} ms  ({args.flood} commands queued)")
+        print(f"  focuser     p50 {r['focuser_read']['p50_ms']} ms   p95 {r['focuser_read']['p95_ms']} ms")
+        print(f"  reconnect   drop {r['reconnect']['drop_ms']} ms   restart {r['reconnect']['restart_ms']} ms")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
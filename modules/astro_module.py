@@ -1,14 +1,28 @@
 # Astro Module
 # Combined solar and lunar position module using PyEphem
 
+import math
 import threading
 import ephem
 from datetime import datetime, timedelta, timezone
-from utilities.config import GEO_LAT, GEO_LON, GEO_ELEV, solar_cache
+from utilities.config import (
+    GEO_LAT, GEO_LON, GEO_ELEV, GEO_TZ, LOCATION_PROFILES, PATH_CACHE_SIZE,
+    ASTRO_MIN_INTERVAL, ASTRO_MAX_INTERVAL,
+)
 from utilities.logger import emit_log
+from utilities.path_cache import PathCache
+from modules.event_module import AstroEventScheduler
+from modules.ephemeris_module import (
+    BODIES, body_name, Site, DayPath, EphemerisTables, make_observer, compute_day_path, sample_path,
+    observing_date, profile_tz, site_from_profile,
+)
 
 _socketio = None
 
+# Shared by every AstroPosition; keys carry the site, so instances never collide
+path_cache = PathCache(PATH_CACHE_SIZE)
+ephemeris_tables = EphemerisTables()  # (site, body, day) tables: built once for the app's and the mount's instance
+
 def set_socketio(sio):
     global _socketio
     _socketio = sio
@@ -19,18 +33,17 @@ class AstroPosition:
     Solar + Lunar position service.
     - target_mode: "sun" | "moon" (used to map payload to the front-end keys you already bind)
     - location_profile: optional label string ("chapel_hill"/"kansas_city") for UI display only
-    """
-    def __init__(self, latitude=GEO_LAT, longitude=GEO_LON, elevation=GEO_ELEV):
-        self._lock = threading.Lock()
 
-        self.latitude = float(latitude)
-        self.longitude = float(longitude)
-        self.elevation = float(elevation)
+    The site is an immutable Site swapped atomically by set_observer(); every
+    thread computes on its own ephem.Observer cloned from it, so readers never
+    wait on each other.
+    """
+    def __init__(self, latitude=GEO_LAT, longitude=GEO_LON, elevation=GEO_ELEV, tz=None):
+        self._lock = threading.Lock()  # serializes set_observer() writers only
+        self._local = threading.local()
 
-        self.observer = ephem.Observer()
-        self.observer.lat = str(self.latitude)
-        self.observer.lon = str(self.longitude)
-        self.observer.elev = self.elevation
+        lat, lon = float(latitude), float(longitude)
+        self._site = Site(lat, lon, float(elevation), tz or profile_tz(lat, lon) or GEO_TZ)
 
         # Local tz is not strictly needed since ephem.localtime returns localtime,
         # but keep a handle if you want formatting later.
@@ -47,6 +60,19 @@ class AstroPosition:
         self.moon_times  = {"moonrise": "--", "moonset": "--", "moon_transit": "--"}
         self.moon_pos    = {"lunar_alt": "--", "lunar_az": "--", "moon_time": "--"}
 
+        # Per-day Sun/Moon tables; live queries interpolate once these are built
+        self.tables = ephemeris_tables
+        self.path_cache = path_cache
+
+        # Rise/set/transit/twilight events; drives *_times once start_monitor runs
+        self.events = AstroEventScheduler(self.site, on_event=self._on_events)
+        self._monitor_sio = None
+
+        # Change-driven emits (utilities.publisher.DeltaPublisher) and a
+        # callable telling the monitor whether the mount is moving
+        self.publisher = None
+        self.motion_hint = None
+
         # Prime values
         self.update_sun_times()
         self.update_moon_times()
@@ -55,17 +81,15 @@ class AstroPosition:
 
     # ---------------- Location / Target control ----------------
 
-    def set_observer(self, lat, lon, elev=None):
-        """Update observer coordinates."""
+    def set_observer(self, lat, lon, elev=None, tz=None):
+        """Update observer coordinates (paths for the previous site stay cached)."""
         with self._lock:
-            self.latitude = float(lat)
-            self.longitude = float(lon)
-            if elev is not None:
-                self.elevation = float(elev)
-            self.observer.lat = str(self.latitude)
-            self.observer.lon = str(self.longitude)
-            self.observer.elev = self.elevation
-            self.clear_path_cache()
+            current = self._site
+            lat, lon = float(lat), float(lon)
+            elev = float(elev) if elev is not None else current.elev
+            tz = tz or profile_tz(lat, lon) or current.tz
+            self._site = Site(lat, lon, elev, tz)
+        self.events.reset()
 
     def set_target_mode(self, mode: str):
         """Set active target (sun|moon)."""
@@ -76,15 +100,54 @@ class AstroPosition:
         """Optional label so the UI can show the profile name."""
         self.location_profile = profile
 
+    def set_publisher(self, publisher, motion_hint=None):
+        """Route astro_update through a DeltaPublisher; motion_hint() → True while the mount moves."""
+        self.publisher = publisher
+        self.motion_hint = motion_hint
+
+    def site(self):
+        """Current (immutable) observer location."""
+        return self._site
+
+    @property
+    def latitude(self):
+        return self._site.lat
+
+    @property
+    def longitude(self):
+        return self._site.lon
+
+    @property
+    def elevation(self):
+        return self._site.elev
+
+    @property
+    def tz(self):
+        return self._site.tz
+
+    @property
+    def observer(self):
+        """This thread's private observer, re-cloned whenever the site is swapped."""
+        site = self._site
+        local = self._local
+        if getattr(local, "site", None) is not site:
+            local.observer = make_observer(site)
+            local.site = site
+        return local.observer
+
+    def _observer_now(self):
+        obs = self.observer
+        obs.date = datetime.utcnow()
+        return obs
+
     # ---------------- Solar ----------------
 
     def update_sun_times(self):
         try:
-            with self._lock:
-                self.observer.date = datetime.utcnow()
-                sunrise = ephem.localtime(self.observer.next_rising(ephem.Sun()))
-                sunset  = ephem.localtime(self.observer.next_setting(ephem.Sun()))
-                transit = ephem.localtime(self.observer.next_transit(ephem.Sun()))
+            obs = self._observer_now()
+            sunrise = ephem.localtime(obs.next_rising(ephem.Sun()))
+            sunset  = ephem.localtime(obs.next_setting(ephem.Sun()))
+            transit = ephem.localtime(obs.next_transit(ephem.Sun()))
             self.sun_times.update({
                 "sunrise": sunrise.strftime("%H:%M"),
                 "sunset": sunset.strftime("%H:%M"),
@@ -95,9 +158,11 @@ class AstroPosition:
 
     def update_solar_position(self):
         try:
-            with self._lock:
-                self.observer.date = datetime.utcnow()
-                sun = ephem.Sun(self.observer)
+            pos = self._table_position("sun")
+            if pos:
+                alt, az = pos["alt"], pos["az"]
+            else:
+                sun = ephem.Sun(self._observer_now())
                 alt = float(sun.alt) * 180.0 / ephem.pi
                 az  = float(sun.az)  * 180.0 / ephem.pi
             self.sun_pos.update({
@@ -108,25 +173,13 @@ class AstroPosition:
         except Exception as e:
             emit_log(f"[SOLAR] Position error: {e}")
 
-    def _sun_path_sunrise_to_sunset(self, interval_minutes=5):
-        """Path from next sunrise to next sunset. Fallback to 12h window if needed."""
-        try:
-            with self._lock:
-                self.observer.date = datetime.utcnow()
-                sun = ephem.Sun()
-                sunrise_utc = self.observer.next_rising(sun)
-                sunset_utc  = self.observer.next_setting(sun)
-        except Exception:
-            # Fallback: sample next 12h at fixed cadence
-            return self._path_next_hours(ephem.Sun, hours=12, interval_minutes=interval_minutes)
-
-        return self._path_between(ephem.Sun, sunrise_utc, sunset_utc, interval_minutes)
-
     def get_solar_equatorial(self):
         try:
-            with self._lock:
-                self.observer.date = datetime.utcnow()
-                sun = ephem.Sun(self.observer)
+            pos = self._table_position("sun")
+            if pos:
+                ra_str, dec_str = self._format_equatorial(pos)
+            else:
+                sun = ephem.Sun(self._observer_now())
                 ra_str = str(sun.ra)
                 dec_str = str(sun.dec)
             return {"ra_str": ra_str, "dec_str": dec_str}
@@ -138,12 +191,11 @@ class AstroPosition:
 
     def update_moon_times(self):
         try:
-            with self._lock:
-                self.observer.date = datetime.utcnow()
-                moon = ephem.Moon()
-                moonrise = ephem.localtime(self.observer.next_rising(moon))
-                moonset  = ephem.localtime(self.observer.next_setting(moon))
-                transit  = ephem.localtime(self.observer.next_transit(moon))
+            obs = self._observer_now()
+            moon = ephem.Moon()
+            moonrise = ephem.localtime(obs.next_rising(moon))
+            moonset  = ephem.localtime(obs.next_setting(moon))
+            transit  = ephem.localtime(obs.next_transit(moon))
             self.moon_times.update({
                 "moonrise": moonrise.strftime("%H:%M"),
                 "moonset":  moonset.strftime("%H:%M"),
@@ -154,9 +206,11 @@ class AstroPosition:
 
     def update_lunar_position(self):
         try:
-            with self._lock:
-                self.observer.date = datetime.utcnow()
-                moon = ephem.Moon(self.observer)
+            pos = self._table_position("moon")
+            if pos:
+                alt, az = pos["alt"], pos["az"]
+            else:
+                moon = ephem.Moon(self._observer_now())
                 alt = float(moon.alt) * 180.0 / ephem.pi
                 az  = float(moon.az)  * 180.0 / ephem.pi
             self.moon_pos.update({
@@ -169,9 +223,11 @@ class AstroPosition:
 
     def get_moon_equatorial(self):
         try:
-            with self._lock:
-                self.observer.date = datetime.utcnow()
-                moon = ephem.Moon(self.observer)
+            pos = self._table_position("moon")
+            if pos:
+                ra_str, dec_str = self._format_equatorial(pos)
+            else:
+                moon = ephem.Moon(self._observer_now())
                 ra_str = str(moon.ra)
                 dec_str = str(moon.dec)
             return {"ra_str": ra_str, "dec_str": dec_str}
@@ -180,21 +236,20 @@ class AstroPosition:
             return {"ra_str": "--:--:--", "dec_str": "--:--:--"}
 
     def get_moon_day_path(self, interval_minutes=5):
-        try:
-            now = datetime.now()
-            today = now.date()
-            if solar_cache.get("date_moon") == today and solar_cache.get("path_moon"):
-                return solar_cache["path_moon"]
+        now = datetime.utcnow()
+        site = self.site()
+        key = (site, "moon_pass", observing_date(site, now), interval_minutes)
 
-            self.observer.date = now
+        def compute():
+            obs = make_observer(site, date=now)
             moon = ephem.Moon()
             # Robust window: from previous_rising to next_setting if Moon is currently up
             try:
-                prev_rise = self.observer.previous_rising(moon)
+                prev_rise = obs.previous_rising(moon)
             except Exception:
                 prev_rise = None
             try:
-                next_set = self.observer.next_setting(moon)
+                next_set = obs.next_setting(moon)
             except Exception:
                 next_set = None
 
@@ -202,85 +257,86 @@ class AstroPosition:
             if prev_rise and next_set and prev_rise < next_set:
                 start_t, end_t = prev_rise, next_set
             else:
-                start_t = self.observer.next_rising(moon)
-                end_t   = self.observer.next_setting(moon)
-
-            times, t = [], start_t
-            while t < end_t:
-                times.append(t)
-                t = ephem.Date(t + interval_minutes / (24 * 60))
-
-            path = []
-            for t in times:
-                self.observer.date = t
-                m = ephem.Moon(self.observer)
-                alt = float(m.alt) * 180.0 / ephem.pi
-                az  = float(m.az)  * 180.0 / ephem.pi
-                alt = max(0, min(alt, 90))
-                az  = az % 360
-                timestamp = ephem.localtime(t).strftime("%H:%M")
-                path.append({"az": round(az, 2), "alt": round(alt, 2), "time": timestamp})
-
-            solar_cache["date_moon"] = today
-            solar_cache["path_moon"] = path
+                start_t = obs.next_rising(moon)
+                end_t   = obs.next_setting(moon)
+
+            path = sample_path(site, "moon", start_t, end_t, interval_minutes)
             emit_log(f"[LUNAR] 🌙 Generated {len(path)} moon points")
             return path
 
+        try:
+            return self.path_cache.get_or_compute(key, compute).points
         except Exception as e:
             emit_log(f"[LUNAR] Error generating moon path: {e}")
             return []
 
-    # Prefer a robust “next 24h” path for the Moon; its rise/set can be weird.
-    def _moon_path_next_24h(self, interval_minutes=5):
-        start = ephem.Date(datetime.utcnow())
-        end   = ephem.Date(datetime.utcnow() + timedelta(hours=24))
-        return self._path_between(ephem.Moon, start, end, interval_minutes)
+    # ---------------- Interpolated live positions ----------------
 
-    # ---------------- Shared path helpers ----------------
+    def _table_position(self, body):
+        """Live position from today's precomputed table; None until it is built."""
+        now = ephem.now()
+        table = self.tables.lookup(self.site(), body, now)
+        return table.position(now) if table else None
 
-    def _path_between(self, body_cls, start_ephem_date, end_ephem_date, interval_minutes):
-        path = []
-        try:
-            t = start_ephem_date
-            while t < end_ephem_date:
-                with self._lock:
-                    self.observer.date = t
-                    body = body_cls(self.observer)
-                    alt = float(body.alt) * 180.0 / ephem.pi
-                    az  = float(body.az)  * 180.0 / ephem.pi
-                alt = max(0.0, min(alt, 90.0))
-                az  = az % 360.0
-                timestamp = ephem.localtime(t).strftime("%H:%M")
-                path.append({"az": round(az, 2), "alt": round(alt, 2), "time": timestamp})
-                t = ephem.Date(t + interval_minutes / (24 * 60.0))
-        except Exception as e:
-            emit_log(f"[ASTRO] Path error: {e}")
-        return path
+    @staticmethod
+    def _format_equatorial(pos):
+        """Degrees → the same strings str(body.ra)/str(body.dec) produce."""
+        return str(ephem.hours(math.radians(pos["ra"]))), str(ephem.degrees(math.radians(pos["dec"])))
 
-    def _path_next_hours(self, body_cls, hours=12, interval_minutes=5):
-        start = ephem.Date(datetime.utcnow())
-        end   = ephem.Date(datetime.utcnow() + timedelta(hours=hours))
-        return self._path_between(body_cls, start, end, interval_minutes)
+    def equatorial_at(self, target="sun", when=None, epoch="J2000"):
+        """
+        Topocentric RA (hours), Dec (degrees) and altitude (degrees) as floats at
+        `when` (ephem date or UTC datetime; default now). epoch "J2000" gives
+        astrometric coordinates, anything else ("JNow") precesses them to date.
+        """
+        obs = self.observer
+        obs.date = ephem.now() if when is None else when
+        body = BODIES[body_name(target)]()
+        body.compute(obs)
+        ra, dec = body.a_ra, body.a_dec
+        if str(epoch).upper() != "J2000":
+            ra, dec = ephem.Equatorial(ephem.Equatorial(ra, dec, epoch=ephem.J2000), epoch=obs.date).get()
+        return {"ra": math.degrees(ra) / 15.0, "dec": math.degrees(dec), "alt": math.degrees(body.alt)}
 
     # Public path entry point
     def get_full_day_path(self, target="sun", interval_minutes=5):
-        target = (target or "sun").lower()
-        # cache key includes target and date
-        today = datetime.utcnow().date()
-        key_path = f"path_{target}"
-        key_date = f"date_{target}"
-        if solar_cache.get(key_date) == today and solar_cache.get(key_path):
-            return solar_cache[key_path]
-
-        if target == "moon":
-            path = self._moon_path_next_24h(interval_minutes)
-        else:
-            path = self._sun_path_sunrise_to_sunset(interval_minutes)
-
-        solar_cache[key_date] = today
-        solar_cache[key_path] = path
-        emit_log(f"[ASTRO] Generated {len(path)} points for {target}")
-        return path
+        """Day path for the site's current local date; served from path_cache when possible."""
+        return self.get_day_path(target, interval_minutes)[1].points
+
+    def get_day_path(self, target="sun", interval_minutes=5):
+        """(cache key, DayPath) for the site's current local date; the key doubles as an ETag source."""
+        target = "moon" if (target or "sun").lower() == "moon" else "sun"
+        site = self.site()
+        key = (site, target, observing_date(site), interval_minutes)
+        return key, self._cached_day_path(*key)
+
+    def _cached_day_path(self, site, target, date, interval_minutes):
+        def compute():
+            try:
+                path = compute_day_path(site, target, date, interval_minutes)
+            except Exception as e:
+                emit_log(f"[ASTRO] Path error: {e}")
+                return DayPath(0.0, 0.0, [], [], points=[])
+            emit_log(f"[ASTRO] Generated {len(path)} points for {target}")
+            return path
+        return self.path_cache.get_or_compute((site, target, date, interval_minutes), compute)
+
+    def prewarm_paths(self, profiles=None, interval_minutes=5):
+        """Compute today's Sun and Moon paths for every location profile."""
+        count = 0
+        for name in (profiles or LOCATION_PROFILES):
+            site = site_from_profile(name)
+            if site is None:
+                continue
+            date = observing_date(site)
+            for target in ("sun", "moon"):
+                if (site, target, date, interval_minutes) not in self.path_cache:
+                    self._cached_day_path(site, target, date, interval_minutes)
+                    count += 1
+        emit_log(f"[ASTRO] Path cache prewarmed ({count} paths)")
+
+    def path_cache_stats(self):
+        return self.path_cache.stats()
 
     # ---------------- Unified API ----------------
 
@@ -360,34 +416,89 @@ class AstroPosition:
         return payload
     
     def clear_path_cache(self):
-        for t in ("sun", "moon"):
-            solar_cache.pop(f"path_{t}", None)
-            solar_cache.pop(f"date_{t}", None)
+        """Drop the current site's cached paths; other sites' stay."""
+        site = self.site()
+        self.path_cache.evict(lambda key: key[0] == site)
+
+    # ---------------- Events ----------------
+
+    def _apply_events(self):
+        """Refresh the rise/set/transit strings from the scheduler's queue."""
+        def hhmm(body, kind):
+            ev = self.events.next_event(body, kind)
+            return ephem.localtime(ephem.Date(ev.time)).strftime("%H:%M") if ev else "--"
+
+        self.sun_times.update({
+            "sunrise": hhmm("sun", "rise"),
+            "sunset": hhmm("sun", "set"),
+            "solar_noon": hhmm("sun", "transit"),
+            "civil_dawn": hhmm("sun", "civil_dawn"),
+            "civil_dusk": hhmm("sun", "civil_dusk"),
+            "nautical_dawn": hhmm("sun", "nautical_dawn"),
+            "nautical_dusk": hhmm("sun", "nautical_dusk"),
+            "astronomical_dawn": hhmm("sun", "astronomical_dawn"),
+            "astronomical_dusk": hhmm("sun", "astronomical_dusk"),
+        })
+        self.moon_times.update({
+            "moonrise": hhmm("moon", "rise"),
+            "moonset":  hhmm("moon", "set"),
+            "moon_transit": hhmm("moon", "transit"),
+        })
+
+    def _on_events(self, due):
+        self._apply_events()
+        for ev in due:
+            emit_log(f"[ASTRO] {ev.body.title()} {ev.kind.replace('_', ' ')}")
+        self._publish()
+
+    def _publish(self):
+        if self.publisher:
+            self.publisher.publish()
+        elif self._monitor_sio:
+            self._monitor_sio.emit("astro_update", self.build_frontend_payload())
+
+    def next_interval(self, base):
+        """
+        Seconds until the active target's alt/az moves by about 0.01° (the
+        displayed precision), never below `base` and at most
+        ASTRO_MAX_INTERVAL. Only while the mount moves does it drop to
+        ASTRO_MIN_INTERVAL; it relaxes to the ceiling while the target is down.
+        """
+        if self.motion_hint and self.motion_hint():
+            return ASTRO_MIN_INTERVAL
+        try:
+            now = float(ephem.now())
+            table = self.tables.lookup(self.site(), self.target_mode, now)
+            if table is None:
+                return base
+            p0, p1 = table.position(now), table.position(now + 60.0 / 86400)
+        except Exception:
+            return base
+        if p0["alt"] < -2.0:
+            return ASTRO_MAX_INTERVAL
+        d_az = ((p1["az"] - p0["az"] + 180.0) % 360.0 - 180.0) * math.cos(math.radians(p0["alt"]))
+        rate = math.hypot(p1["alt"] - p0["alt"], d_az) / 60.0  # deg/s
+        if rate <= 0:
+            return ASTRO_MAX_INTERVAL
+        return min(max(0.01 / rate, base), ASTRO_MAX_INTERVAL)
 
     # ---------------- Monitor loop ----------------
 
     def start_monitor(self, socketio, interval=20):
+        self._monitor_sio = socketio
+        socketio.start_background_task(self.events.run)
+
         def loop():
             emit_log("[ASTRO] Monitor loop running")
-            # initial push
-            self.update_sun_times()
-            self.update_moon_times()
+            # initial push (rise/set times arrive from the event scheduler)
             self.update_solar_position()
             self.update_lunar_position()
-            socketio.emit("astro_update", self.build_frontend_payload())
+            self._publish()
 
-            count = 0
             while True:
-                socketio.sleep(interval)
+                socketio.sleep(self.next_interval(interval) if self.publisher else interval)
                 self.update_solar_position()
                 self.update_lunar_position()
-
-                # refresh rise/set a few times/day
-                if interval > 0 and (count % max(1, (6*60*60)//interval) == 0):
-                    self.update_sun_times()
-                    self.update_moon_times()
-
-                socketio.emit("astro_update", self.build_frontend_payload())
-                count += 1
+                self._publish()
 
         socketio.start_background_task(loop)
\ No newline at end of file
@@ -0,0 +1,662 @@
+# Ephemeris Module
+# Batch Sun/Moon ephemeris engine (PyEphem nodes + NumPy interpolation)
+
+import math
+import struct
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+import ephem
+import numpy as np
+import pytz
+from numpy.polynomial import chebyshev
+
+from utilities.config import LOCATION_PROFILES
+from utilities.logger import emit_log
+
+DEG = 180.0 / np.pi
+RAD = np.pi / 180.0
+
+# ephem.Date is days since 1899-12-31 12:00 UTC; this is 1970-01-01 00:00 UTC
+UNIX_EPOCH_EPHEM = 25567.5
+
+BODIES = {"sun": ephem.Sun, "moon": ephem.Moon}
+
+# Spacing (hours) of exact PyEphem evaluations; everything in between is a
+# cubic interpolation of topocentric RA/Dec and apparent sidereal time.
+NODE_STEP_HOURS = {"sun": 2.0, "moon": 1.0}
+
+# PyEphem's default atmosphere, applied to vectorized altitudes
+DEFAULT_PRESSURE = 1010.0   # mbar
+DEFAULT_TEMP = 15.0         # °C
+
+# Per-day Chebyshev tables: segment length, polynomial degree, accepted fit error
+TABLE_SEGMENT_HOURS = 2.0
+TABLE_DEGREE = 7
+TABLE_MAX_ERROR_ARCSEC = 5.0
+
+_HHMM = [f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)]
+
+
+class Site(NamedTuple):
+    """Observer location (degrees, degrees, meters) and optional IANA time zone."""
+    lat: float
+    lon: float
+    elev: float = 0.0
+    tz: str = None
+
+
+def profile_tz(lat, lon):
+    """Time zone of the LOCATION_PROFILES entry at (lat, lon), if any."""
+    for prof in LOCATION_PROFILES.values():
+        if isinstance(prof, dict) and abs(prof.get("lat", 999) - lat) < 1e-3 and abs(prof.get("lon", 999) - lon) < 1e-3:
+            return prof.get("tz")
+    return None
+
+
+def site_from_profile(profile_name):
+    """Site for a LOCATION_PROFILES entry (dict or (lat, lon, elev) tuple), or None."""
+    prof = LOCATION_PROFILES.get(profile_name)
+    if isinstance(prof, dict):
+        return Site(float(prof["lat"]), float(prof["lon"]), float(prof.get("elev", 0.0)), prof.get("tz"))
+    if isinstance(prof, (list, tuple)) and len(prof) >= 3:
+        lat, lon, elev = map(float, prof[:3])
+        return Site(lat, lon, elev, profile_tz(lat, lon))
+    return None
+
+
+def body_name(body):
+    """Map 'sun'/'moon' or ephem.Sun/ephem.Moon to the engine's body name."""
+    if isinstance(body, str):
+        name = body.lower()
+    else:
+        name = {ephem.Sun: "sun", ephem.Moon: "moon"}.get(body)
+    if name not in BODIES:
+        raise ValueError(f"Unsupported body: {body}")
+    return name
+
+
+def make_observer(site, date=None, pressure=None):
+    """Private ephem.Observer for a site; never shared between callers."""
+    obs = ephem.Observer()
+    obs.lat = str(site.lat)
+    obs.lon = str(site.lon)
+    obs.elev = site.elev
+    if pressure is not None:
+        obs.pressure = pressure
+    if date is not None:
+        obs.date = date
+    return obs
+
+
+def sample_times(start, end, interval_minutes):
+    """Uniform ephem-date samples in [start, end) at interval_minutes cadence."""
+    step = interval_minutes / (24 * 60.0)
+    start, end = float(start), float(end)
+    if end <= start or step <= 0:
+        return np.empty(0)
+    n = int(np.ceil((end - start) / step - 1e-9))
+    return start + step * np.arange(n)
+
+
+def observing_date(site, when=None):
+    """Local calendar date at the site (system local time if the site has no tz)."""
+    when = when or datetime.utcnow()
+    if not site.tz:
+        return datetime.fromtimestamp(when.replace(tzinfo=pytz.utc).timestamp()).date()
+    return pytz.utc.localize(when).astimezone(pytz.timezone(site.tz)).date()
+
+
+def local_midnight(site, date):
+    """ephem date of 00:00 site-local time on the given date."""
+    midnight = datetime(date.year, date.month, date.day)
+    if not site.tz:
+        return ephem.Date(datetime.utcfromtimestamp(midnight.timestamp()))
+    local = pytz.timezone(site.tz).localize(midnight)
+    return ephem.Date(local.astimezone(pytz.utc).replace(tzinfo=None))
+
+
+def to_unix(times):
+    """ephem dates (days) → POSIX seconds."""
+    return (np.asarray(times, dtype=float) - UNIX_EPOCH_EPHEM) * 86400.0
+
+
+def from_unix(seconds):
+    """POSIX seconds → ephem dates (days)."""
+    return np.asarray(seconds, dtype=float) / 86400.0 + UNIX_EPOCH_EPHEM
+
+
+def utc_offsets(epoch):
+    """Local UTC offset (s) at each POSIX time; a scalar unless a DST change falls inside."""
+    first = time.localtime(epoch[0]).tm_gmtoff
+    if first == time.localtime(epoch[-1]).tm_gmtoff:
+        return first
+    return np.array([time.localtime(e).tm_gmtoff for e in epoch])
+
+
+def local_hhmm(times):
+    """Format ephem dates as local 'HH:MM' labels (same as ephem.localtime)."""
+    epoch = to_unix(times)
+    if epoch.size == 0:
+        return []
+    minutes = np.floor((np.round(epoch, 3) + utc_offsets(epoch)) / 60.0).astype(np.int64) % (24 * 60)
+    return [_HHMM[m] for m in minutes.tolist()]
+
+
+# ---------------- Vectorized math ----------------
+
+def equatorial_to_horizontal(ha, dec, lat):
+    """Hour angle/declination (rad) → altitude/azimuth (rad, az N→E)."""
+    sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+    sin_dec, cos_dec = np.sin(dec), np.cos(dec)
+    cos_ha = np.cos(ha)
+    alt = np.arcsin(np.clip(sin_lat * sin_dec + cos_lat * cos_dec * cos_ha, -1.0, 1.0))
+    az = np.arctan2(-cos_dec * np.sin(ha), cos_lat * sin_dec - sin_lat * cos_dec * cos_ha)
+    return alt, np.mod(az, 2 * np.pi)
+
+
+def _unrefract(aa, pressure, temp):
+    """Refraction (deg) at apparent altitude aa (deg), as in libastro."""
+    k = pressure / (273.0 + temp)
+    lt15 = k * (0.1594 + 0.0196 * aa + 0.00002 * aa * aa) / (1.0 + 0.505 * aa + 0.0845 * aa * aa)
+    ge15 = 7.888888e-5 * k / np.tan(np.maximum(aa, 14.0) * RAD) * DEG
+    w = np.clip(aa - 14.5, 0.0, 1.0)
+    return (1.0 - w) * lt15 + w * ge15
+
+
+def refraction(alt_deg, pressure=DEFAULT_PRESSURE, temp=DEFAULT_TEMP):
+    """Refraction (deg) to add to true altitudes in degrees; matches PyEphem's."""
+    ta = np.asarray(alt_deg, dtype=float)
+    if pressure <= 0:
+        return np.zeros_like(ta)
+    aa = ta.copy()
+    for _ in range(4):
+        aa = ta + _unrefract(np.maximum(aa, -1.0), pressure, temp)
+    return np.where(ta < -2.0, 0.0, aa - ta)
+
+
+def _refraction_scalar(ta, pressure=DEFAULT_PRESSURE, temp=DEFAULT_TEMP):
+    """Float-only twin of refraction() for the per-call live path."""
+    if ta < -2.0 or pressure <= 0:
+        return 0.0
+    k = pressure / (273.0 + temp)
+    aa = ta
+    for _ in range(4):
+        a = max(aa, -1.0)
+        if a >= 15.5:
+            r = 7.888888e-5 * k / math.tan(math.radians(a)) * DEG
+        else:
+            lt15 = k * (0.1594 + 0.0196 * a + 0.00002 * a * a) / (1.0 + 0.505 * a + 0.0845 * a * a)
+            ge15 = 7.888888e-5 * k / math.tan(math.radians(max(a, 14.0))) * DEG
+            w = min(max(a - 14.5, 0.0), 1.0)
+            r = (1.0 - w) * lt15 + w * ge15
+        prev, aa = aa, ta + r
+        if abs(aa - prev) < 1e-7:  # converged (well under 0.001″)
+            break
+    return aa - ta
+
+
+def _cubic_interp(nodes_t, values, t):
+    """4-point Lagrange interpolation on a uniform node grid."""
+    h = nodes_t[1] - nodes_t[0]
+    u = (t - nodes_t[0]) / h
+    i = np.clip(np.floor(u).astype(np.int64), 1, len(nodes_t) - 3)
+    f = u - i
+    v0, v1, v2, v3 = values[i - 1], values[i], values[i + 1], values[i + 2]
+    return (-f * (f - 1) * (f - 2) / 6.0 * v0
+            + (f + 1) * (f - 1) * (f - 2) / 2.0 * v1
+            - (f + 1) * f * (f - 2) / 2.0 * v2
+            + (f + 1) * f * (f - 1) / 6.0 * v3)
+
+
+def _node_grid(times, step_days):
+    lo = np.floor(times.min() / step_days) - 1
+    hi = np.ceil(times.max() / step_days) + 2
+    return np.arange(lo, hi + 1) * step_days
+
+
+def _eval_nodes(site, body_cls, nodes):
+    """Exact PyEphem topocentric RA/Dec and apparent sidereal time at nodes."""
+    obs = make_observer(site, pressure=0.0)
+    body = body_cls()
+    ra = np.empty(len(nodes))
+    dec = np.empty(len(nodes))
+    lst = np.empty(len(nodes))
+    for k, t in enumerate(nodes):
+        obs.date = t
+        body.compute(obs)
+        ra[k] = float(body.ra)
+        dec[k] = float(body.dec)
+        lst[k] = float(obs.sidereal_time())
+    return ra, dec, lst
+
+
+# ---------------- Batch engine ----------------
+
+def compute_batch(site, times, bodies=("sun", "moon"), refract=True):
+    """
+    Positions of each body at every time in one call.
+    Returns {name: {"alt", "az", "ra", "dec"}} as float64 arrays in degrees
+    (RA in degrees too). Uses a private observer, so no shared lock is held.
+    """
+    times = np.atleast_1d(np.asarray(times, dtype=float))
+    out = {}
+    for body in bodies:
+        name = body_name(body)
+        if times.size == 0:
+            empty = np.empty(0)
+            out[name] = {"alt": empty, "az": empty, "ra": empty, "dec": empty}
+            continue
+
+        nodes = _node_grid(times, NODE_STEP_HOURS[name] / 24.0)
+        ra_n, dec_n, lst_n = _eval_nodes(site, BODIES[name], nodes)
+
+        ra = np.mod(_cubic_interp(nodes, np.unwrap(ra_n), times), 2 * np.pi)
+        dec = _cubic_interp(nodes, dec_n, times)
+        lst = _cubic_interp(nodes, np.unwrap(lst_n), times)
+
+        alt, az = equatorial_to_horizontal(lst - ra, dec, site.lat * RAD)
+        alt_deg = alt * DEG
+        if refract:
+            alt_deg = alt_deg + refraction(alt_deg)
+
+        out[name] = {"alt": alt_deg, "az": az * DEG, "ra": ra * DEG, "dec": dec * DEG}
+    return out
+
+
+def day_window(site, target, date):
+    """
+    (start, end) ephem dates of a body's day path for a local observing date:
+    sunrise→sunset for the Sun, local midnight→midnight for the Moon (and for
+    the Sun on days it never rises or sets).
+    """
+    start = local_midnight(site, date)
+    end = local_midnight(site, date + timedelta(days=1))
+    if body_name(target) == "sun":
+        obs = make_observer(site, date=start)
+        try:
+            rise = obs.next_rising(ephem.Sun())
+            obs.date = rise
+            return rise, obs.next_setting(ephem.Sun())
+        except (ephem.AlwaysUpError, ephem.NeverUpError):
+            pass
+    return start, end
+
+
+def compute_day_path(site, target, date, interval_minutes=5):
+    """DayPath of a body over its day window."""
+    return sample_path(site, target, *day_window(site, target, date), interval_minutes)
+
+
+def sample_path(site, target, start, end, interval_minutes=5):
+    """DayPath of a body between two ephem dates, in one batch call."""
+    name = body_name(target)
+    times = sample_times(start, end, interval_minutes)
+    pos = compute_batch(site, times, bodies=(name,))[name]
+    return DayPath.from_samples(times, pos["alt"], pos["az"])
+
+
+def path_points(times, alt, az):
+    """Batch arrays → the [{"az","alt","time"}] list the UI plots."""
+    alt = np.round(np.clip(alt, 0.0, 90.0), 2).tolist()
+    az = np.round(np.mod(az, 360.0), 2).tolist()
+    labels = local_hhmm(times)
+    return [{"az": a, "alt": e, "time": s} for a, e, s in zip(az, alt, labels)]
+
+
+# ---------------- Packed paths ----------------
+
+# Little-endian: magic, version, 3 pad bytes, start (POSIX s, float64), step (s,
+# float32), point count (uint32); then alt[n] and az[n] as float32 and the UTC
+# offset of each point's time label (minutes, int16[n]). Per-point offsets let
+# clients in any zone label points as the JSON path does, across a DST change too.
+# 24 bytes keeps the arrays aligned for JS typed-array views.
+PACKED_MAGIC = b"ASTP"
+PACKED_VERSION = 3
+PACKED_HEADER = struct.Struct("<4sBxxxdfI")
+
+
+class DayPath:
+    """
+    An evenly sampled path: start time, step and float32 alt/az arrays (alt
+    clipped to 0–90°, az in 0–360°). `points` is the JSON list the UI has
+    always used; packed() is the same path in PACKED_HEADER layout.
+    """
+    __slots__ = ("t0", "step", "alt", "az", "created", "_points", "_packed")
+
+    def __init__(self, t0, step, alt, az, points=None):
+        self.t0 = float(t0)
+        self.step = float(step)
+        self.alt = np.asarray(alt, dtype=np.float32)
+        self.az = np.asarray(az, dtype=np.float32)
+        self.created = time.time()
+        self._points = points
+        self._packed = None
+
+    @classmethod
+    def from_samples(cls, times, alt, az):
+        times = np.asarray(times, dtype=float)
+        t0 = to_unix(times[0]) if len(times) else 0.0
+        step = (times[1] - times[0]) * 86400.0 if len(times) > 1 else 0.0
+        return cls(t0, step, np.clip(alt, 0.0, 90.0), np.mod(az, 360.0),
+                   points=path_points(times, alt, az))
+
+    @classmethod
+    def from_points(cls, points, t0, step):
+        """Rebuild from a stored points list plus its start and step."""
+        return cls(t0, step, [p["alt"] for p in points], [p["az"] for p in points], points=points)
+
+    def __len__(self):
+        return len(self.alt)
+
+    @property
+    def points(self):
+        if self._points is None:
+            times = UNIX_EPOCH_EPHEM + (self.t0 + self.step * np.arange(len(self))) / 86400.0
+            self._points = path_points(times, self.alt.astype(float), self.az.astype(float))
+        return self._points
+
+    def packed(self):
+        """Header + alt + az + label offsets as bytes (10 bytes per point)."""
+        if self._packed is None:
+            n = len(self)
+            offsets = utc_offsets(self.t0 + self.step * np.arange(n)) if n else 0  # same zone as local_hhmm()
+            offsets = np.broadcast_to(np.floor_divide(offsets, 60), (n,)).astype("<i2")
+            header = PACKED_HEADER.pack(PACKED_MAGIC, PACKED_VERSION, self.t0, self.step, n)
+            self._packed = (header + self.alt.astype("<f4").tobytes() + self.az.astype("<f4").tobytes()
+                            + offsets.tobytes())
+        return self._packed
+
+
+# ---------------- Per-day tables ----------------
+
+def day_start(t):
+    """ephem date of 00:00 UTC on the day containing t."""
+    return math.floor(float(t) - 0.5) + 0.5
+
+
+def _clenshaw(c, x):
+    b1 = b2 = 0.0
+    x2 = 2.0 * x
+    for a in reversed(c[1:]):
+        b1, b2 = a + x2 * b1 - b2, b1
+    return c[0] + x * b1 - b2
+
+
+class EphemerisTable:
+    """
+    One body's topocentric RA/Dec and apparent sidereal time over one UTC day,
+    stored as Chebyshev coefficients per segment. position() is a few µs of
+    float math; max_error_arcsec is the fit error measured at build time.
+    """
+    def __init__(self, site, body, start, segment_hours=TABLE_SEGMENT_HOURS, degree=TABLE_DEGREE):
+        self.site = site
+        self.body = body_name(body)
+        self.start = float(start)
+        self.seg = segment_hours / 24.0
+        self.n_seg = int(round(1.0 / self.seg))
+        self.end = self.start + self.n_seg * self.seg
+        self._sin_lat = math.sin(math.radians(site.lat))
+        self._cos_lat = math.cos(math.radians(site.lat))
+
+        x = -np.cos(np.pi * (np.arange(degree + 1) + 0.5) / (degree + 1))  # ascending
+        nodes = (self.start + self.seg * (np.arange(self.n_seg)[:, None] + (x + 1) / 2)).ravel()
+        ra, dec, lst = (v.reshape(self.n_seg, -1) for v in _eval_nodes(site, BODIES[self.body], nodes))
+
+        self._coef = []
+        for i in range(self.n_seg):
+            self._coef.append(tuple(
+                chebyshev.chebfit(x, y, degree).tolist()
+                for y in (np.unwrap(ra[i]), dec[i], np.unwrap(lst[i]))
+            ))
+        self.max_error_arcsec = self._fit_error()
+
+    def covers(self, t):
+        return self.start <= t < self.end
+
+    def _eval(self, t):
+        u = (t - self.start) / self.seg
+        i = min(max(int(u), 0), self.n_seg - 1)
+        x = 2.0 * (u - i) - 1.0
+        c_ra, c_dec, c_lst = self._coef[i]
+        return _clenshaw(c_ra, x), _clenshaw(c_dec, x), _clenshaw(c_lst, x)
+
+    def position(self, t, refract=True):
+        """{"alt","az","ra","dec"} in degrees at ephem date t."""
+        ra, dec, lst = self._eval(float(t))
+        ha = lst - ra
+        sin_dec, cos_dec, cos_ha = math.sin(dec), math.cos(dec), math.cos(ha)
+        sin_alt = self._sin_lat * sin_dec + self._cos_lat * cos_dec * cos_ha
+        alt = math.degrees(math.asin(max(-1.0, min(1.0, sin_alt))))
+        az = math.degrees(math.atan2(-cos_dec * math.sin(ha),
+                                     self._cos_lat * sin_dec - self._sin_lat * cos_dec * cos_ha))
+        if refract:
+            alt += _refraction_scalar(alt)
+        return {"alt": alt, "az": az % 360.0, "ra": math.degrees(ra) % 360.0, "dec": math.degrees(dec)}
+
+    def _fit_error(self):
+        """Max RA/Dec error (arcsec) at points between the fitting nodes."""
+        check = self.start + self.seg * (np.arange(self.n_seg)[:, None] + np.linspace(0.05, 0.95, 7)).ravel()
+        ra, dec, _ = _eval_nodes(self.site, BODIES[self.body], check)
+        err = 0.0
+        for t, r, d in zip(check.tolist(), ra.tolist(), dec.tolist()):
+            fr, fd, _ = self._eval(t)
+            d_ra = (fr - r + math.pi) % (2 * math.pi) - math.pi
+            err = max(err, abs(d_ra) * math.cos(d), abs(fd - d))
+        return math.degrees(err) * 3600.0
+
+    def verify(self, samples=48):
+        """Self-check against a direct PyEphem computation; max error in arcsec."""
+        obs = make_observer(self.site)
+        body = BODIES[self.body]()
+        err = 0.0
+        for t in np.linspace(self.start, self.end, samples, endpoint=False).tolist():
+            obs.date = t
+            body.compute(obs)
+            p = self.position(t)
+            alt = math.degrees(float(body.alt))
+            d_ra = (p["ra"] - math.degrees(float(body.ra)) + 180.0) % 360.0 - 180.0
+            err = max(err, abs(d_ra) * math.cos(float(body.dec)),
+                      abs(p["dec"] - math.degrees(float(body.dec))))
+            if alt > 0:
+                d_az = (p["az"] - math.degrees(float(body.az)) + 180.0) % 360.0 - 180.0
+                err = max(err, abs(p["alt"] - alt), abs(d_az) * math.cos(float(body.alt)))
+        return err * 3600.0
+
+
+class EphemerisTables:
+    """Tables keyed by (site, body, UTC day), built on a background thread."""
+    def __init__(self, max_tables=16):
+        self.max_tables = max_tables
+        self._tables = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def lookup(self, site, body, t):
+        """Table covering t, or None (a build is scheduled) so callers fall back to PyEphem."""
+        name = body_name(body)
+        start = day_start(t)
+        table = self._tables.get((site, name, start))
+        if table is None:
+            self.schedule(site, name, start)
+        elif t - start > 22 / 24.0:  # get tomorrow ready before midnight
+            self.schedule(site, name, start + 1.0)
+        return table
+
+    def schedule(self, site, body, start):
+        key = (site, body_name(body), start)
+        with self._lock:
+            if key in self._tables or key in self._pending:
+                return
+            self._pending.add(key)
+        threading.Thread(target=self._build, args=key, daemon=True).start()
+
+    def _build(self, site, body, start):
+        try:
+            table = EphemerisTable(site, body, start)
+            err = max(table.max_error_arcsec, table.verify())
+            if err > TABLE_MAX_ERROR_ARCSEC:
+                emit_log(f"[ASTRO] Ephemeris table rejected ({body}, err {err:.1f}\")")
+                return
+            with self._lock:
+                self._tables[(site, body, start)] = table
+                while len(self._tables) > self.max_tables:
+                    oldest = min(self._tables, key=lambda k: k[2])
+                    del self._tables[oldest]
+        except Exception as e:
+            emit_log(f"[ASTRO] Ephemeris table error ({body}): {e}")
+        finally:
+            with self._lock:
+                self._pending.discard((site, body, start))
+
+
+# ---------------- RA/Dec → Alt/Az ----------------
+
+SIDEREAL_RATE = 2 * np.pi * 1.00273790935   # rad of sidereal time per day
+LIGHT_AU_PER_DAY = 173.144632674
+
+
+def _radec_vector(ra, dec):
+    return np.array([math.cos(dec) * math.cos(ra), math.cos(dec) * math.sin(ra), math.sin(dec)])
+
+
+def _rot_x(a):
+    c, s = math.cos(a), math.sin(a)
+    return np.array([[1.0, 0.0, 0.0], [0.0, c, -s], [0.0, s, c]])
+
+
+def _rot_z(a):
+    c, s = math.cos(a), math.sin(a)
+    return np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]])
+
+
+def _nutation_matrix(t):
+    """Mean → true equator of date (IAU 1980 leading terms, ~0.5″)."""
+    T = (float(t) - 36525.0) / 36525.0    # Julian centuries from J2000 (ephem dates)
+    om = math.radians(125.04452 - 1934.136261 * T)
+    l_sun = math.radians(280.4665 + 36000.7698 * T)
+    l_moon = math.radians(218.3165 + 481267.8813 * T)
+    dpsi = (-17.20 * math.sin(om) - 1.32 * math.sin(2 * l_sun)
+            - 0.23 * math.sin(2 * l_moon) + 0.21 * math.sin(2 * om))
+    deps = (9.20 * math.cos(om) + 0.57 * math.cos(2 * l_sun)
+            + 0.10 * math.cos(2 * l_moon) - 0.09 * math.cos(2 * om))
+    eps0 = math.radians(23.4392911 - 0.0130042 * T)
+    eps = eps0 + math.radians(deps / 3600.0)
+    return _rot_x(eps) @ _rot_z(math.radians(dpsi / 3600.0)) @ _rot_x(-eps0)
+
+
+def _precession_matrix(t):
+    """Mean J2000 → mean equator of date, from PyEphem's precession of the axes."""
+    cols = []
+    for ra, dec in ((0.0, 0.0), (math.pi / 2, 0.0), (0.0, math.pi / 2)):
+        eq = ephem.Equatorial(ephem.Equatorial(ra, dec, epoch=ephem.J2000), epoch=t)
+        cols.append(_radec_vector(float(eq.ra), float(eq.dec)))
+    return np.column_stack(cols)
+
+
+def _aberration_vector(t):
+    """Earth's velocity / c in J2000 axes (annual aberration), from the Sun's motion."""
+    def sun_vec(d):
+        sun = ephem.Sun(ephem.Date(d))
+        return sun.earth_distance * _radec_vector(float(sun.a_ra), float(sun.a_dec))
+    h = 0.05
+    return -(sun_vec(t + h) - sun_vec(t - h)) / (2 * h) / LIGHT_AU_PER_DAY
+
+
+class AltAzTransformer:
+    """
+    RA/Dec → Alt/Az for one site, matching what an ephem.FixedBody computes.
+    Everything that only depends on the time — sidereal time, the J2000 →
+    apparent rotation and the aberration vector — is computed once per
+    `bucket_sec` and reused; sidereal time is advanced linearly inside a
+    bucket. `precess=False` treats inputs as apparent (JNow) coordinates.
+    Repeated altaz() calls for the same pair within a bucket are memoized.
+    """
+    def __init__(self, site, bucket_sec=1.0, refract=True, precess=True,
+                 pressure=DEFAULT_PRESSURE, temp=DEFAULT_TEMP):
+        self.bucket = bucket_sec / 86400.0
+        self.refract = refract
+        self.precess = precess
+        self.pressure = pressure if refract else 0.0
+        self.temp = temp
+        self._site = site
+        self._frame = None    # (site, bucket index, t_ref, lst_ref, matrix, aberration)
+        self._memo = None     # ((ra, dec, site, bucket index), (alt, az))
+
+    def set_site(self, site):
+        self._site = site
+        self._frame = None
+        self._memo = None
+
+    def site(self):
+        return self._site
+
+    # ---- public API ----
+    def altaz(self, ra_hours, dec_deg, when=None):
+        """One RA (hours)/Dec (deg) pair → (alt, az) in degrees; pure float math."""
+        t = float(ephem.now() if when is None else when)
+        site, index, t_ref, lst_ref, m, ab = self._frame_at(t)
+        key = (ra_hours, dec_deg, site, index)
+        memo = self._memo
+        if when is None and memo is not None and memo[0] == key:
+            return memo[1]
+        ra, dec = math.radians(ra_hours * 15.0), math.radians(dec_deg)
+        cd = math.cos(dec)
+        x, y, z = cd * math.cos(ra) + ab[0], cd * math.sin(ra) + ab[1], math.sin(dec) + ab[2]
+        x, y, z = (m[0][0] * x + m[0][1] * y + m[0][2] * z,
+                   m[1][0] * x + m[1][1] * y + m[1][2] * z,
+                   m[2][0] * x + m[2][1] * y + m[2][2] * z)
+        ha = lst_ref + SIDEREAL_RATE * (t - t_ref) - math.atan2(y, x)
+        sin_dec = z / math.sqrt(x * x + y * y + z * z)
+        cos_dec = math.sqrt(max(0.0, 1.0 - sin_dec * sin_dec))
+        lat = math.radians(site.lat)
+        sin_lat, cos_lat, cos_ha = math.sin(lat), math.cos(lat), math.cos(ha)
+        alt = math.degrees(math.asin(max(-1.0, min(1.0, sin_lat * sin_dec + cos_lat * cos_dec * cos_ha))))
+        az = math.degrees(math.atan2(-cos_dec * math.sin(ha), cos_lat * sin_dec - sin_lat * cos_dec * cos_ha)) % 360.0
+        if self.refract:
+            alt += _refraction_scalar(alt, self.pressure, self.temp)
+        if when is None:
+            self._memo = (key, (alt, az))
+        return alt, az
+
+    def transform(self, ra_hours, dec_deg, times=None):
+        """
+        Arrays of RA (hours)/Dec (deg) → {"alt", "az"} arrays in degrees.
+        `times` (ephem dates, scalar or per-sample) defaults to now; one frame
+        serves the whole batch, so keep batches within a few hours.
+        """
+        ra = np.radians(np.asarray(ra_hours, dtype=float) * 15.0)
+        dec = np.radians(np.asarray(dec_deg, dtype=float))
+        t = np.asarray(float(ephem.now()) if times is None else times, dtype=float)
+        site, _, t_ref, lst_ref, m, ab = self._frame_at(float(np.min(t)) if t.size else float(ephem.now()))
+        v = np.stack(np.broadcast_arrays(np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)))
+        v = m @ (v.reshape(3, -1) + np.asarray(ab).reshape(3, 1))
+        v = v.reshape((3,) + np.broadcast(ra, dec).shape)
+        ra_app = np.arctan2(v[1], v[0])
+        dec_app = np.arcsin(np.clip(v[2] / np.linalg.norm(v, axis=0), -1.0, 1.0))
+        lst = lst_ref + SIDEREAL_RATE * (t - t_ref)
+        alt, az = equatorial_to_horizontal(lst - ra_app, dec_app, site.lat * RAD)
+        alt_deg = alt * DEG
+        if self.refract:
+            alt_deg = alt_deg + refraction(alt_deg, self.pressure, self.temp)
+        return {"alt": alt_deg, "az": az * DEG}
+
+    # ---- internals ----
+    def _frame_at(self, t):
+        site = self._site
+        index = math.floor(t / self.bucket)
+        frame = self._frame
+        if frame is not None and frame[0] is site and frame[1] == index:
+            return frame
+        t_ref = index * self.bucket
+        lst = float(make_observer(site, date=t_ref).sidereal_time())
+        if self.precess:
+            m = _nutation_matrix(t_ref) @ _precession_matrix(t_ref)
+            ab = tuple(_aberration_vector(t_ref).tolist())
+        else:
+            m, ab = np.eye(3), (0.0, 0.0, 0.0)
+        frame = (site, index, t_ref, lst, m.tolist(), ab)
+        self._frame = frame
+        return frame
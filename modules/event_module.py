@@ -0,0 +1,149 @@
+# Event Module
+# Heap-driven rise/set/transit/twilight scheduler for the Sun and Moon
+
+import heapq
+import threading
+import time
+from typing import NamedTuple
+
+import ephem
+
+from modules.ephemeris_module import BODIES, make_observer
+from utilities.logger import emit_log
+
+# (body, kind) -> (observer method, horizon, use_center)
+EVENT_SPECS = {
+    ("sun", "rise"):              ("next_rising",  "0",   False),
+    ("sun", "set"):               ("next_setting", "0",   False),
+    ("sun", "transit"):           ("next_transit", "0",   False),
+    ("sun", "civil_dawn"):        ("next_rising",  "-6",  True),
+    ("sun", "civil_dusk"):        ("next_setting", "-6",  True),
+    ("sun", "nautical_dawn"):     ("next_rising",  "-12", True),
+    ("sun", "nautical_dusk"):     ("next_setting", "-12", True),
+    ("sun", "astronomical_dawn"): ("next_rising",  "-18", True),
+    ("sun", "astronomical_dusk"): ("next_setting", "-18", True),
+    ("moon", "rise"):             ("next_rising",  "0",   False),
+    ("moon", "set"):              ("next_setting", "0",   False),
+    ("moon", "transit"):          ("next_transit", "0",   False),
+}
+
+ONE_MINUTE = 1.0 / (24 * 60)
+
+
+class Event(NamedTuple):
+    time: float   # ephem date (UTC)
+    body: str
+    kind: str
+
+
+def find_next_event(site, body, kind, after):
+    """Next occurrence of (body, kind) after an ephem date, or None if it never happens."""
+    method, horizon, use_center = EVENT_SPECS[(body, kind)]
+    obs = make_observer(site, date=after)
+    obs.horizon = horizon
+    target = BODIES[body]()
+    try:
+        if method == "next_transit":
+            return float(obs.next_transit(target))
+        return float(getattr(obs, method)(target, use_center=use_center))
+    except (ephem.AlwaysUpError, ephem.NeverUpError):
+        return None
+
+
+class AstroEventScheduler:
+    """
+    Keeps the next `depth` occurrences of every EVENT_SPECS entry in a heap and
+    sleeps until the earliest one. When an event passes, only that (body, kind)
+    is rolled forward and on_event(due_events) is called once.
+    """
+    def __init__(self, site_provider, on_event=None, depth=2):
+        self.site_provider = site_provider
+        self.on_event = on_event
+        self.depth = max(1, depth)
+        self.running = False
+        self._heap = []
+        self._latest = {}        # (body, kind) -> last queued time
+        self._site = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._dirty = True
+
+    # ---- public API ----
+    def reset(self):
+        """Site changed: recompute every event on the scheduler thread."""
+        self._dirty = True
+        self._wake.set()
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+
+    def next_event(self, body, kind):
+        """Earliest queued Event for (body, kind), or None."""
+        with self._lock:
+            matches = [e for e in self._heap if e.body == body and e.kind == kind]
+        return min(matches) if matches else None
+
+    def rebuild(self, now=None):
+        site = self.site_provider()
+        now = float(ephem.now()) if now is None else now
+        heap, latest = [], {}
+        for body, kind in EVENT_SPECS:
+            t = now
+            for _ in range(self.depth):
+                t = find_next_event(site, body, kind, t)
+                if t is None:
+                    break
+                heap.append(Event(t, body, kind))
+                latest[(body, kind)] = t
+                t += ONE_MINUTE
+        heapq.heapify(heap)
+        with self._lock:
+            self._heap, self._latest, self._site = heap, latest, site
+
+    def run(self):
+        """Scheduler loop; start with socketio.start_background_task or a thread."""
+        self.running = True
+        emit_log("[ASTRO] Event scheduler running")
+        while self.running:
+            try:
+                if self._dirty or self.site_provider() is not self._site:
+                    self._dirty = False
+                    self.rebuild()
+                    self._notify([])
+
+                with self._lock:
+                    next_t = self._heap[0].time if self._heap else None
+                # wake at the event; cap the sleep so clock jumps are noticed
+                timeout = 3600.0 if next_t is None else (next_t - float(ephem.now())) * 86400.0
+                if self._wake.wait(min(max(timeout, 0.0), 3600.0)):
+                    self._wake.clear()
+                    continue
+
+                due = self._roll_forward(float(ephem.now()) + 1.0 / 86400)
+                if due:
+                    self._notify(due)
+            except Exception as e:
+                emit_log(f"[ASTRO] Event scheduler error: {e}")
+                time.sleep(5)
+
+    # ---- internals ----
+    def _roll_forward(self, now):
+        """Pop events that have passed and queue one replacement for each."""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0].time <= now:
+                due.append(heapq.heappop(self._heap))
+            site = self._site
+        for ev in due:
+            key = (ev.body, ev.kind)
+            t = find_next_event(site, ev.body, ev.kind, max(self._latest.get(key, now), now) + ONE_MINUTE)
+            if t is not None:
+                with self._lock:
+                    heapq.heappush(self._heap, Event(t, ev.body, ev.kind))
+                    self._latest[key] = t
+        return due
+
+    def _notify(self, due):
+        if self.on_event:
+            self.on_event(due)
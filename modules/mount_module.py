@@ -1,25 +1,56 @@
 # Mount Module
 # Mount control module using INDIGO JSON client
 
-import threading
+import asyncio
+import contextvars
+import math
 import time
-import ephem
+from concurrent.futures import CancelledError, Future, InvalidStateError, ThreadPoolExecutor
 from modules.astro_module import AstroPosition
+from modules.ephemeris_module import AltAzTransformer, Site
 from utilities import config
 from utilities.config import (
     GEO_LAT, GEO_LON, GEO_ELEV,
     HOME_RA, HOME_DEC, PARK_RA, PARK_DEC,
     LOCATION_PROFILES,
+    MOUNT_COORD_EPOCH, MOUNT_ALTAZ_BUCKET_SEC, MOUNT_ALTAZ_REFRACTION,
+    MOUNT_COORD_STALE_SEC, MOUNT_GOTO_TIMEOUT_SEC, MOUNT_ARRIVAL_TOLERANCE,
+    MOUNT_TELEMETRY_CAPACITY, MOUNT_TELEMETRY_MIN_SEC, MOUNT_GUIDER_DEVICE, MOUNT_JOG_MAX_MS,
 )
+from utilities.latency_trace import tracer
 from utilities.logger import emit_log
+from utilities.property_mirror import items_near
+from utilities.telemetry_buffer import TelemetryRing
 
 _socketio = None  # Module-level SocketIO reference
+_astro_publisher = None  # DeltaPublisher for astro_update (set by app)
+
+MOTION_HOLD_SEC = 5.0  # coords changed this recently → mount counts as moving
+
+# Motion states (MountControl.state)
+IDLE = "IDLE"
+SLEWING = "SLEWING"
+TRACKING = "TRACKING"
+PARKING = "PARKING"
+PARKED = "PARKED"
+ERROR = "ERROR"
+STATES = (IDLE, SLEWING, TRACKING, PARKING, PARKED, ERROR)  # telemetry "state" column holds the index
+
+SLEW_RATES = {"slow": "GUIDE", "fast": "MAX", "solar": "CENTERING"}  # UI rate → MOUNT_SLEW_RATE item
+JOG_AXES = {"north": "dec", "south": "dec", "east": "ra", "west": "ra"}
+MOTION_SWITCHES = {"ra": ("MOUNT_MOTION_RA", ("EAST", "WEST")), "dec": ("MOUNT_MOTION_DEC", ("NORTH", "SOUTH"))}
+GUIDE_PULSES = {"ra": ("GUIDER_GUIDE_RA", ("EAST", "WEST")), "dec": ("GUIDER_GUIDE_DEC", ("NORTH", "SOUTH"))}
 
 def set_socketio(instance):
     """Attach global socketio instance for emitting from MountControl."""
     global _socketio
     _socketio = instance
 
+def set_astro_publisher(publisher):
+    """Attach the shared astro_update DeltaPublisher."""
+    global _astro_publisher
+    _astro_publisher = publisher
+
 
 class MountControl:
     def __init__(self, indigo_client):
@@ -31,11 +62,13 @@ class MountControl:
         self.location_profile = "chapel_hill"  # default profile
         self.target_mode = "sun"               # "sun" | "moon"
 
-        # Observer used for transforms
-        self.observer = ephem.Observer()
-        self.observer.lat = str(GEO_LAT)
-        self.observer.lon = str(GEO_LON)
-        self.observer.elev = GEO_ELEV
+        # RA/Dec → Alt/Az for mount readouts (sidereal time etc. cached per bucket)
+        self.transformer = AltAzTransformer(
+            Site(GEO_LAT, GEO_LON, GEO_ELEV),
+            bucket_sec=MOUNT_ALTAZ_BUCKET_SEC,
+            refract=MOUNT_ALTAZ_REFRACTION,
+            precess=str(MOUNT_COORD_EPOCH).upper() == "J2000",
+        )
 
         # Astro helper (Sun + Moon)
         self.astro = AstroPosition(GEO_LAT, GEO_LON)
@@ -45,15 +78,37 @@ class MountControl:
 
         # Run-time flags/state
         self.tracking_active = False
+        self._tracking_state = None  # last MOUNT_TRACKING we sent (None: never), replayed on reconnect
+        self._track_rate = None      # last (preset, custom multiple) we sent, replayed on reconnect
         self.coord_monitor_active = False
-        self.last_coords = {"ra": None, "dec": None}
-        self.last_ra = config.LAST_RA
-        self.last_dec = config.LAST_DEC
+        self._coords_seen = (None, None)  # RA/DEC at the previous update, for motion detection
         self.park_status = config.MOUNT_PARKED
-        self.mount_connected = False
 
-        # INDIGO event hook + background coord poller
-        self.client.on("setNumberVector", self._handle_number_vector)
+        # Motion state machine: commands and completions all run on this one thread, in order,
+        # so SocketIO handlers return at once and motion commands cannot overlap
+        self._motion = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mount-motion")
+        self.state = PARKED if self.park_status else IDLE
+        self._op = None  # _Motion in progress (goto / park / unpark)
+        self._jogs = {}  # axis ("ra" / "dec") -> _Jog in progress
+        self._slew_rate = None  # last MOUNT_SLEW_RATE item sent
+        self.jog_stats = {"jogs": 0, "commands": 0, "coalesced": 0}
+        self.mount_connected = False
+        self._last_motion = 0.0  # time.monotonic() of last commanded/observed motion
+        self._coords_at = 0.0    # time.monotonic() of last coordinate update from INDIGO
+        self._coords_requested = 0.0
+        self._coords_stale = False
+
+        # RA/Dec, Alt/Az, tracking, motion state and target position at each coordinate update
+        self.telemetry = TelemetryRing(MOUNT_TELEMETRY_CAPACITY)
+        self._recorded_at = 0.0
+        self._target_cache = None  # (target_mode, time.time(), position) shared by telemetry and UI requests
+
+        # INDIGO event hooks (defNumberVector answers getProperties, setNumberVector is pushed).
+        # Threaded: the handler emits, records telemetry and computes ephemeris, which must
+        # not hold up the reader (or the asyncio client's loop, and with it abort writes).
+        # One subscription for both verbs, so a single worker handles updates in order.
+        self.client.subscribe(self._handle_number_vector, ("setNumberVector", "defNumberVector"), self.device,
+                              "MOUNT_EQUATORIAL_COORDINATES", threaded=True)
         self._start_coord_monitor()
 
     # ----------------- Emits / Logging -----------------
@@ -84,8 +139,10 @@ class MountControl:
                 "mount_dec_str": self.format_dec(mount_dec_f) if mount_dec_f is not None else "--:--:--",
             })
 
-            # Optional: push astro snapshot so UI solar/lunar panel updates instantly
-            if hasattr(self.astro, "get_data"):
+            # Optional: push astro changes so UI solar/lunar panel updates instantly
+            if _astro_publisher:
+                _astro_publisher.publish()
+            elif hasattr(self.astro, "get_data"):
                 _socketio.emit("astro_update", self.astro.get_data())
 
         emit_log(f"[STATUS] {message}")
@@ -118,20 +175,12 @@ class MountControl:
     def compute_altaz(self):
         """Compute current Alt/Az from last known RA/DEC and emit via SocketIO."""
         try:
-            self.observer.date = ephem.now()
             mount_ra = self.last_coords["ra"]
             mount_dec = self.last_coords["dec"]
             if mount_ra is None or mount_dec is None:
                 return None
 
-            radec = ephem.Equatorial(mount_ra * 15, mount_dec)  # RA given in *hours* → degrees
-            mount = ephem.FixedBody()
-            mount._ra = radec.ra
-            mount._dec = radec.dec
-            mount.compute(self.observer)
-
-            alt_deg = float(mount.alt) * 180 / ephem.pi
-            az_deg = float(mount.az) * 180 / ephem.pi
+            alt_deg, az_deg = self.transformer.altaz(mount_ra, mount_dec)  # RA hours, DEC degrees
 
             if _socketio:
                 _socketio.emit("mount_altaz", {"alt": round(alt_deg, 2), "az": round(az_deg, 2)})
@@ -143,27 +192,63 @@ class MountControl:
             return None
 
     # ----------------- INDIGO event intake -----------------
+    @property
+    def last_coords(self):
+        """RA (hours)/DEC (deg) from the client's property mirror; None until INDIGO reports them."""
+        prop = self.client.get_property(self.device, "MOUNT_EQUATORIAL_COORDINATES")
+        if prop is None:
+            return {"ra": None, "dec": None}
+        return {"ra": prop.get("RA"), "dec": prop.get("DEC")}
+
     def _handle_number_vector(self, msg):
-        """Handle incoming NumberVector messages from INDIGO."""
+        """Handle incoming NumberVector messages from INDIGO (already folded into the mirror)."""
         if msg.get("name") == "MOUNT_EQUATORIAL_COORDINATES":
-            for item in msg.get("items", []):
-                if item["name"] == "RA":
-                    self.last_coords["ra"] = item["value"]
-                    config.LAST_RA = item["value"]
-                elif item["name"] == "DEC":
-                    self.last_coords["dec"] = item["value"]
-                    config.LAST_DEC = item["value"]
-
-            if _socketio:
+            self._coords_at = time.monotonic()
+            if self._coords_stale:
+                self._coords_stale = False
+                emit_log("[MOUNT] Coordinate updates resumed")
+            prev = self._coords_seen
+            coords = self.last_coords
+            ra, dec = coords["ra"], coords["dec"]
+            self._coords_seen = (ra, dec)
+            if None not in prev and None not in (ra, dec) and (abs(ra - prev[0]) > 1e-4 or abs(dec - prev[1]) > 1e-3):
+                self._last_motion = time.monotonic()
+
+            if _socketio and prev != (ra, dec):
                 _socketio.emit("mount_coordinates", {
-                    "ra": self.last_coords["ra"],
-                    "dec": self.last_coords["dec"],
-                    "ra_str": self.format_ra(self.last_coords["ra"]) if self.last_coords["ra"] is not None else "--:--:--",
-                    "dec_str": self.format_dec(self.last_coords["dec"]) if self.last_coords["dec"] is not None else "--:--:--",
+                    "ra": ra,
+                    "dec": dec,
+                    "ra_str": self.format_ra(ra) if ra is not None else "--:--:--",
+                    "dec_str": self.format_dec(dec) if dec is not None else "--:--:--",
                 })
 
-            self.compute_altaz()
-            emit_log(f"[MOUNT] Updated coordinates: RA={self.last_coords['ra']}, DEC={self.last_coords['dec']}")
+            self._record(ra, dec, self.compute_altaz())
+            if self._op is not None:
+                self._motion.submit(self._progress)
+
+    def _record(self, ra, dec, altaz):
+        now = time.time()
+        if ra is None or dec is None or now - self._recorded_at < MOUNT_TELEMETRY_MIN_SEC:
+            return
+        self._recorded_at = now
+        try:
+            target = self.target_position()
+        except Exception:
+            target = {"ra": None, "dec": None}
+        self.telemetry.append(now, ra=ra, dec=dec,
+                              alt=altaz[0] if altaz else None, az=altaz[1] if altaz else None,
+                              tracking=float(self.tracking_active), state=STATES.index(self.state),
+                              target_ra=target["ra"], target_dec=target["dec"])
+
+    def target_position(self):
+        """Target RA/Dec in the mount's epoch, recomputed at most every MOUNT_TELEMETRY_MIN_SEC."""
+        now, mode = time.time(), self.target_mode
+        cached = self._target_cache
+        if cached is not None and cached[0] == mode and now - cached[1] < MOUNT_TELEMETRY_MIN_SEC:
+            return cached[2]
+        pos = self.astro.equatorial_at(mode, epoch=MOUNT_COORD_EPOCH)
+        self._target_cache = (mode, now, pos)
+        return pos
 
     # ----------------- Site / profile control -----------------
     def _resolve_profile(self, profile_name):
@@ -179,6 +264,7 @@ class MountControl:
 
     def set_location(self, latitude, longitude, elevation):
         """Send geographic coordinates to mount agent (INDIGO)."""
+        self._site = (latitude, longitude, elevation)  # replayed on reconnect
         try:
             self.client.send({
                 "newNumberVector": {
@@ -203,10 +289,8 @@ class MountControl:
 
         lat, lon, elev = self._resolve_profile(profile_name)
 
-        # Update local observer
-        self.observer.lat = str(lat)
-        self.observer.lon = str(lon)
-        self.observer.elev = elev
+        # Update local transforms
+        self.transformer.set_site(Site(lat, lon, elev))
 
         # Update INDIGO + astro module observer
         self.set_location(lat, lon, elev)
@@ -236,18 +320,42 @@ class MountControl:
         self.set_target("moon" if self.target_mode == "sun" else "sun")
 
     # ----------------- Motion / tracking -----------------
+    def is_moving(self):
+        """True while slewing or shortly after the reported coordinates last changed."""
+        return time.monotonic() - self._last_motion < MOTION_HOLD_SEC
+
     def slew(self, direction, rate="solar"):
-        """Slew the mount in a cardinal direction at specified rate."""
-        self.emit_status(f"Slewing {direction.title()} ({rate.title()})")
+        """Slew the mount in a cardinal direction at specified rate. Returns a Future (rejected while parking)."""
+        return self._submit(self._begin_slew, direction, rate)
 
-        rate_map = {
-            "slow": "GUIDE",
-            "fast": "MAX",
-            "solar": "CENTERING",  # light movement mode
-        }
+    def _begin_slew(self, result, direction, rate):
+        # Motion vectors
+        ra_vector, dec_vector = [], []
+        if direction == "north":
+            dec_vector = [{"name": "NORTH", "value": True}, {"name": "SOUTH", "value": False}]
+        elif direction == "south":
+            dec_vector = [{"name": "NORTH", "value": False}, {"name": "SOUTH", "value": True}]
+        elif direction == "east":
+            ra_vector = [{"name": "EAST", "value": True}, {"name": "WEST", "value": False}]
+        elif direction == "west":
+            ra_vector = [{"name": "EAST", "value": False}, {"name": "WEST", "value": True}]
+        else:
+            self.emit_log(f"[ERROR] Invalid slew direction: {direction}")
+            _resolve(result, error=ValueError(f"invalid slew direction: {direction}"))
+            return
+        if self.state == PARKING:
+            self._reject(result, "slew", "mount is parking")
+            return
+        self._abort_op()  # manual motion takes over from a goto or jog
+        self._cancel_jogs()
+
+        self._last_motion = time.monotonic()
+        self.emit_status(f"Slewing {direction.title()} ({rate.title()})")
 
         # Apply tracking ON for solar mode
         if rate == "solar":
+            self.tracking_active = True
+            self._tracking_state = True
             self.client.send({
                 "newSwitchVector": {
                     "device": self.device,
@@ -257,7 +365,8 @@ class MountControl:
             }, quiet=True)
 
         # Send slew rate
-        selected_rate = rate_map.get(rate.lower(), "CENTERING")
+        selected_rate = SLEW_RATES.get(rate.lower(), "CENTERING")
+        self._slew_rate = selected_rate
         self.client.send({
             "newSwitchVector": {
                 "device": self.device,
@@ -266,84 +375,359 @@ class MountControl:
             }
         }, quiet=True)
 
-        # Motion vectors
-        ra_vector, dec_vector = [], []
-        if direction == "north":
-            dec_vector = [{"name": "NORTH", "value": True}, {"name": "SOUTH", "value": False}]
-        elif direction == "south":
-            dec_vector = [{"name": "NORTH", "value": False}, {"name": "SOUTH", "value": True}]
-        elif direction == "east":
-            ra_vector = [{"name": "EAST", "value": True}, {"name": "WEST", "value": False}]
-        elif direction == "west":
-            ra_vector = [{"name": "EAST", "value": False}, {"name": "WEST", "value": True}]
-        else:
-            self.emit_log(f"[ERROR] Invalid slew direction: {direction}")
-            return
-
         if ra_vector:
             self.client.send({"newSwitchVector": {"device": self.device, "name": "MOUNT_MOTION_RA", "items": ra_vector}}, quiet=True)
         if dec_vector:
             self.client.send({"newSwitchVector": {"device": self.device, "name": "MOUNT_MOTION_DEC", "items": dec_vector}}, quiet=True)
+        self.park_status = False
+        self._set_state(SLEWING)
+        _resolve(result, True)
 
     def stop(self):
-        """Stop all mount motion."""
+        """Stop all mount motion, aborting any goto/park/unpark. Returns a Future."""
+        return self._submit(self._do_stop)
+
+    def _do_stop(self, result):
         try:
-            self.client.send({"newSwitchVector": {"device": self.device, "name": "MOUNT_MOTION_DEC",
-                                                  "items": [{"name": "NORTH", "value": False}, {"name": "SOUTH", "value": False}]}}, quiet=True)
-            self.client.send({"newSwitchVector": {"device": self.device, "name": "MOUNT_MOTION_RA",
-                                                  "items": [{"name": "EAST", "value": False}, {"name": "WEST", "value": False}]}}, quiet=True)
+            # urgent: sent ahead of queued traffic, and replaces any motion command still waiting
+            self._abort_op()
+            self._cancel_jogs()
+            self._halt()
 
+            if self.state != PARKED:
+                self._set_state(TRACKING if self.tracking_active else IDLE)
             self.emit_status("Stopped")
-            time.sleep(0.5)
-            self.emit_status("Idle")
+            self.client.call_later(0.5, self._settle_idle, threaded=True)
             self.emit_log("[MOUNT] Mount stopped successfully")
+            _resolve(result, True)
 
         except Exception as e:
             self.emit_log(f"[MOUNT] Stop command failed: {e}")
+            _resolve(result, error=e)
+
+    def _halt(self):
+        """Release both manual motion axes."""
+        self.client.send_urgent({"newSwitchVector": {"device": self.device, "name": "MOUNT_MOTION_DEC",
+                                                     "items": [{"name": "NORTH", "value": False}, {"name": "SOUTH", "value": False}]}}, quiet=True)
+        self.client.send_urgent({"newSwitchVector": {"device": self.device, "name": "MOUNT_MOTION_RA",
+                                                     "items": [{"name": "EAST", "value": False}, {"name": "WEST", "value": False}]}}, quiet=True)
+
+    # ----------------- Jog -----------------
+    def jog(self, direction, rate="slow", duration_ms=250):
+        """
+        Move for `duration_ms` in a cardinal direction. At the "slow" rate, with
+        a guider available, this is one INDIGO guide pulse timed by the mount;
+        otherwise motion starts now and a server timer stops it. Repeating a
+        jog that is still running (a held button) extends it rather than sending
+        more commands. The Future resolves with a summary once motion ends.
+        """
+        return self._submit(self._begin_jog, direction, rate, duration_ms)
+
+    def end_jog(self, direction=None):
+        """Stop a jog now (button released) rather than letting its last segment run out; None ends every jog."""
+        return self._submit(self._stop_jog, direction)
+
+    def _stop_jog(self, result, direction):
+        if direction is not None and direction not in JOG_AXES:
+            raise ValueError(f"invalid jog direction: {direction}")
+        for axis, jog in list(self._jogs.items()):
+            if direction is None or jog.direction == direction:
+                self._end_jog(axis, abort=True)
+        _resolve(result)
+
+    def _guider(self):
+        """Device accepting GUIDER_GUIDE_RA/DEC pulses, or None."""
+        for device in (MOUNT_GUIDER_DEVICE, self.device):
+            if device and self.client.get_property(device, "GUIDER_GUIDE_RA") is not None:
+                return device
+        return None
+
+    def _begin_jog(self, result, direction, rate, duration_ms):
+        if direction not in JOG_AXES:
+            raise ValueError(f"invalid jog direction: {direction}")
+        if self.state in (PARKING, PARKED):
+            self._reject(result, "jog", "mount is parked" if self.state == PARKED else "mount is parking")
+            return
+        seconds = max(1, min(int(duration_ms), MOUNT_JOG_MAX_MS)) / 1000.0
+        axis = JOG_AXES[direction]
+        guider = self._guider() if rate == "slow" else None
+        now = time.monotonic()
+        jog = self._jogs.get(axis)
+        if jog is not None and jog.direction == direction and jog.guider == guider:
+            jog.until = max(jog.until, now + seconds)  # held button: extend, nothing sent now
+            jog.results.append(result)
+            self.jog_stats["coalesced"] += 1
+            return
+        if jog is not None:
+            self._end_jog(axis, send=False)  # reversal: the new command replaces it
+        self._abort_op()
+
+        jog = self._jogs[axis] = _Jog(direction, guider, now, now + seconds, result)
+        if guider:
+            self._pulse(axis, jog, seconds)
+        else:
+            preset = SLEW_RATES.get(rate, "CENTERING")
+            if preset != self._slew_rate:
+                self._slew_rate = preset
+                self._jog_send(jog, {"newSwitchVector": {"device": self.device, "name": "MOUNT_SLEW_RATE",
+                                                         "items": [{"name": preset, "value": True}]}})
+            self._jog_send(jog, _motion_vector(self.device, axis, direction))
+        self._arm_jog(axis, jog, seconds)
+        self._last_motion = now
+        self.park_status = False
+        self._set_state(SLEWING)
+
+    def _jog_send(self, jog, message, urgent=False):
+        (self.client.send_urgent if urgent else self.client.send)(message, quiet=True)
+        jog.commands += 1
+
+    def _pulse(self, axis, jog, seconds):
+        name, pair = GUIDE_PULSES[axis]
+        ms = int(round(seconds * 1000))
+        self._jog_send(jog, {"newNumberVector": {"device": jog.guider, "name": name,
+                                                 "items": [{"name": f"GUIDER_GUIDE_{d}", "value": ms if d == jog.direction.upper() else 0}
+                                                           for d in pair]}})
+
+    def _arm_jog(self, axis, jog, seconds):
+        jog.timer = self.client.call_later(seconds, lambda: self._motion.submit(self._jog_due, axis, jog))
+
+    def _jog_due(self, axis, jog):
+        if self._jogs.get(axis) is not jog:
+            return
+        remaining = jog.until - time.monotonic()
+        if remaining > 0.001:
+            if jog.guider:
+                self._pulse(axis, jog, remaining)  # one pulse covers every repeat since the last
+            self._arm_jog(axis, jog, remaining)
+            return
+        self._end_jog(axis)
+
+    def _end_jog(self, axis, send=True, abort=False):
+        jog = self._jogs.pop(axis)
+        if jog.timer is not None:
+            jog.timer.cancel()
+        if send and not jog.guider:
+            self._jog_send(jog, _motion_vector(self.device, axis, None), urgent=True)
+        elif send and abort:
+            self._pulse(axis, jog, 0)  # a zero-length pulse cancels the one running
+        summary = {
+            "direction": jog.direction,
+            "mode": "pulse" if jog.guider else "timed",
+            "duration_ms": round((time.monotonic() - jog.started) * 1000),
+            "commands": jog.commands,
+            "coalesced": len(jog.results) - 1,
+        }
+        self.jog_stats["jogs"] += 1
+        self.jog_stats["commands"] += jog.commands
+        for r in jog.results:
+            _resolve(r, summary)
+        if not self._jogs and self._op is None and self.state == SLEWING:
+            self._set_state(TRACKING if self.tracking_active else IDLE)
+
+    def _cancel_jogs(self):
+        for axis in list(self._jogs):
+            self._end_jog(axis, abort=True)
+
+    def _settle_idle(self):
+        if getattr(self, "_last_status", None) == "Stopped":
+            self.emit_status("Idle")
+
+    def goto(self, ra, dec, timeout=MOUNT_GOTO_TIMEOUT_SEC, tolerance=MOUNT_ARRIVAL_TOLERANCE):
+        """
+        Slew to RA (hours) / DEC (degrees) and return a Future that resolves to
+        the coordinate Property once the mount reports arrival. It fails with
+        TimeoutError, or RuntimeError if the mount reports Alert or the goto
+        conflicts with a park; a later goto, stop or park cancels it.
+        """
+        return self._goto(ra, dec, timeout, tolerance)
+
+    def correct(self, ra, dec, timeout=MOUNT_GOTO_TIMEOUT_SEC, tolerance=MOUNT_ARRIVAL_TOLERANCE):
+        """
+        Tracking correction: a goto that is rejected instead of superseding
+        anything in progress (goto, park, jog). stop() cancels it like any goto.
+        """
+        return self._goto(ra, dec, timeout, tolerance, kind="correct")
+
+    def _goto(self, ra, dec, timeout=MOUNT_GOTO_TIMEOUT_SEC, tolerance=MOUNT_ARRIVAL_TOLERANCE, kind="goto"):
+        return self._submit(self._begin_goto, kind, ra, dec, timeout, tolerance)
+
+    async def goto_async(self, ra, dec, timeout=MOUNT_GOTO_TIMEOUT_SEC, tolerance=MOUNT_ARRIVAL_TOLERANCE):
+        """asyncio flavour of goto()."""
+        return await asyncio.wrap_future(self._goto(ra, dec, timeout, tolerance))
+
+    def park(self):
+        """Slew to park position and disable tracking. Returns a Future; clicking again joins the park in progress."""
+        return self._goto(PARK_RA, PARK_DEC, kind="park")
+
+    def unpark(self):
+        """Slew back to last known coordinates or home position if none. Returns a Future."""
+        return self._goto(None, None, kind="unpark")
+
+    # ----------------- Motion state machine -----------------
+    def _submit(self, fn, *args):
+        """
+        Queue fn(result, *args) on the motion executor; returns the Future fn
+        settles. The caller's context (and so its latency trace) goes with it.
+        """
+        result = Future()
+
+        def run():
+            trace = tracer.current()
+            if trace is not None:
+                trace.mark("mount")
+            try:
+                fn(result, *args)
+            except Exception as e:
+                self.emit_log(f"[ERROR] Mount command failed: {e}")
+                _resolve(result, error=e)
+            if trace is not None:
+                tracer.settle(trace)
+
+        self._motion.submit(contextvars.copy_context().run, run)
+        return result
+
+    def _begin_goto(self, result, kind, ra, dec, timeout, tolerance):
+        name = "MOUNT_EQUATORIAL_COORDINATES"
+        op = self._op
+        if op is not None and op.kind == kind != "goto":
+            _relay(op.result, result)  # repeated park/unpark click: same operation
+            return
+        if kind != "park" and self.state == PARKING:
+            self._reject(result, kind, "mount is parking; stop it first")
+            return
+        if kind == "park" and self.state == PARKED:
+            _resolve(result, self.client.get_property(self.device, name))
+            return
+        if kind == "unpark" and self.park_status is False and self.state != ERROR:
+            _resolve(result, self.client.get_property(self.device, name))  # nothing to undo
+            return
+        if kind in ("goto", "correct") and self.state == PARKED:
+            self._reject(result, kind, "mount is parked; unpark first")
+            return
+        if kind == "correct" and (op is not None or self._jogs):
+            self._reject(result, kind, f"{op.kind if op else 'jog'} in progress")
+            return
+        if not self.client.is_connected():
+            self._reject(result, kind, "INDIGO not connected", ConnectionError)
+            return
+        self._abort_op()
+        self._cancel_jogs()
 
-    def _slew_to_coords(self, ra, dec):
-        """Slew to specified RA/DEC coordinates (floats: RA hours, DEC degrees)."""
+        if kind == "unpark":
+            ra = self.last_coords["ra"] if self.last_coords["ra"] is not None else self._parse_ra(HOME_RA)
+            dec = self.last_coords["dec"] if self.last_coords["dec"] is not None else self._parse_dec(HOME_DEC)
+        version = self.client.properties.version(self.device, name)
+        # RA is meaningless at the pole
+        targets = {"DEC": dec} if abs(dec) >= 89.9 else {"RA": ra, "DEC": dec}
+        near = items_near(targets, tolerance, wrap={"RA": 24.0})
+        arrival = self.client.when(self.device, name,
+                                   lambda p: p.state == "Alert" or (p.state != "Busy" and near(p)),
+                                   timeout, newer_than=version)
+        op = self._op = _Motion(kind, ra, dec, result, arrival, self._distance(ra, dec))
+
+        if kind == "park":
+            self.stop_tracking()
+            self.emit_status("Parking...")
+        elif kind == "unpark":
+            self.emit_status("Unparking...")
+        self._last_motion = time.monotonic()
         try:
-            self.client.send({"newNumberVector": {"device": self.device, "name": "MOUNT_EQUATORIAL_COORDINATES",
+            self.client.send({"newNumberVector": {"device": self.device, "name": name,
                                                   "items": [{"name": "RA", "value": ra}, {"name": "DEC", "value": dec}]}}, quiet=True)
             self.client.send({"newSwitchVector": {"device": self.device, "name": "MOUNT_ON_COORDINATES_SET",
                                                   "items": [{"name": "ON_COORDINATES_SET", "value": True}]}}, quiet=True)
             self.emit_log(f"[MOUNT] Slewing to RA: {ra}, DEC: {dec}")
         except Exception as e:
             self.emit_log(f"[MOUNT] Slew to coords failed: {e}")
+        self._set_state(PARKING if kind == "park" else SLEWING)
+        arrival.add_done_callback(lambda f: self._motion.submit(self._arrived, op, f))
 
-    def park(self):
-        """Slew to park position and disable tracking."""
-        self.emit_status("Parking...")
-        self.stop_tracking()
+    def _arrived(self, op, arrival):
+        if self._op is not op:
+            return  # superseded or stopped; its Future was cancelled then
+        self._op = None
         try:
-            self._slew_to_coords(PARK_RA, PARK_DEC)
-            # Poll until near park
-            for _ in range(10):
-                coords = self.get_coordinates()
-                ra, dec = coords["ra"], coords["dec"]
-                if ra is not None and dec is not None:
-                    if abs(ra - PARK_RA) < 0.01 and abs(dec - PARK_DEC) < 0.01:
-                        break
-                time.sleep(1)
-            self.stop()
+            prop = arrival.result()
+            error = None
+            if prop.state == "Alert":
+                error = RuntimeError(f"mount reported Alert at RA {prop.get('RA')}, DEC {prop.get('DEC')}")
+        except CancelledError:
+            return
+        except Exception as e:
+            error = e
+        if error is not None:
+            self._set_state(ERROR, error=str(error))
+            self.emit_log(f"[ERROR] {op.kind.title()} failed: {error}")
+            if op.kind in ("park", "unpark"):
+                self.emit_status(f"{op.kind.title()} failed")
+            _resolve(op.result, error=error)
+            return
+
+        if op.kind == "park":
+            self._halt()
+            self.park_status = True
+            self._set_state(PARKED)
             self.emit_status("Parked")
             self.emit_log("[MOUNT] Park complete")
-        except Exception as e:
-            self.emit_log(f"[ERROR] Park failed: {e}")
+        else:
+            self.park_status = False
+            self._set_state(TRACKING if self.tracking_active else IDLE)
+            if op.kind == "unpark":
+                self.emit_status("Unparked")
+                self.emit_log("[MOUNT] Unpark complete")
+        _resolve(op.result, prop)
+
+    def _abort_op(self):
+        """Abort the goto/park/unpark in progress, on the mount too, and cancel its Future."""
+        op, self._op = self._op, None
+        if op is None:
+            return
+        self.client.send_urgent({"newSwitchVector": {"device": self.device, "name": "MOUNT_ABORT_MOTION",
+                                                     "items": [{"name": "ABORT_MOTION", "value": True}]}}, quiet=True)
+        op.arrival.cancel()
+        op.result.cancel()
+        self.emit_log(f"[MOUNT] {op.kind.title()} aborted")
+
+    def _reject(self, result, kind, reason, error=RuntimeError):
+        self.emit_log(f"[MOUNT] {kind.title()} rejected: {reason}")
+        self._emit_state(error=f"{kind} rejected: {reason}")
+        _resolve(result, error=error(reason))
+
+    def _set_state(self, state, error=None):
+        previous, self.state = self.state, state
+        if state != previous or error:
+            emit_log(f"[MOUNT] State {previous} → {state}")
+            self._emit_state(previous, error=error)
+
+    def _distance(self, ra, dec):
+        """Degrees from the last reported position to ra/dec (None if unknown)."""
+        coords = self.last_coords
+        if coords["ra"] is None or coords["dec"] is None:
+            return None
+        dra = ((ra - coords["ra"] + 12.0) % 24.0 - 12.0) * 15.0 * math.cos(math.radians((dec + coords["dec"]) / 2))
+        return math.hypot(dra, dec - coords["dec"])
 
-    def unpark(self):
-        """Slew back to last known coordinates or home position if none."""
-        self.emit_status("Unparking...")
-        try:
-            ra = self.last_coords["ra"] if self.last_coords["ra"] is not None else self._parse_ra(HOME_RA)
-            dec = self.last_coords["dec"] if self.last_coords["dec"] is not None else self._parse_dec(HOME_DEC)
-            self._slew_to_coords(ra, dec)
-            self.emit_status("Unparked")
-            self.emit_log("[MOUNT] Unpark complete")
-        except Exception as e:
-            self.emit_log(f"[ERROR] Unpark failed: {e}")
-            self.emit_status("Unparked failed")
+    def _progress(self):
+        op = self._op
+        if op is None or not op.distance:
+            return
+        left = self._distance(op.ra, op.dec)
+        if left is not None:
+            self._emit_state(progress=round(max(0.0, min(1.0, 1.0 - left / op.distance)), 3))
+
+    def _emit_state(self, previous=None, progress=None, error=None):
+        if _socketio:
+            _socketio.emit("mount_state", dict(self.motion_status(), previous=previous, progress=progress, error=error))
+
+    def motion_status(self):
+        op = self._op
+        return {
+            "state": self.state,
+            "operation": op.kind if op else None,
+            "target": {"ra": op.ra, "dec": op.dec} if op else None,
+            "jogs": sorted(j.direction for j in self._jogs.values()),
+            "parked": self.park_status,
+        }
 
     def _parse_ra(self, ra_str):
         """Parse RA string in HH:MM:SS → decimal hours."""
@@ -356,12 +740,45 @@ class MountControl:
         parts = list(map(float, dec_str.strip("+-").split(":")))
         return sign * (parts[0] + parts[1] / 60 + parts[2] / 3600)
 
+    def start_tracking(self):
+        """Enable mount tracking at the currently selected rate."""
+        self.tracking_active = True
+        self._tracking_state = True
+        self.client.send({"newSwitchVector": {"device": self.device, "name": "MOUNT_TRACKING",
+                                              "items": [{"name": "ON", "value": True}, {"name": "OFF", "value": False}]}}, quiet=True)
+        self._motion.submit(self._tracking_changed)
+
+    def _tracking_changed(self):
+        if self.state == IDLE and self.tracking_active:
+            self._set_state(TRACKING)
+        elif self.state == TRACKING and not self.tracking_active:
+            self._set_state(IDLE)
+
+    def supports_custom_rate(self):
+        """True if the mount has reported a MOUNT_CUSTOM_TRACKING_RATE property."""
+        return self.client.get_property(self.device, "MOUNT_CUSTOM_TRACKING_RATE") is not None
+
+    def set_track_rate(self, preset="SIDEREAL", custom=None):
+        """
+        Select a MOUNT_TRACK_RATE preset (SIDEREAL, SOLAR, LUNAR, KING), or
+        CUSTOM with `custom` as a multiple of the sidereal rate.
+        """
+        self._track_rate = (preset, custom)
+        if custom is not None:
+            preset = "CUSTOM"
+            self.client.send({"newNumberVector": {"device": self.device, "name": "MOUNT_CUSTOM_TRACKING_RATE",
+                                                  "items": [{"name": "RATE", "value": custom}]}}, quiet=True)
+        self.client.send({"newSwitchVector": {"device": self.device, "name": "MOUNT_TRACK_RATE",
+                                              "items": [{"name": preset, "value": True}]}}, quiet=True)
+
     def stop_tracking(self):
         """Disable mount tracking."""
         self.tracking_active = False
+        self._tracking_state = False
         try:
             self.client.send({"newSwitchVector": {"device": self.device, "name": "MOUNT_TRACKING",
                                                   "items": [{"name": "OFF", "value": True}, {"name": "ON", "value": False}]}}, quiet=True)
+            self._motion.submit(self._tracking_changed)
             self.emit_log("[MOUNT] Tracking disabled")
             self.emit_status("Tracking disabled")
         except Exception as e:
@@ -381,22 +798,121 @@ class MountControl:
             })
         return self.last_coords
 
+    def _request_coords(self):
+        """Ask INDIGO for the coordinate property; later changes arrive as setNumberVector pushes."""
+        self._coords_requested = time.monotonic()
+        try:
+            self.client.send({"getProperties": {"device": self.device, "name": "MOUNT_EQUATORIAL_COORDINATES"}}, quiet=True)
+        except Exception as e:
+            emit_log(f"[ERROR] Coord request: {e}")
+
+    def _resync(self):
+        """After (re)connecting: re-send site, tracking rate and state, then ask for coordinates."""
+        self.set_location(*self._site)
+        self._slew_rate = None
+        if self._track_rate is not None:
+            self.set_track_rate(*self._track_rate)
+        if self._tracking_state is not None:
+            on = self._tracking_state
+            self.client.send({"newSwitchVector": {"device": self.device, "name": "MOUNT_TRACKING",
+                                                  "items": [{"name": "ON", "value": on}, {"name": "OFF", "value": not on}]}}, quiet=True)
+        self._request_coords()
+
     def _start_coord_monitor(self):
-        """Start background thread to poll mount coordinates every second."""
+        """Resync on every connection; re-request only if updates stop for MOUNT_COORD_STALE_SEC."""
         self.coord_monitor_active = True
+        self.client.on_connect(self._resync)
+        # client timer: a thread on the threaded client, a loop callback on the asyncio one
+        self._coord_watchdog = self.client.call_every(MOUNT_COORD_STALE_SEC / 3, self._check_coords)
 
-        def monitor():
-            while self.coord_monitor_active:
-                try:
-                    self.client.send({"getProperties": {"device": self.device, "name": "MOUNT_EQUATORIAL_COORDINATES"}}, quiet=True)
-                except Exception as e:
-                    emit_log(f"[ERROR] Coord monitor: {e}")
-                time.sleep(1)
-
-        threading.Thread(target=monitor, daemon=True).start()
+    def _check_coords(self):
+        if not self.client.is_connected():
+            return
+        now = time.monotonic()
+        if now - max(self._coords_at, self._coords_requested) > MOUNT_COORD_STALE_SEC:
+            # an idle mount may simply not push; only an unanswered request is worth a log line
+            if self._coords_at < self._coords_requested and not self._coords_stale:
+                self._coords_stale = True
+                emit_log(f"[MOUNT] Coordinate request unanswered for {MOUNT_COORD_STALE_SEC:.0f}s, retrying")
+            self._request_coords()
 
     def shutdown(self):
         """Clean up on application exit."""
         self.stop_tracking()
         self.coord_monitor_active = False
-        self.client.close()
\ No newline at end of file
+        self._coord_watchdog.cancel()
+        self._motion.shutdown(wait=False, cancel_futures=True)
+        self.client.close()
+
+
+class _Motion:
+    """The goto/park/unpark in progress: caller's Future, arrival watch, start distance (deg)."""
+    __slots__ = ("kind", "ra", "dec", "result", "arrival", "distance")
+
+    def __init__(self, kind, ra, dec, result, arrival, distance):
+        self.kind = kind
+        self.ra = ra
+        self.dec = dec
+        self.result = result
+        self.arrival = arrival
+        self.distance = distance
+
+
+class _Jog:
+    """A jog on one axis: motion should end at `until` (monotonic); repeats extend it."""
+    __slots__ = ("direction", "guider", "started", "until", "results", "timer", "commands")
+
+    def __init__(self, direction, guider, started, until, result):
+        self.direction = direction
+        self.guider = guider  # guide-pulse device, or None for timed motion
+        self.started = started
+        self.until = until
+        self.results = [result]
+        self.timer = None
+        self.commands = 0
+
+
+def _motion_vector(device, axis, direction):
+    """MOUNT_MOTION_RA/DEC switching `direction` on (None: both off)."""
+    name, pair = MOTION_SWITCHES[axis]
+    on = direction.upper() if direction else None
+    return {"newSwitchVector": {"device": device, "name": name,
+                                "items": [{"name": d, "value": d == on} for d in pair]}}
+
+
+def _resolve(future, result=None, error=None):
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass  # the caller cancelled it
+
+
+def _relay(source, target):
+    """Settle `target` like `source` once it finishes."""
+    def copy(f):
+        if f.cancelled():
+            target.cancel()
+        elif f.exception() is not None:
+            _resolve(target, error=f.exception())
+        else:
+            _resolve(target, f.result())
+    source.add_done_callback(copy)
+
+
+class AsyncMountControl(MountControl):
+    """
+    MountControl for asyncio code on an AsyncIndigoJSONClient: goto, park and
+    unpark are coroutines that finish when the mount reports arrival. The
+    coordinate watchdog and timers already run on the client's loop.
+    """
+    async def goto(self, ra, dec, timeout=MOUNT_GOTO_TIMEOUT_SEC, tolerance=MOUNT_ARRIVAL_TOLERANCE):
+        return await asyncio.wrap_future(self._goto(ra, dec, timeout, tolerance))
+
+    async def park(self):
+        return await asyncio.wrap_future(MountControl.park(self))
+
+    async def unpark(self):
+        return await asyncio.wrap_future(MountControl.unpark(self))
\ No newline at end of file
@@ -1,7 +1,6 @@
 # nSTEP Focuser Module
 # Focuser control module using INDIGO JSON client
 
-import threading
 from utilities.indigo_json_client import IndigoJSONClient
 
 _socketio = None  # Module-level SocketIO reference
@@ -30,7 +29,9 @@ class NStepFocuser:
 
         self.set_position = speed  # Store set speed for feedback
 
-        self.client.send({
+        # stop jumps ahead of anything still queued for the server
+        send = self.client.send_urgent if direction == "stop" else self.client.send
+        send({
             "setProperties": {
                 "device": self.device,
                 "name": "FOCUSER_MOTION",
@@ -55,22 +56,32 @@ class NStepFocuser:
         self._emit_position_feedback()
 
     def get_position(self):
+        # Served from the client's property mirror; only ask the server if it never reported it
+        prop = self.client.get_property(self.device, "FOCUSER_POSITION")
+        if prop is not None:
+            self._apply_position(prop)
+            return
         self.client.send({
             "getProperties": {
                 "device": self.device,
                 "name": "FOCUSER_POSITION"
             }
         })
-        threading.Thread(target=self._poll_position, daemon=True).start()
+        # resolved by the reader as soon as the server answers; no poll thread per call
+        self.client.when(self.device, "FOCUSER_POSITION", timeout=2.0).add_done_callback(self._position_arrived)
+
+    def _position_arrived(self, future):
+        error = future.exception()
+        if error is None:
+            self._apply_position(future.result())
+        elif isinstance(error, TimeoutError):
+            self._emit_log("No FOCUSER_POSITION from server")
+        else:
+            self._emit_log(f"Poll error: {error}")
 
-    def _poll_position(self):
-        try:
-            state = self.client.get_property(self.device, "FOCUSER_POSITION")
-            if state and "FOCUSER_POSITION" in state.get("elements", {}):
-                self.current_position = state["elements"]["FOCUSER_POSITION"]["value"]
-                self._emit_position_feedback()
-        except Exception as e:
-            self._emit_log(f"Poll error: {e}")
+    def _apply_position(self, prop):
+        self.current_position = prop.get("POSITION", self.current_position)
+        self._emit_position_feedback()
 
     def _emit_position_feedback(self):
         if _socketio:
@@ -82,3 +93,16 @@ class NStepFocuser:
     def _emit_log(self, message):
         if _socketio:
             _socketio.emit("server_log", f"[nSTEP] {message}")
+
+
+class AsyncNStepFocuser(NStepFocuser):
+    """
+    NStepFocuser for asyncio code: get_position() is awaitable and returns the
+    position. move() stays a plain method: it only queues a command.
+    """
+    async def get_position(self, timeout=2.0):
+        prop = self.client.get_property(self.device, "FOCUSER_POSITION")
+        if prop is None:
+            prop = await self.client.request_property(self.device, "FOCUSER_POSITION", timeout)
+        self._apply_position(prop)
+        return self.current_position
@@ -0,0 +1,206 @@
+# Planning Module
+# Multi-day Sun/Moon paths and events, computed in a process pool and stored on disk
+
+import json
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date as date_cls, timedelta
+
+import ephem
+import pytz
+
+from modules.ephemeris_module import Site, DayPath, compute_day_path, local_midnight, site_from_profile
+from modules.event_module import EVENT_SPECS, ONE_MINUTE, find_next_event
+from utilities.config import LOCATION_PROFILES, PATH_STORE_DIR, PATH_PLANNER_WORKERS
+from utilities.logger import emit_log
+
+MAX_RANGE_DAYS = 366
+
+
+def day_events(site, target, date):
+    """All EVENT_SPECS events of a body that fall on a local observing date."""
+    start = local_midnight(site, date)
+    end = local_midnight(site, date + timedelta(days=1))
+    tz = pytz.timezone(site.tz) if site.tz else None
+    events = []
+    for body, kind in EVENT_SPECS:
+        if body != target:
+            continue
+        t = find_next_event(site, body, kind, start)
+        while t is not None and t < end:
+            utc = pytz.utc.localize(ephem.Date(t).datetime())
+            local = utc.astimezone(tz) if tz else utc.astimezone()
+            events.append({"kind": kind, "utc": utc.isoformat(), "local": local.strftime("%H:%M")})
+            t = find_next_event(site, body, kind, t + ONE_MINUTE)
+    events.sort(key=lambda e: e["utc"])
+    return events
+
+
+def compute_day_bundle(site, target, date, interval_minutes):
+    """Path + events for one (site, target, date). Runs in a worker process."""
+    path = compute_day_path(site, target, date, interval_minutes)
+    return {
+        "site": site._asdict(),
+        "target": target,
+        "date": date.isoformat(),
+        "interval": interval_minutes,
+        "t0": path.t0,
+        "step": path.step,
+        "path": path.points,
+        "events": day_events(site, target, date),
+    }
+
+
+def resolve_site(site, default=None):
+    """Site from a Site, a LOCATION_PROFILES name, or None (→ default)."""
+    if site is None:
+        return default
+    if isinstance(site, Site):
+        return site
+    return site_from_profile(str(site))
+
+
+class PathPlanner:
+    """
+    get_path_range() streams one day bundle at a time: stored days right
+    away, the rest as each worker process finishes. range_status() never
+    waits: it returns the stored days and queues the rest. Every computed
+    day is written to PATH_STORE_DIR so it is never recomputed, and a day
+    already computing is shared by every request that needs it.
+    """
+    def __init__(self, store_dir=PATH_STORE_DIR, max_workers=PATH_PLANNER_WORKERS, cache=None):
+        self.store_dir = store_dir
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.cache = cache            # optional PathCache fed with each computed path
+        self._executor = None
+        self._inflight = {}           # (site, target, date, interval) -> Future of its bundle
+        self._lock = threading.Lock()
+
+    # ---- public API ----
+    def get_path_range(self, target, site, start, days, interval_minutes=5):
+        target = "moon" if str(target).lower() == "moon" else "sun"
+        days = max(1, min(int(days), MAX_RANGE_DAYS))
+        pending = {}
+        for i in range(days):
+            d = start + timedelta(days=i)
+            bundle = self.load(site, target, d, interval_minutes)
+            if bundle is not None:
+                yield bundle
+            else:
+                pending[self.submit_day(site, target, d, interval_minutes)] = d
+
+        for fut in as_completed(pending):
+            try:
+                yield fut.result()
+            except Exception:
+                continue  # logged by _stored()
+
+    def range_status(self, target, site, start, days, interval_minutes=5):
+        """(stored bundles, days still computing) for a range; missing days are queued, nothing waits."""
+        target = "moon" if str(target).lower() == "moon" else "sun"
+        days = max(1, min(int(days), MAX_RANGE_DAYS))
+        bundles, pending = [], 0
+        for i in range(days):
+            d = start + timedelta(days=i)
+            bundle = self.load(site, target, d, interval_minutes)
+            if bundle is not None:
+                bundles.append(bundle)
+            else:
+                self.submit_day(site, target, d, interval_minutes)
+                pending += 1
+        return bundles, pending
+
+    def submit_day(self, site, target, date, interval_minutes):
+        """Future of one day bundle computing in the pool; stored (and cached) once it finishes."""
+        key = (site, target, date, interval_minutes)
+        pool = self._pool()
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is None:
+                fut = self._inflight[key] = pool.submit(compute_day_bundle, site, target, date, interval_minutes)
+                fut.add_done_callback(lambda f: self._stored(key, f))
+        return fut
+
+    def load(self, site, target, date, interval_minutes):
+        path = self._file(site, target, date, interval_minutes)
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, site, target, date, interval_minutes, bundle):
+        path = self._file(site, target, date, interval_minutes)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(bundle, f, separators=(",", ":"))
+            os.replace(tmp, path)
+        except OSError as e:
+            emit_log(f"[PLANNER] Could not store {path}: {e}")
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    # ---- internals ----
+    def _stored(self, key, fut):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if fut.cancelled():
+            return
+        site, target, date, interval_minutes = key
+        try:
+            bundle = fut.result()
+        except Exception as e:
+            emit_log(f"[PLANNER] {target} {date} failed: {e}")
+            return
+        self.save(site, target, date, interval_minutes, bundle)
+        if self.cache is not None and bundle["path"]:
+            self.cache.put(key, DayPath.from_points(bundle["path"], bundle["t0"], bundle["step"]))
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # never fork: the app is multi-threaded (SocketIO, INDIGO I/O, timers) and a child
+                # would inherit locks those threads hold. forkserver/spawn re-import app.py,
+                # whose startup is guarded by multiprocessing.parent_process().
+                ctx = multiprocessing.get_context("forkserver" if sys.platform.startswith("linux") else "spawn")
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=ctx)
+            return self._executor
+
+    def _file(self, site, target, date, interval_minutes):
+        site_dir = f"{site.lat:.4f}_{site.lon:.4f}_{site.elev:.0f}"
+        return os.path.join(self.store_dir, site_dir, f"{target}_{date.isoformat()}_{interval_minutes}m.json")
+
+
+def parse_range_request(args, default_site):
+    """
+    Normalize {"target", "site", "start", "days", "interval"} from a socket
+    payload or query string into (jobs, start, days, interval) where jobs is
+    a list of (profile_label, target, Site). target may be "both" and site
+    may be "all" (every LOCATION_PROFILES entry).
+    """
+    target = str(args.get("target") or "sun").lower()
+    targets = ("sun", "moon") if target == "both" else ("moon" if target == "moon" else "sun",)
+
+    site_arg = args.get("site")
+    if site_arg == "all":
+        names = list(LOCATION_PROFILES)
+    else:
+        names = [site_arg]
+    sites = [(name, resolve_site(name, default_site)) for name in names]
+
+    start = args.get("start")
+    start = date_cls.fromisoformat(start) if start else date_cls.today()
+    days = int(args.get("days") or 1)
+    interval = int(args.get("interval") or 5)
+
+    jobs = [(name, t, s) for name, s in sites if s is not None for t in targets]
+    return jobs, start, days, interval
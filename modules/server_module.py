@@ -3,8 +3,9 @@
 
 import threading
 import time
-from utilities.config import RASPBERRY_PI_IP
+from utilities.config import RASPBERRY_PI_IP, INDIGO_ASYNC_CLIENT
 from utilities.indigo_json_client import IndigoJSONClient
+from utilities.indigo_async_client import AsyncIndigoJSONClient
 from utilities.network_utils import (
     get_ssh_client,
     stream_ssh_output,
@@ -12,11 +13,11 @@ from utilities.network_utils import (
     check_remote_port
 )
 
-indigo_client = IndigoJSONClient(RASPBERRY_PI_IP)
+indigo_client = (AsyncIndigoJSONClient if INDIGO_ASYNC_CLIENT else IndigoJSONClient)(RASPBERRY_PI_IP)
 
 def start_indigo_client():
-    import threading
-    threading.Thread(target=indigo_client.connect, daemon=True).start()
+    """Start the supervised connection, or retry right away if it is already running."""
+    indigo_client.start()
 
 class IndigoRemoteServer:
     def __init__(self, server_ip, username, password, port=7624):
@@ -75,7 +76,10 @@ class IndigoRemoteServer:
 
     def check_status(self):
         """Check if INDIGO server is active on port 7624."""
-        return check_remote_port(self.ip, self.port)
+        up = check_remote_port(self.ip, self.port)
+        if up and not indigo_client.is_connected():
+            indigo_client.reconnect_now()  # port is back: don't wait out the backoff
+        return up
 
     def get_status(self):
         """Return current status as a simple dict."""
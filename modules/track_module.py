@@ -1,69 +1,363 @@
 # Tracking Module
-# Logic for relaying solar tracking coordinates to mount
+# Rate-based Sun/Moon tracking: the mount tracks at the target's rate, drift triggers small corrections
 
-import threading
+import math
 import time
 
-from old.solar_module import SolarPosition
-from modules.mount_module import MountControl
-from utilities.config import GEO_LAT, GEO_LON, GEO_ELEV
+import ephem
+import numpy as np
+
+from modules.astro_module import AstroPosition
+from modules.mount_module import MountControl, PARKED, PARKING, SLEWING, STATES, TRACKING
+from utilities.config import (
+    MOUNT_COORD_EPOCH,
+    TRACK_RATE_MODE, TRACK_CHECK_SEC, TRACK_DRIFT_ARCSEC, TRACK_RATE_UPDATE_SEC, TRACK_SETTLE_SEC,
+    TRACK_QUALITY_SEC, TRACK_QUALITY_WINDOW_SEC, TRACK_QUALITY_MIN_SAMPLES, TRACK_QUALITY_JUMP_ARCSEC,
+    TRACK_PE_MIN_PERIOD_SEC, TRACK_PE_MAX_PERIOD_SEC,
+)
 from utilities.logger import emit_log
-from utilities.logger import get_logger
 
-logger = get_logger(__name__)
+_socketio = None  # Module-level SocketIO reference (tracking_quality events)
+
+SIDEREAL_ARCSEC_S = 15.04106718   # sky rotation in arcsec of RA per second
+RATE_STEP_SEC = 60.0              # half-width of the finite difference used for target rates
+RATE_EPSILON = 1e-6               # smaller custom-rate changes (sidereal multiples) are not re-sent
+PRESETS = {"sun": "SOLAR", "moon": "LUNAR"}
+LEAD_FRACTION = 0.8               # corrections aim Dec this fraction of the threshold ahead of the target
+
+
+def set_socketio(instance):
+    global _socketio
+    _socketio = instance
+
 
+def separation_arcsec(ra1, dec1, ra2, dec2):
+    """Small-angle separation of two RA (hours) / Dec (degrees) positions."""
+    dra = (ra1 - ra2 + 12.0) % 24.0 - 12.0
+    return math.hypot(dra * 15.0 * math.cos(math.radians((dec1 + dec2) / 2)), dec1 - dec2) * 3600.0
 
-class SolarTracker:
-    def __init__(self, mount: MountControl, interval_sec: int = 5):
+
+class TargetTracker:
+    """
+    Follows the Sun or Moon without repeated gotos: one acquisition slew, then
+    the mount tracks at the target's own rate (a custom multiple of sidereal
+    when the mount offers MOUNT_CUSTOM_TRACKING_RATE, else the SOLAR/LUNAR
+    preset). Every TRACK_CHECK_SEC the reported pointing is compared with the
+    ephemeris and only drift above TRACK_DRIFT_ARCSEC triggers a short
+    corrective slew, aimed slightly ahead in Dec. The rate is re-derived every TRACK_RATE_UPDATE_SEC and
+    re-sent only when it changed.
+    """
+    def __init__(self, mount: MountControl, astro: AstroPosition, check_sec=TRACK_CHECK_SEC,
+                 threshold_arcsec=TRACK_DRIFT_ARCSEC, rate_mode=TRACK_RATE_MODE):
         self.mount = mount
-        self.interval = interval_sec
+        self.astro = astro
+        self.check_sec = check_sec
+        self.threshold = threshold_arcsec
+        self.rate_mode = rate_mode
         self.active = False
-        self.solar = SolarPosition()
-        self.thread = None
+        self.target = None
+        self.rate = None          # custom sidereal multiple (float) or preset name in use
+        self.ra_rate = None       # target motion, arcsec/s (RA scaled by 15, not by cos dec)
+        self.dec_rate = None
+        self.last_drift = None    # arcsec at the last check
+        self.max_drift = 0.0
+        self.corrections = 0
+        self.commands = 0
+        self.started = None
+        self._timer = None
+        self._rate_at = 0.0
+        self._last_correction = 0.0
+        self._below = False
 
-    def start(self):
+    # ---------------- Control ----------------
+    def start(self, target=None):
+        """Acquire and track `target` ("sun" | "moon", default: the mount's target). Retargets if running."""
+        target = str(target or self.mount.target_mode or "sun").lower()
+        if target not in PRESETS:
+            emit_log(f"[TRACK] Unknown tracking target: {target}")
+            return False
         if self.active:
-            logger.warning("Tracking already active.")
-            return
+            if target == self.target:
+                emit_log("[TRACK] Tracking already active.")
+                return True
+            self.stop()
+
+        if self.mount.state in (PARKED, PARKING):
+            self._emit_status("🅿️ Mount is parked; unpark before tracking.")
+            return False
+
+        self.target = target
+        pos = self.position()
+        if pos["alt"] < 0:
+            self._emit_status(f"☁️ {target.title()} is below the horizon.")
+            return False
 
         self.active = True
-        self._emit_status("✅ Solar tracking started.")
-        logger.info("Started solar tracking thread.")
+        self.started = time.time()
+        self.corrections = self.commands = 0
+        self.last_drift, self.max_drift, self.rate = None, 0.0, None
+        self._below = False
+        self._goto(pos)                       # acquisition
+        self._update_rate(force=True)
+        self.mount.start_tracking()
+        self.commands += 1
+        self._timer = self.mount.client.call_every(self.check_sec, self._tick, threaded=True)
+        self._emit_status(f"✅ {target.title()} tracking started.")
+        emit_log(f"[TRACK] Started {target} tracking at rate {self.rate}.")
+        return True
 
-        def loop():
-            while self.active:
-                try:
-                    self.solar.update_solar_position()
-                    data = self.solar.get_data()
-                    alt = data.get("solar_alt")
-                    az = data.get("solar_az")
+    def stop(self):
+        if not self.active:
+            return
+        self.active = False
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        emit_log(f"[TRACK] Stopped {self.target} tracking after {self.corrections} correction(s), {self.commands} command(s).")
+        self._emit_status(f"🛑 {self.target.title()} tracking stopped.")
 
-                    if alt == "Below":
-                        self._emit_status("☁️ Sun is below the horizon.")
-                    else:
-                        ra, dec = self._altaz_to_equatorial(alt, az)
-                        self.mount._slew_to_coords(ra, dec)
-                        logger.debug(f"Slewed to RA={ra:.3f}, DEC={dec:.3f}")
+    # ---------------- Ephemeris ----------------
+    def position(self, when=None):
+        """Target RA/Dec in the mount's coordinate epoch, plus altitude."""
+        return self.astro.equatorial_at(self.target, when, MOUNT_COORD_EPOCH)
 
-                except Exception as e:
-                    logger.error(f"Tracking error: {e}")
+    def rates(self, when=None):
+        """(RA, Dec) rates of the target in arcsec/s, by central difference."""
+        t = ephem.now() if when is None else ephem.Date(when)
+        step = RATE_STEP_SEC / 86400.0
+        a, b = self.position(ephem.Date(t - step)), self.position(ephem.Date(t + step))
+        dra = ((b["ra"] - a["ra"] + 12.0) % 24.0 - 12.0) * 15.0 * 3600.0
+        ddec = (b["dec"] - a["dec"]) * 3600.0
+        return dra / (2 * RATE_STEP_SEC), ddec / (2 * RATE_STEP_SEC)
 
-                time.sleep(self.interval)
+    # ---------------- Loop ----------------
+    def _update_rate(self, force=False):
+        self._rate_at = time.monotonic()
+        self.ra_rate, self.dec_rate = self.rates()
+        if self.rate_mode == "custom" and self.mount.supports_custom_rate():
+            rate = round((SIDEREAL_ARCSEC_S - self.ra_rate) / SIDEREAL_ARCSEC_S, 8)
+            if force or not isinstance(self.rate, float) or abs(rate - self.rate) > RATE_EPSILON:
+                self.mount.set_track_rate(custom=rate)
+                self.commands += 2
+                self.rate = rate
+        else:
+            preset = PRESETS[self.target]
+            if force or self.rate != preset:
+                self.mount.set_track_rate(preset)
+                self.commands += 1
+                self.rate = preset
 
-            logger.info("Stopped solar tracking loop.")
-            self._emit_status("🛑 Solar tracking stopped.")
+    def _tick(self):
+        if not self.active:
+            return
+        try:
+            now = time.monotonic()
+            if now - self._rate_at >= TRACK_RATE_UPDATE_SEC:
+                self._update_rate()
+            if now - self._last_correction < TRACK_SETTLE_SEC or self._slewing():
+                return
+            if self.mount.state in (PARKED, PARKING, SLEWING):
+                return  # a user goto/jog/park owns the mount; correct once it is done
+            pos = self.position()
+            if pos["alt"] < 0:
+                if not self._below:
+                    self._below = True
+                    self._emit_status(f"☁️ {self.target.title()} is below the horizon.")
+                return
+            self._below = False
+            coords = self.mount.last_coords
+            if coords["ra"] is None or coords["dec"] is None:
+                return
+            self.last_drift = separation_arcsec(coords["ra"], coords["dec"], pos["ra"], pos["dec"])
+            self.max_drift = max(self.max_drift, self.last_drift)
+            if self.last_drift > self.threshold:
+                self.corrections += 1
+                emit_log(f"[TRACK] Drift {self.last_drift:.0f}\" > {self.threshold:.0f}\", correcting")
+                self._goto(pos)
+        except Exception as e:
+            emit_log(f"[TRACK] Tracking error: {e}")
 
-        self.thread = threading.Thread(target=loop, daemon=True)
-        self.thread.start()
+    def _slewing(self):
+        prop = self.mount.client.get_property(self.mount.device, "MOUNT_EQUATORIAL_COORDINATES")
+        return prop is not None and prop.state == "Busy"
 
-    def stop(self):
-        self.active = False
-        logger.info("Stopping solar tracking...")
+    def _goto(self, pos):
+        """
+        Slew to pos. Once the Dec rate is known, aim ahead of the target in Dec
+        so the drift runs through zero, roughly doubling the time to the next
+        correction. RA needs no lead: the tracking rate already follows it.
+        """
+        self._last_correction = time.monotonic()
+        dec = pos["dec"]
+        if self.dec_rate:
+            dec += math.copysign(min(LEAD_FRACTION * self.threshold, abs(self.dec_rate) * 3600.0), self.dec_rate) / 3600.0
+        # through the motion state machine: rejected during a park/goto/jog, cancelled by stop()
+        self.mount.correct(pos["ra"], dec)
+        self.commands += 2
 
-    def _altaz_to_equatorial(self, alt, az):
-        # TODO: Replace with true conversion later
-        return float(az), float(alt)
+    # ---------------- Status ----------------
+    def status(self):
+        elapsed = time.time() - self.started if self.started else 0.0
+        return {
+            "active": self.active,
+            "target": self.target,
+            "rate": self.rate,
+            "ra_rate_arcsec_s": self.ra_rate,
+            "dec_rate_arcsec_s": self.dec_rate,
+            "drift_arcsec": None if self.last_drift is None else round(self.last_drift, 1),
+            "max_drift_arcsec": round(self.max_drift, 1),
+            "corrections": self.corrections,
+            "commands": self.commands,
+            "commands_per_hour": round(self.commands * 3600.0 / elapsed, 1) if elapsed > 60 else None,
+        }
 
     def _emit_status(self, msg):
         if hasattr(self.mount, "emit_status"):
-            self.mount.emit_status(msg)
\ No newline at end of file
+            self.mount.emit_status(msg)
+
+# ---------------- Tracking quality ----------------
+def residuals(ra, dec, target_ra, target_dec):
+    """
+    Pointing minus target for arrays of RA (hours) / Dec (degrees): RA offset
+    on the sky, Dec offset and great-circle separation, all in arcsec.
+    """
+    dra = (np.asarray(ra) - target_ra + 12.0) % 24.0 - 12.0
+    ra_off = dra * 15.0 * 3600.0 * np.cos(np.radians(target_dec))
+    dec_off = (np.asarray(dec) - target_dec) * 3600.0
+    d1, d2 = np.radians(dec), np.radians(target_dec)
+    h = np.sin((d1 - d2) / 2) ** 2 + np.cos(d1) * np.cos(d2) * np.sin(np.radians(dra * 15.0) / 2) ** 2
+    sep = np.degrees(2 * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))) * 3600.0
+    return ra_off, dec_off, sep
+
+
+def _segments(t, ra_off, dec_off, jump, gap):
+    """Segment index per sample: a new segment starts after a pointing jump (a correction) or a time gap."""
+    step = np.hypot(np.diff(ra_off), np.diff(dec_off))
+    starts = (step > jump) | (np.diff(t) > gap)
+    return np.concatenate(([0], np.cumsum(starts)))
+
+
+def _demean(v, seg, count):
+    return v - (np.bincount(seg, v) / count)[seg]
+
+
+def _stitch(t, r, seg, rate):
+    """Remove the step at each segment start (less the drift across it), so slow terms like PE survive."""
+    step = np.diff(r) - rate * np.diff(t)
+    return r - np.concatenate(([0.0], np.cumsum(np.where(np.diff(seg) > 0, step, 0.0))))
+
+
+def periodic_error(t, r, min_period, max_period, trials=200):
+    """
+    Strongest sinusoid in residual r (arcsec) at uneven times t, searched over
+    log-spaced periods up to half the span: (period_sec, peak-to-peak arcsec),
+    or (None, None) if the span is too short.
+    """
+    max_period = min(max_period, (t[-1] - t[0]) / 2)
+    if max_period < min_period or len(t) < 8:
+        return None, None
+    # average into bins of min_period/8: keeps the band, shrinks the periodogram
+    bins = ((t - t[0]) / (min_period / 8)).astype(np.int64)
+    first = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    n = np.diff(np.r_[first, len(t)])
+    t, r = np.add.reduceat(t, first) / n, np.add.reduceat(r, first) / n
+    periods = np.geomspace(min_period, max_period, trials)
+    x = t - t[0]
+    power = np.abs(np.exp(-2j * np.pi * np.outer(1.0 / periods, x)) @ r)
+    period = periods[np.argmax(power)]
+    w = 2 * np.pi / period
+    design = np.column_stack((np.cos(w * x), np.sin(w * x), np.ones_like(x)))
+    (a, b, _), *_ = np.linalg.lstsq(design, r, rcond=None)
+    return float(period), float(2 * math.hypot(a, b))
+
+
+class TrackingAnalyzer:
+    """
+    Every TRACK_QUALITY_SEC, takes the last TRACK_QUALITY_WINDOW_SEC of the
+    mount's telemetry ring, where each row already pairs the reported pointing
+    with the target's position, and analyses the rows recorded while
+    TRACKING:
+    - RA/Dec residuals and separation
+    - drift rate: one slope per axis shared by all segments between corrections
+      (each segment keeps its own offset, so corrective slews do not bias it)
+    - RA periodic error: period and peak-to-peak amplitude of the strongest
+      sinusoid in the RA residual, once segments are stitched and the drift removed
+    Publishes a compact `tracking_quality` event. offsets() gives the fitted
+    pointing offset and drift for other code.
+    """
+    def __init__(self, mount: MountControl, interval=TRACK_QUALITY_SEC, window=TRACK_QUALITY_WINDOW_SEC):
+        self.mount = mount
+        self.interval = interval
+        self.window = window
+        self.quality = None
+        self._timer = None
+
+    def start(self):
+        if self._timer is None:
+            self._timer = self.mount.client.call_every(self.interval, self._tick, threaded=True)
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _tick(self):
+        try:
+            self.quality = self.analyze()
+        except Exception as e:
+            emit_log(f"[TRACK] Quality analysis failed: {e}")
+            return
+        if self.quality and _socketio:
+            _socketio.emit("tracking_quality", self.quality)
+
+    def analyze(self, now=None):
+        """Fit the current window; None if fewer than TRACK_QUALITY_MIN_SAMPLES tracking samples."""
+        now = time.time() if now is None else now
+        rows = self.mount.telemetry.window(now - self.window, now, ("ra", "dec", "state", "target_ra", "target_dec"))
+        rows = rows[(rows[:, 3] == STATES.index(TRACKING)) & np.isfinite(rows).all(axis=1)]
+        if len(rows) < TRACK_QUALITY_MIN_SAMPLES:
+            return None
+        t = rows[:, 0]
+        ra_off, dec_off, sep = residuals(rows[:, 1], rows[:, 2], rows[:, 4], rows[:, 5])
+
+        seg = _segments(t, ra_off, dec_off, TRACK_QUALITY_JUMP_ARCSEC, 10 * self.interval)
+        count = np.bincount(seg)
+        tc = _demean(t, seg, count)
+        den = tc @ tc
+        ra_rate = (tc @ _demean(ra_off, seg, count)) / den if den > 0 else 0.0
+        dec_rate = (tc @ _demean(dec_off, seg, count)) / den if den > 0 else 0.0
+
+        # offsets now: the fitted line of the latest segment, evaluated at the last sample
+        last = seg == seg[-1]
+        t_mean = t[last].mean()
+        ra_now = ra_off[last].mean() + ra_rate * (t[-1] - t_mean)
+        dec_now = dec_off[last].mean() + dec_rate * (t[-1] - t_mean)
+
+        ra_cont = _stitch(t, ra_off, seg, ra_rate)
+        ra_cont -= np.polyval(np.polyfit(t - t[0], ra_cont, 1), t - t[0])
+        pe_period, pe_p2p = periodic_error(t, ra_cont, TRACK_PE_MIN_PERIOD_SEC, TRACK_PE_MAX_PERIOD_SEC)
+        return {
+            "target": self.mount.target_mode,
+            "samples": int(len(t)),
+            "segments": int(seg[-1]) + 1,
+            "window_sec": round(float(t[-1] - t[0]), 1),
+            "sep_arcsec": round(float(sep[-1]), 1),
+            "sep_rms_arcsec": round(float(np.sqrt(np.mean(sep ** 2))), 1),
+            "sep_max_arcsec": round(float(sep.max()), 1),
+            "ra_offset_arcsec": round(float(ra_now), 1),
+            "dec_offset_arcsec": round(float(dec_now), 1),
+            "ra_drift_arcsec_min": round(float(ra_rate) * 60.0, 2),
+            "dec_drift_arcsec_min": round(float(dec_rate) * 60.0, 2),
+            "pe_period_sec": None if pe_period is None else round(pe_period, 1),
+            "pe_p2p_arcsec": None if pe_p2p is None else round(pe_p2p, 1),
+            "t": float(t[-1]),
+        }
+
+    def offsets(self):
+        """Latest fitted pointing offset (arcsec) and drift (arcsec/s) per axis, or None."""
+        q = self.quality
+        if q is None:
+            return None
+        return {"ra_arcsec": q["ra_offset_arcsec"], "dec_arcsec": q["dec_offset_arcsec"],
+                "ra_drift_arcsec_s": q["ra_drift_arcsec_min"] / 60.0,
+                "dec_drift_arcsec_s": q["dec_drift_arcsec_min"] / 60.0, "t": q["t"]}
\ No newline at end of file
@@ -241,16 +241,32 @@ window.addEventListener("resize", () => {
 });
 setTimeout(() => { resizeCanvas(solarCanvas); resizeCanvas(lunarCanvas); redrawActiveCanvas(); }, 100);
 
+// Packed path: 24-byte header (magic "ASTP", version, start epoch s, step s, count) followed
+// by float32 alt[n], az[n] and int16 label UTC offset min[n]. Labels use the server's offsets,
+// not the browser's zone, so they match the JSON path (DST changes included).
+function decodePackedPath(buf) {
+  const view = new DataView(buf);
+  const t0 = view.getFloat64(8, true), step = view.getFloat32(16, true), n = view.getUint32(20, true);
+  const alt = new Float32Array(buf, 24, n), az = new Float32Array(buf, 24 + 4 * n, n);
+  const offset = new Int16Array(buf, 24 + 8 * n, n);
+  const pad = (v) => String(v).padStart(2, "0");
+  const pts = new Array(n);
+  for (let i = 0; i < n; i++) {
+    const m = ((Math.floor((t0 + i * step) / 60 + offset[i]) % 1440) + 1440) % 1440;
+    pts[i] = { az: az[i], alt: alt[i], time: `${pad(Math.floor(m / 60))}:${pad(m % 60)}` };
+  }
+  return pts;
+}
+function fetchPath(url) {
+  return fetch(`${url}?format=packed`).then((res) => res.arrayBuffer()).then(decodePackedPath);
+}
+
 // Initial paths
 function fetchSolarPath() {
-  return fetch("/get_solar_path").then((res) => res.json()).then((data) => {
-    sunPath = data.map(d => ({ az: parseFloat(d.az), alt: parseFloat(d.alt), time: d.time }));
-  }).catch(() => {});
+  return fetchPath("/get_solar_path").then((data) => { sunPath = data; }).catch(() => {});
 }
 function fetchMoonPath() {
-  return fetch("/get_moon_path").then((res) => res.json()).then((data) => {
-    moonPath = data.map(d => ({ az: parseFloat(d.az), alt: parseFloat(d.alt), time: d.time }));
-  }).catch(() => {});
+  return fetchPath("/get_moon_path").then((data) => { moonPath = data; }).catch(() => {});
 }
 Promise.all([fetchSolarPath(), fetchMoonPath()]).then(redrawActiveCanvas);
 
@@ -296,8 +312,28 @@ if (solarCanvas && solarCtx) {
 }
 
 // === Astro/Solar updates (new + legacy) ===
-function handleAstroOrSolarUpdate(data) {
+// astro_update may carry only changed fields ({delta: true, version}); merge
+// them into ASTRO_STATE and ask for a full snapshot if a version was missed.
+let ASTRO_STATE = {};
+let ASTRO_VERSION = null;
+
+function mergeAstroUpdate(data) {
+  if (data && data.delta) {
+    if (ASTRO_VERSION !== null && data.version !== ASTRO_VERSION + 1) socket.emit("get_solar");
+    for (const [k, v] of Object.entries(data)) {
+      if (v === null) delete ASTRO_STATE[k];   // key dropped server-side (e.g. lunar_* after a target switch)
+      else ASTRO_STATE[k] = v;
+    }
+  } else {
+    ASTRO_STATE = { ...data };
+  }
+  if (data && data.version != null) ASTRO_VERSION = data.version;
+  return ASTRO_STATE;
+}
+
+function handleAstroOrSolarUpdate(update) {
   const g = (id) => document.getElementById(id);
+  const data = mergeAstroUpdate(update);
 
   if (ACTIVE_TARGET === "moon") {
     // Use lunar values but populate the same elements
@@ -394,6 +430,21 @@ socket.on("mount_status", (payload) => {
   }
 });
 
+// === Mount motion state (IDLE / SLEWING / TRACKING / PARKING / PARKED / ERROR) ===
+socket.on("mount_state", (payload) => {
+  const statusEl = document.getElementById("mount-status");
+  const busy = payload.operation === "park" || payload.operation === "unpark";
+  const park = document.getElementById("park-mount");
+  const unpark = document.getElementById("unpark-mount");
+  if (park) park.disabled = busy || payload.state === "PARKED";
+  if (unpark) unpark.disabled = busy;
+  if (statusEl && payload.operation && typeof payload.progress === "number") {
+    const label = payload.operation === "goto" ? "Slewing" : payload.operation === "park" ? "Parking" : "Unparking";
+    statusEl.textContent = `${label}... ${Math.round(payload.progress * 100)}%`;
+  }
+  if (payload.error) console.warn("[MOUNT]", payload.error);
+});
+
 // === MOUNT CONTROL ===
 const trackBtn       = document.getElementById("track-sun");
 const parkBtn        = document.getElementById("park-mount");
@@ -408,14 +459,32 @@ const directions = {
   "slew-west":  "west"
 };
 
+// A press is one server-timed jog; holding repeats it, and the server merges
+// repeats into the running jog. Release sends jog_stop so motion ends at once;
+// if that message is lost the timed segment still ends within JOG_MS.
+const JOG_MS = 250;
+const JOG_REPEAT_MS = 150;
+let jogTimer = null;
+let jogDirection = null;
+const endJog = () => {
+  clearInterval(jogTimer);
+  jogTimer = null;
+  if (jogDirection) socket.emit("jog_stop", { direction: jogDirection });
+  jogDirection = null;
+};
+
 Object.keys(directions).forEach((btnId) => {
   const btn = document.getElementById(btnId);
   if (!btn) return;
   btn.addEventListener("mousedown", () => {
-    socket.emit("slew_mount", { direction: directions[btnId], rate: slewRate() });
+    endJog();
+    jogDirection = directions[btnId];
+    const jog = () => socket.emit("jog_mount", { direction: jogDirection, rate: slewRate(), duration_ms: JOG_MS });
+    jog();
+    jogTimer = setInterval(jog, JOG_REPEAT_MS);
   });
-  btn.addEventListener("mouseup", () => socket.emit("stop_mount"));
-  btn.addEventListener("mouseleave", () => socket.emit("stop_mount"));
+  btn.addEventListener("mouseup", endJog);
+  btn.addEventListener("mouseleave", endJog);
 });
 
 document.getElementById("stop-mount")?.addEventListener("click", () => socket.emit("stop_mount"));
@@ -441,11 +510,9 @@ document.getElementById("target-select")?.addEventListener("change", async (e) =
   // Make sure the correct path is loaded right now
   try {
     if (mode === "moon") {
-      const d = await fetch("/get_moon_path").then(r => r.json());
-      moonPath = d.map(p => ({ az: +p.az, alt: +p.alt, time: p.time }));
+      moonPath = await fetchPath("/get_moon_path");
     } else {
-      const d = await fetch("/get_solar_path").then(r => r.json());
-      sunPath = d.map(p => ({ az: +p.az, alt: +p.alt, time: p.time }));
+      sunPath = await fetchPath("/get_solar_path");
     }
   } catch (_) { /* ignore fetch hiccups; next astro_update will fix */ }
 
@@ -464,12 +531,10 @@ document.getElementById("location-select")?.addEventListener("change", async (e)
 
   // Re-fetch both paths so plot matches new site immediately
   try {
-    const [sunData, moonData] = await Promise.all([
-      fetch("/get_solar_path").then(r => r.json()),
-      fetch("/get_moon_path").then(r => r.json())
+    [sunPath, moonPath] = await Promise.all([
+      fetchPath("/get_solar_path"),
+      fetchPath("/get_moon_path")
     ]);
-    sunPath  = sunData.map(p  => ({ az: +p.az,  alt: +p.alt,  time: p.time }));
-    moonPath = moonData.map(p => ({ az: +p.az, alt: +p.alt, time: p.time }));
   } catch (_) { /* ignore; next astro_update will correct */ }
 
   redrawActiveCanvas();
@@ -2,6 +2,9 @@
 
 # REMOTE DEVICE INFO
 RASPBERRY_PI_IP = "192.168.1.147"  # KC IP
+INDIGO_RECONNECT_MIN_SEC = 0.5     # first reconnect backoff; doubles per failed attempt (jittered)
+INDIGO_RECONNECT_MAX_SEC = 10.0    # backoff ceiling, i.e. worst-case delay once the server is back
+INDIGO_ASYNC_CLIENT = False        # True: all INDIGO I/O on one asyncio loop (not yet run against the mount)
 SSH_USERNAME = "pi"
 SSH_PASSWORD = "raspberry"
 
@@ -9,6 +12,7 @@ SSH_PASSWORD = "raspberry"
 GEO_LAT  = 35.9132
 GEO_LON  = -79.0558
 GEO_ELEV = 148  # m
+GEO_TZ   = "America/New_York"
 
 # LOCATION PROFILES
 LOCATION_PROFILES = {
@@ -35,6 +39,7 @@ DEFAULT_SOLAR_DATA = {
     "sun_time": "--"
 }
 
+# Legacy path cache (old/solar_module.py only); see PATH_CACHE_* below
 solar_cache = {
     "date_sun": None,
     "path_sun": None,
@@ -42,6 +47,18 @@ solar_cache = {
     "path_moon": None
 }
 
+# PATH CACHE (sun/moon day paths keyed by site, target, local date, interval)
+PATH_CACHE_SIZE = 32
+PATH_CACHE_PREWARM = True  # compute today's paths for every LOCATION_PROFILES entry at startup
+
+# PATH PLANNER (multi-day paths/events, one JSON file per site/target/day)
+PATH_STORE_DIR = "data/paths"
+PATH_PLANNER_WORKERS = None  # None → cpu_count - 1
+
+# ASTRO UPDATE CADENCE (seconds; adaptive between these bounds)
+ASTRO_MIN_INTERVAL = 1.0
+ASTRO_MAX_INTERVAL = 30.0
+
 # MOUNT COORDINATES
 HOME_RA = "00:00:00"
 HOME_DEC = "+00:00:00"
@@ -50,6 +67,33 @@ PARK_RA = 0.0
 PARK_DEC = 90.0
 LAST_RA = None
 LAST_DEC = None
+MOUNT_COORD_EPOCH = "J2000"       # epoch of reported RA/DEC: "J2000" (precessed to date) or "JNow"
+MOUNT_ALTAZ_BUCKET_SEC = 1.0      # sidereal time / precession reuse window for Alt/Az readouts
+MOUNT_ALTAZ_REFRACTION = True
+MOUNT_COORD_STALE_SEC = 15.0      # re-request coordinates if no INDIGO update arrives within this
+MOUNT_GOTO_TIMEOUT_SEC = 120.0    # goto/park/unpark fail if the mount has not arrived by then
+MOUNT_ARRIVAL_TOLERANCE = 0.01    # RA hours / DEC degrees counted as arrived
+MOUNT_TELEMETRY_CAPACITY = 172800 # samples in the telemetry ring (48 h at 1 Hz, ~12 MB)
+MOUNT_TELEMETRY_MIN_SEC = 0.5     # coordinate updates closer together than this are not recorded
+MOUNT_GUIDER_DEVICE = None        # INDIGO device taking GUIDER_GUIDE_RA/DEC pulses for slow jogs (None: the mount)
+MOUNT_JOG_MAX_MS = 5000           # longest single jog
+
+# COMMAND LATENCY TRACING (utilities/latency_trace)
+TRACE_SLOW_MS = 250.0             # UI event → INDIGO acknowledgement slower than this is logged
+TRACE_TIMEOUT_SEC = 10.0          # commands still unacknowledged after this are closed as expired
+
+# TARGET TRACKING (modules/track_module.TargetTracker)
+TRACK_RATE_MODE = "custom"        # "custom": computed rate (if the mount supports it) | "preset": SOLAR/LUNAR
+TRACK_CHECK_SEC = 10.0            # drift check cadence
+TRACK_DRIFT_ARCSEC = 30.0         # correct pointing only when drift exceeds this
+TRACK_RATE_UPDATE_SEC = 300.0     # re-derive the target's rate this often
+TRACK_SETTLE_SEC = 5.0            # ignore drift this long after a correction
+TRACK_QUALITY_SEC = 10.0          # tracking_quality analysis / publish cadence
+TRACK_QUALITY_WINDOW_SEC = 1800.0 # sliding window of telemetry analysed
+TRACK_QUALITY_MIN_SAMPLES = 20    # fewer tracking samples in the window → no estimate
+TRACK_QUALITY_JUMP_ARCSEC = 10.0  # residual step between samples treated as a correction, not drift
+TRACK_PE_MIN_PERIOD_SEC = 60.0    # periodic-error search band (worm periods are typically minutes)
+TRACK_PE_MAX_PERIOD_SEC = 900.0
 
 # ARDUINO SHARED STATE
 ARDUINO_STATE = {
@@ -0,0 +1,284 @@
+# INDIGO Async Client
+# asyncio implementation of IndigoJSONClient: one event loop for all device I/O
+
+import asyncio
+import threading
+import time
+from concurrent.futures import InvalidStateError
+
+from utilities.config import INDIGO_RECONNECT_MAX_SEC
+from utilities.logger import emit_log
+from utilities.indigo_framing import FrameDecoder
+from utilities.indigo_json_client import IndigoJSONClient, _enable_keepalive, _guarded
+from utilities.indigo_writer import CommandQueue, MAX_BATCH_BYTES
+
+
+class AsyncIndigoJSONClient(IndigoJSONClient):
+    """
+    Same public surface as IndigoJSONClient (send, subscribe, on_connect,
+    when, properties, ...), but the socket, reconnect supervision, timers
+    and property timeouts all live on one asyncio loop running in a single
+    thread. Every method may be called from any thread; subscriber and
+    on_connect callbacks run on the loop, so they must not block: anything
+    slower (socket emits, ephemeris, analysis) subscribes with threaded=True
+    or schedules its timer with threaded=True, which hands the callback to a
+    worker thread instead.
+    """
+    def __init__(self, host, loop=None):
+        super().__init__(host)
+        self.transport = None
+        self._protocol = None
+        self.writer = _TransportWriter(self)
+        self.loop = loop
+        self.loop_thread = None
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+            self.loop_thread = threading.Thread(target=self.loop.run_forever, name="indigo-loop", daemon=True)
+            self.loop_thread.start()
+        self._wake = asyncio.Event()
+        self._supervisor = None
+
+    # ---------------- Connection supervision ----------------
+    def start(self):
+        """Keep the connection up until close(); calling again just retries immediately."""
+        self.loop.call_soon_threadsafe(self._start)
+
+    def _start(self):
+        if self._supervisor and not self._supervisor.done():
+            self._wake.set()
+            return
+        self.stop_flag.clear()
+        self._supervisor = self.loop.create_task(self._supervise())
+
+    def reconnect_now(self):
+        self.loop.call_soon_threadsafe(self._wake.set)
+
+    async def _supervise(self):
+        while not self.stop_flag.is_set():
+            if await self._connect():
+                since = time.monotonic()
+                await self._protocol.lost  # resolves when the connection drops
+                if self.stop_flag.is_set():
+                    break
+                if time.monotonic() - since >= INDIGO_RECONNECT_MAX_SEC:
+                    self.retry_count = 0
+                    continue               # first retry after a healthy connection is immediate
+            delay = self._backoff(self.retry_count)
+            self.retry_count += 1
+            emit_log(f"[INDIGO] Reconnecting in {delay:.1f}s... (Attempt {self.retry_count})")
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def connect(self, timeout=15.0):
+        """One connection attempt from a non-loop thread; True once connected (no supervision)."""
+        return asyncio.run_coroutine_threadsafe(self._connect(), self.loop).result(timeout)
+
+    async def _connect(self):
+        try:
+            transport, protocol = await asyncio.wait_for(
+                self.loop.create_connection(lambda: _IndigoProtocol(self), self.host, self.port), 10)
+        except (OSError, asyncio.TimeoutError) as e:
+            if self.retry_count == 0:
+                emit_log(f"[INDIGO] Cannot reach {self.host}:{self.port}: {e!r}")
+            return False
+        sock = transport.get_extra_info("socket")
+        if sock is not None:
+            _enable_keepalive(sock)
+        # keep at most one batch in the transport buffer so an abort never queues behind more
+        transport.set_write_buffer_limits(high=MAX_BATCH_BYTES)
+        self.transport, self._protocol, self.decoder = transport, protocol, protocol.decoder
+        self.connected = True
+        self.connects += 1
+        self.writer.attach(transport)
+        emit_log("[INDIGO] Connected." if self.connects == 1 else "[INDIGO] Reconnected.")
+        self.send({"getProperties": {"version": 512}}, quiet=True)
+        self._run_connect_callbacks()
+        return True
+
+    def _connection_lost(self, exc):
+        self.connected = False
+        self.transport = None
+        self.writer.detach()
+        if self.stop_flag.is_set():
+            return
+        if exc is not None:
+            emit_log(f"[INDIGO] Listener error: {exc}")
+        else:
+            emit_log("[INDIGO] Connection closed by remote.")
+        emit_log("[INDIGO] Disconnected. Reconnecting...")
+
+    def is_connected(self):
+        return self.connected and self.transport is not None
+
+    def close(self):
+        """Clean shutdown; the loop keeps running so start() can be called again."""
+        self.stop_flag.set()
+        self.reconnect_now()
+        self.writer.flush(timeout=1.0)
+        self.connected = False
+        transport = self.transport
+        if transport is not None:
+            self.loop.call_soon_threadsafe(transport.close)
+        emit_log("[INDIGO] Client closed.")
+
+    # ---------------- Property futures ----------------
+    def when(self, device, name, predicate=None, timeout=None, newer_than=0):
+        """As IndigoJSONClient.when(), but the timeout is a loop timer instead of a thread."""
+        future = self.properties.when(device, name, predicate, None, newer_than)
+        if timeout is not None and not future.done():
+            timer = self.call_later(timeout, lambda: _expire(future, device, name, timeout))
+            future.add_done_callback(lambda _f: timer.cancel())
+        return future
+
+    async def wait_property(self, device, name, predicate=None, timeout=None, newer_than=0):
+        future = asyncio.wrap_future(self.properties.when(device, name, predicate, None, newer_than))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"{device}.{name}: condition not met within {timeout:g}s") from None
+
+    # ---------------- Timers ----------------
+    def call_later(self, delay, callback, threaded=False):
+        return _LoopCall(self.loop, delay, callback, threaded=threaded)
+
+    def call_every(self, interval, callback, threaded=False):
+        return _LoopCall(self.loop, interval, callback, repeat=True, threaded=threaded)
+
+
+def _expire(future, device, name, timeout):
+    try:
+        future.set_exception(TimeoutError(f"{device}.{name}: condition not met within {timeout:g}s"))
+    except InvalidStateError:
+        pass
+
+
+class _LoopCall:
+    """
+    call_later()/call_every() handle: armed on the loop, cancellable from any
+    thread. threaded=True runs the callback in the loop's default executor.
+    """
+    def __init__(self, loop, delay, callback, repeat=False, threaded=False):
+        self._loop = loop
+        self._delay = delay
+        self._callback = callback
+        self._repeat = repeat
+        self._threaded = threaded
+        self._cancelled = False
+        loop.call_soon_threadsafe(self._arm)
+
+    def _arm(self):
+        if not self._cancelled:
+            self._loop.call_later(self._delay, self._fire)
+
+    def _fire(self):
+        if self._cancelled:
+            return
+        if self._threaded:
+            self._loop.run_in_executor(None, _guarded, self._callback)
+        else:
+            _guarded(self._callback)
+        if self._repeat:
+            self._arm()
+
+    def cancel(self):
+        self._cancelled = True
+
+
+class _IndigoProtocol(asyncio.BufferedProtocol):
+    """Reads straight into the FrameDecoder buffer (no per-read bytes objects)."""
+    def __init__(self, client):
+        self.client = client
+        self.decoder = FrameDecoder()
+        self.lost = client.loop.create_future()
+
+    def get_buffer(self, sizehint):
+        return self.decoder.writable()
+
+    def buffer_updated(self, nbytes):
+        self.decoder.commit(nbytes)
+        for msg in self.decoder.frames(on_error=self.client._parse_error):
+            self.client._dispatch(msg)
+
+    def pause_writing(self):
+        self.client.writer.paused = True
+
+    def resume_writing(self):
+        self.client.writer.paused = False
+        self.client.writer.kick()
+
+    def connection_lost(self, exc):
+        self.client._connection_lost(exc)
+        if not self.lost.done():
+            self.lost.set_result(exc)
+
+
+class _TransportWriter:
+    """
+    CommandWriter on an asyncio transport: the same CommandQueue, drained
+    from the loop with writelines(). While the transport is paused (its
+    buffer holds more than one batch) commands wait in the queue, where an
+    abort can still overtake them.
+    """
+    def __init__(self, client):
+        self.client = client
+        self.queue = CommandQueue()
+        self.transport = None
+        self.paused = False
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._idle = threading.Event()
+        self._idle.set()
+
+    def attach(self, transport):
+        with self._lock:
+            self.transport = transport
+            self.paused = False
+            self._clear()
+
+    def detach(self):
+        with self._lock:
+            self.transport = None
+            self._clear()
+
+    def flush(self, timeout=1.0):
+        if threading.current_thread() is self.client.loop_thread:
+            return self._idle.is_set()  # waiting here would stall the loop that drains us
+        return self._idle.wait(timeout)
+
+    def send(self, message, priority=None, trace=None):
+        with self._lock:
+            self.queue.push(message, priority, trace)
+            self._idle.clear()
+            schedule, self._scheduled = not self._scheduled, True
+        if schedule:
+            self.client.loop.call_soon_threadsafe(self._drain)
+
+    def kick(self):
+        with self._lock:
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._drain()
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                transport = self.transport
+                if transport is None or self.paused or not self.queue:
+                    self._scheduled = False
+                    if not self.queue:
+                        self._idle.set()
+                    return
+                batch = self.queue.pop_batch()
+            transport.writelines([e.frame for e in batch])  # may call pause_writing()
+            self.queue.written(batch)
+
+    def _clear(self):
+        self.queue.clear()
+        self._idle.set()
+
+    def stats(self):
+        return dict(self.queue.stats(), paused=self.paused)
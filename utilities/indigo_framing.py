@@ -0,0 +1,152 @@
+# INDIGO Framing
+# Newline-delimited JSON decoder over a reusable bytearray, with throughput stats
+
+import json
+import time
+
+try:
+    import orjson                      # optional: several times faster, parses memoryviews in place
+    JSON_BACKEND = "orjson"
+    _loads = orjson.loads
+    _ZERO_COPY = True
+except ImportError:
+    JSON_BACKEND = "json"
+    _loads = json.loads
+    _ZERO_COPY = False
+
+DEFAULT_BUFFER = 64 * 1024
+MAX_FRAME = 64 * 1024 * 1024           # a single frame (e.g. a BLOB vector) larger than this is dropped
+
+
+class FrameDecoder:
+    """
+    recv_from(sock) reads straight into a preallocated bytearray with
+    recv_into(); frames() scans for b"\\n" from where the last scan stopped
+    and parses each line through a memoryview. Consumed bytes are reclaimed
+    by moving only the unfinished tail to the front, and the buffer only
+    grows (doubling) when one frame does not fit.
+    """
+    def __init__(self, size=DEFAULT_BUFFER, max_frame=MAX_FRAME):
+        self.max_frame = max_frame
+        self._buf = bytearray(size)
+        self._view = memoryview(self._buf)
+        self._start = 0        # first unconsumed byte
+        self._scan = 0         # bytes before this are known to hold no newline
+        self._end = 0          # end of received data
+        self._skipping = False # discarding the rest of an oversized frame
+        self._started = time.monotonic()
+        self.bytes = 0
+        self.frames_parsed = 0
+        self.errors = 0
+        self.oversized = 0
+        self.parse_seconds = 0.0
+        self.allocations = 1   # buffer allocations (initial + growth)
+        self.copies = 0        # per-frame copies (json backend only)
+        self.compactions = 0
+
+    # ---- intake ----
+    def recv_from(self, sock):
+        """One recv_into() call; returns the byte count (0 means the peer closed)."""
+        n = sock.recv_into(self.writable())
+        self.commit(n)
+        return n
+
+    def writable(self):
+        """Free tail of the buffer to read into (asyncio.BufferedProtocol.get_buffer)."""
+        self._reserve()
+        return self._view[self._end:]
+
+    def commit(self, n):
+        """Mark n bytes written into writable() as received (BufferedProtocol.buffer_updated)."""
+        self._end += n
+        self.bytes += n
+
+    def feed(self, data):
+        """Append bytes from elsewhere (asyncio, tests)."""
+        data = memoryview(data)
+        while len(data):
+            self._reserve()
+            n = min(len(data), len(self._buf) - self._end)
+            self._view[self._end:self._end + n] = data[:n]
+            self._end += n
+            self.bytes += n
+            data = data[n:]
+
+    def frames(self, on_error=None):
+        """Yield each complete decoded frame; on_error(snippet, exc) sees unparsable ones."""
+        buf, view = self._buf, self._view
+        while True:
+            nl = buf.find(b"\n", self._scan, self._end)
+            if nl < 0:
+                self._scan = self._end
+                break
+            start, self._start = self._start, nl + 1
+            self._scan = self._start
+            if self._skipping:
+                self._skipping = False
+                continue
+            if nl - start <= 1 and not view[start:nl].tobytes().strip():
+                continue
+            frame = view[start:nl]
+            t0 = time.perf_counter()
+            try:
+                if _ZERO_COPY:
+                    msg = _loads(frame)
+                else:
+                    msg = _loads(str(frame, "utf-8"))
+                    self.copies += 1
+            except ValueError as e:
+                self.errors += 1
+                if on_error:
+                    on_error(frame[:120].tobytes(), e)
+                continue
+            finally:
+                self.parse_seconds += time.perf_counter() - t0
+            self.frames_parsed += 1
+            yield msg
+        if self._start == self._end:
+            self._start = self._scan = self._end = 0
+
+    # ---- buffer management ----
+    def _reserve(self):
+        if self._end < len(self._buf):
+            return
+        pending = self._end - self._start
+        if self._start > 0:
+            # reclaim consumed bytes: move only the unfinished tail
+            self._buf[:pending] = self._buf[self._start:self._end]
+            self._scan -= self._start
+            self._start, self._end = 0, pending
+            self.compactions += 1
+            if pending < len(self._buf):
+                return
+        if len(self._buf) * 2 <= self.max_frame:
+            grown = bytearray(len(self._buf) * 2)
+            grown[:pending] = self._buf[:pending]
+            self._view.release()
+            self._buf, self._view = grown, memoryview(grown)
+            self.allocations += 1
+            return
+        # one frame exceeds max_frame: drop what we have and skip to its newline
+        if not self._skipping:
+            self.oversized += 1
+        self._skipping = True
+        self._start = self._scan = self._end = 0
+
+    # ---- stats ----
+    def stats(self):
+        elapsed = time.monotonic() - self._started
+        return {
+            "backend": JSON_BACKEND,
+            "bytes": self.bytes,
+            "frames": self.frames_parsed,
+            "errors": self.errors,
+            "oversized": self.oversized,
+            "buffer_bytes": len(self._buf),
+            "allocations": self.allocations,
+            "copies": self.copies,
+            "compactions": self.compactions,
+            "parse_mb_s": round(self.bytes / self.parse_seconds / 1e6, 1) if self.parse_seconds else None,
+            "parse_msgs_s": round(self.frames_parsed / self.parse_seconds) if self.parse_seconds else None,
+            "wire_mb_s": round(self.bytes / elapsed / 1e6, 3) if elapsed else None,
+        }
@@ -1,12 +1,19 @@
 # INDIGO JSON Client
 # Connects to INDIGO server using JSON protocol over TCP.
 
+import asyncio
+import random
 import socket
 import threading
-import json
 import time
 import select
+from utilities.config import INDIGO_RECONNECT_MIN_SEC, INDIGO_RECONNECT_MAX_SEC
 from utilities.logger import emit_log
+from utilities.property_mirror import PropertyMirror, MIRRORED_VERBS
+from utilities.indigo_router import MessageRouter, ANY
+from utilities.indigo_framing import FrameDecoder
+from utilities.indigo_writer import CommandWriter, PRIORITY_ABORT
+from utilities.latency_trace import tracer
 
 class IndigoJSONClient:
     def __init__(self, host):
@@ -14,65 +21,117 @@ class IndigoJSONClient:
         self.port = 7624
         self.sock = None
         self.listener_thread = None
-        self.callbacks = {}  # action_type -> function(msg)
+        self.supervisor_thread = None
+        self.router = MessageRouter()  # (kind, device, name) -> subscribers
+        self.connect_callbacks = []  # run after every successful connect
+        self.properties = PropertyMirror()  # everything the server has told us
+        self.decoder = FrameDecoder()        # replaced per connection
         self.connected = False
-        self.lock = threading.Lock()  # for send() thread safety
-        self.reconnect_interval = 5
+        self.writer = CommandWriter(on_error=self._write_error)  # owns every socket write
         self.retry_count = 0
+        self.connects = 0
         self.stop_flag = threading.Event()
+        self._wake = threading.Event()  # cuts a backoff wait short
 
-    def connect(self, max_retries=10):
-        while not self.stop_flag.is_set() and self.retry_count < max_retries:
-            try:
-                emit_log(f"[INDIGO] Connecting to {self.host}:{self.port}... (Attempt {self.retry_count + 1})")
-                self.sock = socket.create_connection((self.host, self.port), timeout=10)
-                self.connected = True
-                self.retry_count = 0
-                emit_log("[INDIGO] Connected.")
-                self.listener_thread = threading.Thread(target=self._listen_loop, daemon=True)
-                self.listener_thread.start()
-                return
-            except (socket.timeout, ConnectionRefusedError, OSError) as e:
-                emit_log(f"[INDIGO] Connection failed: {e}. Retrying in {self.reconnect_interval}s...")
-                time.sleep(self.reconnect_interval)
-                self.retry_count += 1
+    # ---------------- Connection supervision ----------------
+    def start(self):
+        """Keep the connection up until close(); calling again just retries immediately."""
+        if self.supervisor_thread and self.supervisor_thread.is_alive():
+            self.reconnect_now()
+            return
+        self.stop_flag.clear()
+        self.supervisor_thread = threading.Thread(target=self._supervise, daemon=True)
+        self.supervisor_thread.start()
 
-        print(f"[INDIGO] Failed to connect after {max_retries} attempts.")
-        self.connected = False
+    def reconnect_now(self):
+        """Skip the rest of the current backoff (e.g. the server port was seen coming back)."""
+        self._wake.set()
+
+    def _supervise(self):
+        while not self.stop_flag.is_set():
+            if self.connect():
+                since = time.monotonic()
+                self.listener_thread.join()  # returns when the connection drops
+                if self.stop_flag.is_set():
+                    break
+                if time.monotonic() - since >= INDIGO_RECONNECT_MAX_SEC:
+                    self.retry_count = 0
+                    continue                 # first retry after a healthy connection is immediate
+                # dropped right after connecting: back off like a failed attempt, no reconnect storm
+            delay = self._backoff(self.retry_count)
+            self.retry_count += 1
+            emit_log(f"[INDIGO] Reconnecting in {delay:.1f}s... (Attempt {self.retry_count})")
+            self._wake.wait(delay)
+            self._wake.clear()
 
-    def send(self, message: dict, quiet: bool = False):
-        """Send a JSON message to INDIGO."""
-        if not self.connected or not self.sock:
+    @staticmethod
+    def _backoff(attempt):
+        """Exponential backoff with jitter, so several clients do not retry in lockstep."""
+        ceiling = min(INDIGO_RECONNECT_MAX_SEC, INDIGO_RECONNECT_MIN_SEC * 2 ** min(attempt, 16))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def connect(self):
+        """One connection attempt; True once connected, listening and resynchronised."""
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=10)
+        except OSError as e:
+            if self.retry_count == 0:
+                emit_log(f"[INDIGO] Cannot reach {self.host}:{self.port}: {e}")
+            return False
+        _enable_keepalive(sock)
+        self.sock = sock
+        self.connected = True
+        self.connects += 1
+        self.writer.attach(sock)
+        emit_log("[INDIGO] Connected." if self.connects == 1 else "[INDIGO] Reconnected.")
+        self.listener_thread = threading.Thread(target=self._listen_loop, daemon=True)
+        self.listener_thread.start()
+        # enumerate every device so the property mirror fills and updates keep coming
+        self.send({"getProperties": {"version": 512}}, quiet=True)
+        # callers' on_connect hooks re-send their last known state (site, tracking, ...)
+        self._run_connect_callbacks()
+        return True
+
+    def send(self, message: dict, quiet: bool = False, priority=None):
+        """
+        Queue a JSON message for the writer thread and return immediately.
+        A newer command for a property still waiting replaces the older one;
+        abort/stop messages (or priority=PRIORITY_ABORT) go out first.
+        """
+        if not self.is_connected():
             if not quiet:
                 emit_log("[INDIGO] Not connected — skipping send.")
             return
-        raw = json.dumps(message) + '\n'
-        with self.lock:
-            try:
-                self.sock.sendall(raw.encode())
-            except (BrokenPipeError, OSError) as e:
-                if not quiet:
-                    emit_log(f"[INDIGO] Send failed: {e}")
-                self.connected = False
-                if not quiet:
-                    raise
+        trace = tracer.current()    # set when called on behalf of a traced UI command
+        if trace is not None:
+            trace.mark("queued")
+        self.writer.send(message, priority, trace)
+
+    def send_urgent(self, message: dict, quiet: bool = False):
+        """Send ahead of everything already queued (stop, abort)."""
+        self.send(message, quiet, PRIORITY_ABORT)
+
+    def _write_error(self, error):
+        # the writer already logged; closing wakes the listener so it notices too
+        self.connected = False
+        try:
+            self.sock.close()
+        except OSError:
+            pass
 
     def _listen_loop(self):
         """Continuously read and dispatch JSON messages from the INDIGO server."""
-        buffer = ''
+        decoder = self.decoder = FrameDecoder()
         try:
             while not self.stop_flag.is_set():
                 # Wait up to 1 second for data to become readable
                 ready, _, _ = select.select([self.sock], [], [], 1.0)
                 if ready:
-                    data = self.sock.recv(4096).decode()
-                    if not data:
+                    if not decoder.recv_from(self.sock):
                         emit_log("[INDIGO] Connection closed by remote.")
                         break
-                    buffer += data
-                    while '\n' in buffer:
-                        line, buffer = buffer.split('\n', 1)
-                        self._dispatch(line.strip())
+                    for msg in decoder.frames(on_error=self._parse_error):
+                        self._dispatch(msg)
                 else:
                     # No data yet — skip this loop cycle
                     continue
@@ -80,28 +139,111 @@ class IndigoJSONClient:
             emit_log(f"[INDIGO] Listener error: {e}")
         finally:
             self.connected = False
+            self.writer.detach()
             try:
                 self.sock.close()
             except:
                 pass
-            emit_log("[INDIGO] Disconnected. Attempting to reconnect...")
-            emit_log("[INDIGO] Reconnection skipped after listener exit.")
+            if not self.stop_flag.is_set():
+                emit_log("[INDIGO] Disconnected. Reconnecting...")
+
+    def _parse_error(self, snippet, error):
+        emit_log(f"[INDIGO] Failed to parse: {snippet[:80]!r} ({error})")
 
-    def _dispatch(self, line: str):
-        """Handle a single JSON message from INDIGO."""
+    def _dispatch(self, msg: dict):
+        """Handle a single decoded JSON message from INDIGO."""
         try:
-            msg = json.loads(line)
+            if not isinstance(msg, dict):
+                return
             kind = msg.get("action") or msg.get("name")
-            if kind in self.callbacks:
-                self.callbacks[kind](msg)
-            else:
-                emit_log(f"[INDIGO] Unhandled message: {msg}")
-        except json.JSONDecodeError:
-            emit_log("[INDIGO] Failed to parse:", line)
+            if kind is None and len(msg) == 1:
+                # INDIGO wraps each message: {"setNumberVector": {"device": ..., "name": ..., "items": [...]}}
+                kind, body = next(iter(msg.items()))
+                if isinstance(body, dict):
+                    msg = body
+            mirrored = kind in MIRRORED_VERBS
+            if mirrored:
+                acking = tracer.waiting and kind != "deleteProperty"
+                if acking:
+                    prop = self.properties.get(msg.get("device"), msg.get("name"))
+                    previous = prop.state if prop else None
+                self.properties.apply(kind, msg)
+                if acking:
+                    tracer.on_update(msg.get("device"), msg.get("name"), msg.get("state"), previous,
+                                     kind == "setNumberVector")
+            self.router.dispatch(kind, msg, consumed=mirrored)
+        except (AttributeError, TypeError, KeyError) as e:
+            emit_log(f"[INDIGO] Malformed message skipped: {e}")
 
     def on(self, kind, callback):
-        """Register callback for message kind ('set', 'get', etc)."""
-        self.callbacks[kind] = callback
+        """Register callback(msg) for a message kind ('setNumberVector', ...); adds, never replaces."""
+        return self.router.subscribe(callback, kind)
+
+    def subscribe(self, callback, kind=ANY, device=ANY, name=ANY, threaded=False):
+        """
+        Register callback(msg) for a (kind, device, property) pattern; any part
+        may be ANY, and kind may be a tuple of kinds sharing one subscription.
+        threaded=True runs it on its own worker, off the reader thread.
+        """
+        return self.router.subscribe(callback, kind, device, name, threaded)
+
+    def unsubscribe(self, subscription):
+        self.router.unsubscribe(subscription)
+
+    def on_connect(self, callback):
+        """Run callback() after each connect and reconnect (now too, if already connected)."""
+        self.connect_callbacks.append(callback)
+        if self.is_connected():
+            callback()
+
+    def _run_connect_callbacks(self):
+        for callback in list(self.connect_callbacks):
+            try:
+                callback()
+            except Exception as e:
+                emit_log(f"[INDIGO] Connect hook failed: {e}")
+
+    def get_property(self, device, name):
+        """Mirrored Property for (device, name), or None if the server has not sent it."""
+        return self.properties.get(device, name)
+
+    def get_value(self, device, name, item, default=None):
+        """Mirrored value of one item, without a round-trip."""
+        return self.properties.value(device, name, item, default)
+
+    def when(self, device, name, predicate=None, timeout=None, newer_than=0):
+        """
+        concurrent.futures.Future resolving to the Property once predicate(prop)
+        holds (see property_mirror.state_in / items_near); TimeoutError after timeout.
+        Pass newer_than=client.properties.version(device, name) taken before
+        sending a command to ignore the state it replaces.
+        """
+        return self.properties.when(device, name, predicate, timeout, newer_than)
+
+    async def wait_property(self, device, name, predicate=None, timeout=None, newer_than=0):
+        """asyncio flavour of when(): await the matching Property."""
+        return await asyncio.wrap_future(self.when(device, name, predicate, timeout, newer_than))
+
+    async def request_property(self, device, name, timeout=5.0):
+        """Ask the server for (device, name) and await its fresh definition."""
+        version = self.properties.version(device, name)
+        self.send({"getProperties": {"device": device, "name": name}}, quiet=True)
+        return await self.wait_property(device, name, timeout=timeout, newer_than=version)
+
+    # ---------------- Timers ----------------
+    def call_later(self, delay, callback, threaded=False):
+        """
+        Run callback() once after delay seconds; returns a handle with cancel().
+        Timers here always run on their own thread; `threaded` matters for the asyncio client.
+        """
+        timer = threading.Timer(delay, _guarded, (callback,))
+        timer.daemon = True
+        timer.start()
+        return timer
+
+    def call_every(self, interval, callback, threaded=False):
+        """Run callback() every interval seconds; returns a handle with cancel()."""
+        return _Repeat(interval, callback)
 
     def is_connected(self):
         """Return True if the client is actively connected and socket is valid."""
@@ -110,10 +252,46 @@ class IndigoJSONClient:
     def close(self):
         """Clean shutdown."""
         self.stop_flag.set()
+        self._wake.set()
+        self.writer.flush(timeout=1.0)  # let queued stop/park commands reach the server
         self.connected = False
+        self.writer.detach()
         if self.sock:
             try:
                 self.sock.close()
             except:
                 pass
         emit_log("[INDIGO] Client closed.")
+
+
+def _enable_keepalive(sock, idle=10, interval=5, count=3):
+    """Let the OS notice a silently dropped link (~25 s) instead of waiting on an idle socket forever."""
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    for opt, value in (("TCP_KEEPIDLE", idle), ("TCP_KEEPINTVL", interval), ("TCP_KEEPCNT", count)):
+        if hasattr(socket, opt):
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, opt), value)
+            except OSError:
+                pass
+
+def _guarded(callback):
+    try:
+        callback()
+    except Exception as e:
+        emit_log(f"[INDIGO] Timer callback {getattr(callback, '__qualname__', callback)} failed: {e}")
+
+
+class _Repeat:
+    """call_every() handle for the threaded client: one daemon thread per repeating callback."""
+    def __init__(self, interval, callback):
+        self._stopped = threading.Event()
+        self._interval = interval
+        self._callback = callback
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while not self._stopped.wait(self._interval):
+            _guarded(self._callback)
+
+    def cancel(self):
+        self._stopped.set()
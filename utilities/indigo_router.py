@@ -0,0 +1,147 @@
+# INDIGO Router
+# Indexed (type, device, property) dispatch for INDIGO messages
+
+import queue
+import threading
+import time
+from collections import Counter, deque
+from itertools import product
+
+from utilities.logger import emit_log
+
+ANY = "*"
+UNHANDLED_LOG_INTERVAL = 60.0   # seconds between unhandled-traffic summaries
+UNHANDLED_MAX_KEYS = 256        # distinct unhandled (kind, device, name) counted; busiest half kept when full
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+class Subscription:
+    """
+    One registered callback(msg). Threaded subscriptions get their own
+    worker and bounded queue so a slow handler never blocks the socket reader;
+    when the queue is full the oldest message is dropped and counted.
+    `kind` may be a tuple: one subscription (and one worker, so messages
+    stay in arrival order) is then indexed under each kind.
+    """
+    def __init__(self, callback, kind=ANY, device=ANY, name=ANY, threaded=False):
+        self.callback = callback
+        kinds = kind if isinstance(kind, tuple) else (kind,)
+        self.keys = tuple((k or ANY, device or ANY, name or ANY) for k in kinds)
+        self.threaded = threaded
+        self.calls = 0
+        self.errors = 0
+        self.dropped = 0
+        self._queue = None
+        if threaded:
+            self._queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+            threading.Thread(target=self._worker, daemon=True).start()
+
+    def deliver(self, msg):
+        if self._queue is None:
+            self._call(msg)
+            return
+        while True:
+            try:
+                self._queue.put_nowait(msg)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def close(self):
+        if self._queue is not None:
+            self._queue.put(None)
+
+    def _worker(self):
+        while True:
+            msg = self._queue.get()
+            if msg is None:
+                return
+            self._call(msg)
+
+    def _call(self, msg):
+        self.calls += 1
+        try:
+            self.callback(msg)
+        except Exception as e:
+            self.errors += 1
+            emit_log(f"[INDIGO] Subscriber {getattr(self.callback, '__qualname__', self.callback)} failed: {e}")
+
+
+class MessageRouter:
+    """
+    Subscriptions are indexed by their (kind, device, name) pattern, where
+    any part may be ANY. Dispatch probes the 8 exact/wildcard combinations,
+    so cost does not grow with the number of subscribers.
+    """
+    def __init__(self):
+        self._index = {}            # pattern -> tuple of Subscription
+        self._lock = threading.Lock()
+        self.dispatched = 0
+        self.unhandled = Counter()  # (kind, device, name) -> count, at most UNHANDLED_MAX_KEYS keys
+        self.unhandled_total = 0
+        self.samples = deque(maxlen=20)
+        self._unlogged = 0
+        self._last_log = 0.0
+
+    def subscribe(self, callback, kind=ANY, device=ANY, name=ANY, threaded=False):
+        sub = Subscription(callback, kind, device, name, threaded)
+        with self._lock:
+            for key in sub.keys:
+                self._index[key] = self._index.get(key, ()) + (sub,)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            for key in sub.keys:
+                subs = tuple(s for s in self._index.get(key, ()) if s is not sub)
+                if subs:
+                    self._index[key] = subs
+                else:
+                    self._index.pop(key, None)
+        sub.close()
+
+    def dispatch(self, kind, msg, consumed=False):
+        """Deliver to every matching subscriber. `consumed` marks traffic handled elsewhere (e.g. the mirror)."""
+        self.dispatched += 1
+        device, name = msg.get("device"), msg.get("name")
+        index = self._index
+        matched = False
+        for key in product((kind, ANY), (device, ANY), (name, ANY)):
+            for sub in index.get(key, ()):
+                sub.deliver(msg)
+                matched = True
+        if not matched and not consumed:
+            self._record_unhandled(kind, device, name, msg)
+        return matched
+
+    def _record_unhandled(self, kind, device, name, msg):
+        if len(self.unhandled) >= UNHANDLED_MAX_KEYS and (kind, device, name) not in self.unhandled:
+            self.unhandled = Counter(dict(self.unhandled.most_common(UNHANDLED_MAX_KEYS // 2)))
+        self.unhandled[(kind, device, name)] += 1
+        self.unhandled_total += 1
+        self.samples.append(str(msg)[:200])
+        self._unlogged += 1
+        now = time.monotonic()
+        if now - self._last_log >= UNHANDLED_LOG_INTERVAL:
+            top = ", ".join(f"{k[0]}:{k[1]}.{k[2]} x{n}" for k, n in self.unhandled.most_common(3))
+            emit_log(f"[INDIGO] {self._unlogged} unhandled message(s) since last report (top: {top})")
+            self._unlogged = 0
+            self._last_log = now
+
+    def stats(self):
+        with self._lock:
+            subs = list({s: None for group in self._index.values() for s in group})
+        return {
+            "subscribers": len(subs),
+            "dispatched": self.dispatched,
+            "unhandled": self.unhandled_total,
+            "unhandled_top": [{"kind": k[0], "device": k[1], "name": k[2], "count": n}
+                              for k, n in self.unhandled.most_common(10)],
+            "dropped": sum(s.dropped for s in subs),
+            "errors": sum(s.errors for s in subs),
+            "samples": list(self.samples)[-5:],
+        }
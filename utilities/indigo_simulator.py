@@ -0,0 +1,553 @@
+# INDIGO Simulator
+# Local INDIGO JSON server emulating "Mount Agent" and "nSTEP" for offline tests and load benchmarks
+#
+#   python -m utilities.indigo_simulator [--port 7624] [--latency-ms 0] [--jitter-ms 0]
+#       [--goto-deg-s 3] [--telemetry-hz 0] [--telemetry-props 10] [--payload-bytes 0] [--burst-size 0] [--burst-every 1]
+#
+# Point the app at it with RASPBERRY_PI_IP = "127.0.0.1" in utilities/config.py.
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+
+SIDEREAL_HOURS_PER_SEC = 1.00273790935 / 3600.0     # RA drift of a fixed pointing with tracking off
+TRACK_RATES = {"SIDEREAL": 1.0, "SOLAR": 0.99726957, "LUNAR": 0.96366, "KING": 0.99998}
+SLEW_RATES_DEG_S = {"GUIDE": 0.5 * 15.041 / 3600, "CENTERING": 0.25, "FIND": 1.0, "MAX": 3.0}
+GOTO_DEG_S = 3.0
+PARK_POSITION = (0.0, 90.0)
+FOCUSER_STEPS_PER_SPEED = 10                         # steps/s per FOCUSER_SPEED unit
+MAX_LINE = 64 * 1024 * 1024
+
+
+# ---------------- Properties ----------------
+class SimProperty:
+    """One simulated property; items is an ordered {name: value} dict."""
+    def __init__(self, device, name, type_, items, state="Ok", perm="rw", group="Main", rule=None):
+        self.device = device
+        self.name = name
+        self.type = type_            # "Number" | "Switch" | "Text" | "Light" | "BLOB"
+        self.items = dict(items)
+        self.state = state
+        self.perm = perm
+        self.group = group
+        self.rule = rule             # "OneOfMany" for radio-style switches
+
+    def apply(self, items):
+        """Apply a client's item list; switches with OneOfMany keep a single ON item."""
+        values = {i.get("name"): i.get("value") for i in items if i.get("name") in self.items}
+        if self.rule == "OneOfMany" and any(v is True for v in values.values()):
+            for k in self.items:
+                self.items[k] = False
+        self.items.update(values)
+        return values
+
+    def message(self, verb):
+        body = {"device": self.device, "name": self.name, "state": self.state,
+                "items": [{"name": k, "value": v} for k, v in self.items.items()]}
+        if verb == "def":
+            body.update(perm=self.perm, group=self.group, label=self.name.replace("_", " ").title())
+            if self.rule:
+                body["rule"] = self.rule
+        return {f"{verb}{self.type}Vector": body}
+
+
+class SimDevice:
+    """Base device: a property table, a command handler and a kinematics step."""
+    def __init__(self, name):
+        self.name = name
+        self.props = {}
+
+    def add(self, name, type_, items, **kw):
+        self.props[name] = SimProperty(self.name, name, type_, items, **kw)
+        return self.props[name]
+
+    def handle(self, name, items):
+        """Apply a new*Vector; return the properties that changed (each is broadcast)."""
+        prop = self.props.get(name)
+        if prop is None:
+            return []
+        prop.apply(items)
+        return [prop]
+
+    def step(self, now, dt):
+        return []
+
+
+# ---------------- Mount Agent ----------------
+class MountSim(SimDevice):
+    """Equatorial mount: goto kinematics, tracking rates, manual motion, park, abort."""
+    def __init__(self, name="Mount Agent", ra=0.0, dec=90.0, coords_hz=2.0, goto_deg_s=GOTO_DEG_S):
+        super().__init__(name)
+        self.ra, self.dec = ra, dec
+        self.goto_deg_s = goto_deg_s
+        self.target = None
+        self.parking = False
+        self.coords_interval = 1.0 / coords_hz if coords_hz else None
+        self._pushed_at = 0.0
+        self.coords = self.add("MOUNT_EQUATORIAL_COORDINATES", "Number", {"RA": ra, "DEC": dec})
+        self.add("MOUNT_ON_COORDINATES_SET", "Switch", {"TRACK": True, "SYNC": False, "SLEW": False}, rule="OneOfMany")
+        self.tracking = self.add("MOUNT_TRACKING", "Switch", {"ON": False, "OFF": True}, rule="OneOfMany")
+        self.track_rate = self.add("MOUNT_TRACK_RATE", "Switch", {k: k == "SIDEREAL" for k in (*TRACK_RATES, "CUSTOM")},
+                                   rule="OneOfMany")
+        self.custom_rate = self.add("MOUNT_CUSTOM_TRACKING_RATE", "Number", {"RATE": 1.0})
+        self.slew_rate = self.add("MOUNT_SLEW_RATE", "Switch", {k: k == "CENTERING" for k in SLEW_RATES_DEG_S},
+                                  rule="OneOfMany")
+        self.motion_ra = self.add("MOUNT_MOTION_RA", "Switch", {"WEST": False, "EAST": False})
+        self.motion_dec = self.add("MOUNT_MOTION_DEC", "Switch", {"NORTH": False, "SOUTH": False})
+        self.add("MOUNT_ABORT_MOTION", "Switch", {"ABORT_MOTION": False})
+        self.park = self.add("MOUNT_PARK", "Switch", {"PARKED": ra == PARK_POSITION[0] and dec == PARK_POSITION[1],
+                                                      "UNPARKED": not (ra == PARK_POSITION[0] and dec == PARK_POSITION[1])},
+                             rule="OneOfMany")
+        self.add("GEOGRAPHIC_COORDINATES", "Number", {"LAT": 0.0, "LONG": 0.0, "ELEVATION": 0.0})
+        self.add("GUIDER_GUIDE_RA", "Number", {"GUIDER_GUIDE_EAST": 0, "GUIDER_GUIDE_WEST": 0})
+        self.add("GUIDER_GUIDE_DEC", "Number", {"GUIDER_GUIDE_NORTH": 0, "GUIDER_GUIDE_SOUTH": 0})
+        self.pulses = {}              # guide property -> (sign, start, end) on the loop clock
+
+    def handle(self, name, items):
+        changed = super().handle(name, items)
+        if not changed:
+            return changed
+        prop = changed[0]
+        if name == "MOUNT_EQUATORIAL_COORDINATES":
+            ra, dec = prop.items["RA"], prop.items["DEC"]
+            prop.items.update(RA=self.ra, DEC=self.dec)       # reported value is the pointing, not the target
+            if self.props["MOUNT_ON_COORDINATES_SET"].items.get("SYNC"):
+                self.ra, self.dec = ra % 24.0, dec
+                prop.items.update(RA=self.ra, DEC=self.dec)
+            else:
+                self._goto(ra, dec)
+        elif name == "MOUNT_ABORT_MOTION" and prop.items.get("ABORT_MOTION"):
+            prop.items["ABORT_MOTION"] = False
+            self.target, self.parking = None, False
+            for motion in (self.motion_ra, self.motion_dec):
+                motion.items = dict.fromkeys(motion.items, False)
+                changed.append(motion)
+            self.coords.state = "Ok"
+            changed.append(self.coords)
+        elif name == "MOUNT_PARK" and prop.items.get("PARKED"):
+            prop.items.update(PARKED=False, UNPARKED=True)    # PARKED once the slew arrives
+            prop.state = "Busy"
+            self.parking = True
+            self._goto(*PARK_POSITION)
+        elif name in ("GUIDER_GUIDE_RA", "GUIDER_GUIDE_DEC"):
+            plus, minus = prop.items.values()   # EAST/NORTH first
+            ms = plus or minus
+            if ms:
+                now = time.monotonic()        # the loop clock
+                self.pulses[name] = (1 if plus else -1, now, now + ms / 1000.0)
+                prop.state = "Busy"
+            else:
+                self.pulses.pop(name, None)
+                prop.state = "Ok"
+        elif name in ("MOUNT_MOTION_RA", "MOUNT_MOTION_DEC"):
+            self.coords.state = "Busy" if self._manual() else "Ok"
+            changed.append(self.coords)
+        return changed
+
+    def _goto(self, ra, dec):
+        self.target = (ra % 24.0, max(-90.0, min(90.0, dec)))
+        self.coords.state = "Busy"
+        if self.park.items.get("PARKED") and not self.parking:
+            self.park.items.update(PARKED=False, UNPARKED=True)
+
+    def _manual(self):
+        return any(self.motion_ra.items.values()) or any(self.motion_dec.items.values())
+
+    def _rate(self):
+        if not self.tracking.items.get("ON"):
+            return 0.0
+        preset = next((k for k, v in self.track_rate.items.items() if v), "SIDEREAL")
+        return float(self.custom_rate.items["RATE"]) if preset == "CUSTOM" else TRACK_RATES.get(preset, 1.0)
+
+    def step(self, now, dt):
+        changed = []
+        self.ra = (self.ra + (1.0 - self._rate()) * SIDEREAL_HOURS_PER_SEC * dt) % 24.0
+        if self.target is not None:
+            ra_t, dec_t = self.target
+            dra = ((ra_t - self.ra + 12.0) % 24.0 - 12.0) * 15.0   # degrees, shortest way round
+            ddec = dec_t - self.dec
+            reach = self.goto_deg_s * dt
+            self.ra = (self.ra + max(-reach, min(reach, dra)) / 15.0) % 24.0
+            self.dec += max(-reach, min(reach, ddec))
+            if abs(dra) <= reach and abs(ddec) <= reach:
+                self.ra, self.dec = ra_t, dec_t
+                self.target = None
+                self.coords.state = "Ok"
+                if self.parking:
+                    self.parking = False
+                    self.park.items.update(PARKED=True, UNPARKED=False)
+                    self.park.state = "Ok"
+                    self.tracking.items.update(ON=False, OFF=True)
+                    changed += [self.park, self.tracking]
+                self._pushed_at = 0.0                           # report arrival at once
+        elif self._manual():
+            speed = SLEW_RATES_DEG_S[next((k for k, v in self.slew_rate.items.items() if v), "CENTERING")] * dt
+            ew = self.motion_ra.items
+            ns = self.motion_dec.items
+            self.ra = (self.ra + (speed * (ew["EAST"] - ew["WEST"])) / 15.0) % 24.0
+            self.dec = max(-90.0, min(90.0, self.dec + speed * (ns["NORTH"] - ns["SOUTH"])))
+        for name, (sign, start, end) in list(self.pulses.items()):
+            moved = sign * SLEW_RATES_DEG_S["GUIDE"] * max(0.0, min(now, end) - max(now - dt, start))
+            if name == "GUIDER_GUIDE_RA":
+                self.ra = (self.ra + moved / 15.0) % 24.0
+            else:
+                self.dec = max(-90.0, min(90.0, self.dec + moved))
+            if now >= end:
+                del self.pulses[name]
+                prop = self.props[name]
+                prop.items = dict.fromkeys(prop.items, 0)
+                prop.state = "Ok"
+                changed.append(prop)
+                self._pushed_at = 0.0
+        if self.coords_interval is not None and now - self._pushed_at >= self.coords_interval:
+            self._pushed_at = now
+            self.coords.items.update(RA=round(self.ra, 7), DEC=round(self.dec, 6))
+            changed.append(self.coords)
+        return changed
+
+
+# ---------------- nSTEP focuser ----------------
+class FocuserSim(SimDevice):
+    """
+    Stepper focuser. Speaks the INDIGO focuser properties and also accepts the
+    legacy setProperties/FOCUSER_MOTION messages NStepFocuser sends.
+    """
+    def __init__(self, name="nSTEP", position=5000, max_position=100000):
+        super().__init__(name)
+        self.max_position = max_position
+        self.direction = 0            # -1 in, +1 out
+        self.remaining = None         # steps left for a relative move; None = continuous
+        self._carry = 0.0
+        self.position = self.add("FOCUSER_POSITION", "Number", {"POSITION": position})
+        self.speed = self.add("FOCUSER_SPEED", "Number", {"SPEED": 50})
+        self.add("FOCUSER_STEPS", "Number", {"STEPS": 0})
+        self.add("FOCUSER_DIRECTION", "Switch", {"MOVE_INWARD": True, "MOVE_OUTWARD": False}, rule="OneOfMany")
+        self.add("FOCUSER_ABORT_MOTION", "Switch", {"ABORT_MOTION": False})
+
+    def handle(self, name, items):
+        changed = super().handle(name, items)
+        if not changed:
+            return changed
+        prop = changed[0]
+        if name == "FOCUSER_STEPS":
+            inward = self.props["FOCUSER_DIRECTION"].items["MOVE_INWARD"]
+            self._move(-1 if inward else 1, int(prop.items["STEPS"]))
+            changed.append(self.position)
+        elif name == "FOCUSER_POSITION":
+            target = int(prop.items["POSITION"])
+            prop.items["POSITION"] = self._current()
+            delta = target - self._current()
+            self._move(1 if delta > 0 else -1, abs(delta))
+        elif name == "FOCUSER_ABORT_MOTION" and prop.items.get("ABORT_MOTION"):
+            prop.items["ABORT_MOTION"] = False
+            self._stop()
+            changed.append(self.position)
+        return changed
+
+    def handle_legacy(self, name, elements):
+        """setProperties {"name": ..., "elements": {...}} as sent by NStepFocuser.move()."""
+        if name == "FOCUSER_MOTION":
+            if elements.get("FOCUSER_ABORT_MOTION"):
+                self._stop()
+            elif elements.get("FOCUSER_INWARD"):
+                self._move(-1, None)
+            elif elements.get("FOCUSER_OUTWARD"):
+                self._move(1, None)
+            return [self.position]
+        if name == "FOCUSER_SPEED" and "FOCUSER_SPEED_VALUE" in elements:
+            self.speed.items["SPEED"] = elements["FOCUSER_SPEED_VALUE"]
+            return [self.speed]
+        return []
+
+    def _current(self):
+        return int(self.position.items["POSITION"])
+
+    def _move(self, direction, steps):
+        self.direction, self.remaining, self._carry = direction, steps, 0.0
+        self.position.state = "Busy" if steps != 0 else "Ok"
+
+    def _stop(self):
+        self.direction, self.remaining = 0, None
+        self.position.state = "Ok"
+
+    def step(self, now, dt):
+        if not self.direction:
+            return []
+        self._carry += float(self.speed.items["SPEED"]) * FOCUSER_STEPS_PER_SPEED * dt
+        steps = int(self._carry)
+        if not steps:
+            return []
+        self._carry -= steps
+        if self.remaining is not None:
+            steps = min(steps, self.remaining)
+            self.remaining -= steps
+        position = max(0, min(self.max_position, self._current() + self.direction * steps))
+        self.position.items["POSITION"] = position
+        if self.remaining == 0 or position in (0, self.max_position):
+            self._stop()
+        return [self.position]
+
+
+# ---------------- Synthetic load ----------------
+class LoadSim(SimDevice):
+    """
+    "Simulator" device that generates traffic: `props` number properties
+    updated `hz` times a second, each padded to about `payload_bytes`, plus
+    optional bursts of `burst_size` updates every `burst_every` seconds.
+    """
+    def __init__(self, name="Simulator", props=10, hz=0.0, payload_bytes=0, burst_size=0, burst_every=1.0):
+        super().__init__(name)
+        self.interval = 1.0 / hz if hz else None
+        self.burst_size = burst_size
+        self.burst_every = burst_every
+        self._next = self._next_burst = 0.0
+        self._tick = 0
+        filler = "x" * payload_bytes
+        self.load = [self.add(f"SIM_TELEMETRY_{i}", "Number", {"VALUE": 0.0}) for i in range(props)]
+        if payload_bytes:
+            self.pad = [self.add(f"SIM_PAYLOAD_{i}", "Text", {"DATA": filler}) for i in range(props)]
+        else:
+            self.pad = []
+
+    def step(self, now, dt):
+        changed = []
+        if self.interval and now >= self._next:
+            self._next = now + self.interval
+            self._tick += 1
+            for prop in self.load:
+                prop.items["VALUE"] = self._tick
+            changed += self.load + self.pad
+        if self.burst_size and now >= self._next_burst:
+            self._next_burst = now + self.burst_every
+            changed += [self.load[i % len(self.load)] for i in range(self.burst_size)] if self.load else []
+        return changed
+
+
+# ---------------- Server ----------------
+class _Connection:
+    """One client: reads commands, writes replies after the injected latency/jitter (order preserved)."""
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.queue = asyncio.Queue()
+        self._last_due = 0.0
+        self._sender = asyncio.get_running_loop().create_task(self._send_loop()) if server.delayed else None
+
+    def send(self, data):
+        if self.writer.is_closing():
+            return
+        self.server.messages_out += 1
+        self.server.bytes_out += len(data)
+        if self._sender is None:
+            self.writer.write(data)
+            return
+        loop = asyncio.get_running_loop()
+        due = max(self._last_due, loop.time() + self.server.latency + random.uniform(0.0, self.server.jitter))
+        self._last_due = due
+        self.queue.put_nowait((due, data))
+
+    async def _send_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            due, data = await self.queue.get()
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.writer.write(data)
+
+    def close(self):
+        if self._sender is not None:
+            self._sender.cancel()
+        self.writer.close()
+
+
+class IndigoSimulator:
+    """
+    INDIGO JSON server on its own asyncio loop thread. Devices are stepped
+    `tick_hz` times a second and every change is broadcast as set*Vector to
+    all clients, as a real server does. start()/stop() may be repeated on the
+    same port, and drop_connections() cuts every client, to exercise reconnects.
+    """
+    def __init__(self, host="127.0.0.1", port=0, tick_hz=20.0, latency_ms=0.0, jitter_ms=0.0,
+                 coords_hz=2.0, goto_deg_s=GOTO_DEG_S, telemetry_hz=0.0, telemetry_props=10, payload_bytes=0,
+                 burst_size=0, burst_every=1.0):
+        self.host = host
+        self.port = port
+        self.tick = 1.0 / max(tick_hz, telemetry_hz)
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.delayed = bool(latency_ms or jitter_ms)
+        self.mount = MountSim(coords_hz=coords_hz, goto_deg_s=goto_deg_s)
+        self.focuser = FocuserSim()
+        self.devices = {d.name: d for d in (self.mount, self.focuser)}
+        if telemetry_hz or burst_size:
+            load = LoadSim(props=telemetry_props, hz=telemetry_hz, payload_bytes=payload_bytes,
+                           burst_size=burst_size, burst_every=burst_every)
+            self.devices[load.name] = load
+        self.connections = set()
+        self.messages_in = self.messages_out = 0
+        self.bytes_out = 0
+        self.received = []            # last commands, newest last (for tests)
+        self.on_message = None        # optional hook(msg), called on the simulator loop as each command arrives
+        self.loop = None
+        self._thread = None
+        self._server = None
+        self._ticker = None
+
+    # ---- lifecycle ----
+    def start(self):
+        """Listen in a background thread; returns the bound port."""
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self.loop.run_forever, name="indigo-sim", daemon=True)
+            self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._listen(), self.loop).result(5)
+        return self.port
+
+    def stop(self):
+        """Close the listener and every connection (the loop stays up for a later start())."""
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(5)
+
+    def drop_connections(self):
+        """Cut every client but keep listening."""
+        self.loop.call_soon_threadsafe(self._drop)
+
+    def call(self, fn, *args):
+        """Run fn(*args) on the simulator loop and return its result (e.g. to poke device state)."""
+        async def run():
+            return fn(*args)
+        return asyncio.run_coroutine_threadsafe(run(), self.loop).result(5)
+
+    async def _listen(self):
+        self._server = await asyncio.start_server(self._client, self.host, self.port, limit=MAX_LINE)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self._ticker is None or self._ticker.done():
+            self._ticker = asyncio.get_running_loop().create_task(self._tick_loop())
+
+    async def _shutdown(self):
+        server, self._server = self._server, None
+        if server is not None:
+            server.close()
+        self._drop()                   # before wait_closed(), which waits for open connections on 3.12+
+        if server is not None:
+            await server.wait_closed()
+        if self._ticker is not None:
+            self._ticker.cancel()
+
+    def _drop(self):
+        for conn in list(self.connections):
+            conn.close()
+        self.connections.clear()
+
+    # ---- protocol ----
+    async def _client(self, reader, writer):
+        conn = _Connection(self, reader, writer)
+        self.connections.add(conn)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    msg = json.loads(line)
+                except ValueError:
+                    continue
+                self.messages_in += 1
+                self.received.append(msg)
+                del self.received[:-1000]
+                if self.on_message is not None:
+                    self.on_message(msg)
+                self._handle(conn, msg)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections.discard(conn)
+            conn.close()
+
+    def _handle(self, conn, msg):
+        for verb, body in msg.items():
+            if not isinstance(body, dict):
+                continue
+            device = self.devices.get(body.get("device"))
+            if verb == "getProperties":
+                self._define(conn, body.get("device"), body.get("name"))
+            elif verb.startswith("new") and device is not None:
+                self._broadcast(device.handle(body.get("name"), body.get("items", [])))
+            elif verb == "setProperties" and isinstance(device, FocuserSim):
+                self._broadcast(device.handle_legacy(body.get("name"), body.get("elements", {})))
+
+    def _define(self, conn, device=None, name=None):
+        for dev in self.devices.values():
+            if device is not None and dev.name != device:
+                continue
+            for prop in dev.props.values():
+                if name is None or prop.name == name:
+                    conn.send(_frame(prop.message("def")))
+
+    def _broadcast(self, props):
+        if not props or not self.connections:
+            return
+        frames = b"".join(_frame(p.message("set")) for p in props)
+        for conn in list(self.connections):
+            conn.send(frames)
+        # count messages, not batches
+        self.messages_out += (len(props) - 1) * len(self.connections)
+
+    async def _tick_loop(self):
+        loop = asyncio.get_running_loop()
+        last = loop.time()
+        while True:
+            await asyncio.sleep(self.tick)
+            now = loop.time()
+            dt, last = now - last, now
+            for dev in self.devices.values():
+                self._broadcast(dev.step(now, dt))
+
+    def stats(self):
+        return {"clients": len(self.connections), "messages_in": self.messages_in,
+                "messages_out": self.messages_out, "bytes_out": self.bytes_out}
+
+
+def _frame(message):
+    return (json.dumps(message) + "\n").encode()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local INDIGO JSON server simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7624)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--coords-hz", type=float, default=2.0)
+    parser.add_argument("--goto-deg-s", type=float, default=GOTO_DEG_S)
+    parser.add_argument("--telemetry-hz", type=float, default=0.0)
+    parser.add_argument("--telemetry-props", type=int, default=10)
+    parser.add_argument("--payload-bytes", type=int, default=0)
+    parser.add_argument("--burst-size", type=int, default=0)
+    parser.add_argument("--burst-every", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    sim = IndigoSimulator(args.host, args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                          coords_hz=args.coords_hz, goto_deg_s=args.goto_deg_s, telemetry_hz=args.telemetry_hz,
+                          telemetry_props=args.telemetry_props, payload_bytes=args.payload_bytes,
+                          burst_size=args.burst_size, burst_every=args.burst_every)
+    port = sim.start()
+    print(f"[SIM] INDIGO simulator on {args.host}:{port} (devices: {', '.join(sim.devices)})")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"[SIM] {sim.stats()}")
+    except KeyboardInterrupt:
+        sim.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,234 @@
+# INDIGO Writer
+# Dedicated socket writer: priority queue, per-property coalescing, vectored sends
+
+import heapq
+import itertools
+import json
+import threading
+import time
+
+from utilities.latency_trace import tracer
+from utilities.logger import emit_log
+
+PRIORITY_ABORT = 0     # stop/abort: always next on the wire
+PRIORITY_COMMAND = 1   # new*Vector commands
+PRIORITY_QUERY = 2     # getProperties and other background traffic
+
+MAX_BATCH_FRAMES = 64
+MAX_BATCH_BYTES = 64 * 1024    # bounds how long an abort can wait behind a batch in flight
+
+
+def default_priority(verb, body):
+    if str(body.get("name", "")).endswith("ABORT_MOTION"):
+        return PRIORITY_ABORT
+    if verb == "getProperties":
+        return PRIORITY_QUERY
+    return PRIORITY_COMMAND
+
+
+def coalesce_key(verb, body):
+    """Commands for the same (verb, device, property) supersede each other; others never do."""
+    if verb.startswith("new") or verb == "getProperties":
+        return (verb, body.get("device"), body.get("name"))
+    return None
+
+
+class _Entry:
+    __slots__ = ("priority", "seq", "key", "frame", "queued_at", "live", "traces", "ack")
+
+    def __init__(self, priority, seq, key, frame, queued_at, traces=()):
+        self.priority = priority
+        self.seq = seq
+        self.key = key
+        self.frame = frame
+        self.queued_at = queued_at
+        self.live = True
+        self.traces = traces           # latency traces riding on this frame (superseded ones included)
+        self.ack = None                # latency_trace.Frame, registered when popped for writing
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class CommandQueue:
+    """
+    Pending frames ordered by (priority, arrival). A newer command for a
+    pending property drops the older one and queues behind everything sent
+    since (taking the higher priority of the two), so dependent properties
+    (coordinates, then ON_COORDINATES_SET) keep their order. Not locked:
+    writers hold their own.
+    """
+    def __init__(self):
+        self._heap = []
+        self._pending = {}             # coalesce key -> live _Entry
+        self._seq = itertools.count()
+        self.depth = 0                 # live entries queued
+        self.max_depth = 0
+        self.coalesced = 0
+        self.frames_sent = 0
+        self.writes = 0
+        self.abort_latency_ms = None   # enqueue → on the wire, last abort
+        self.max_abort_latency_ms = 0.0
+
+    def push(self, message, priority=None, trace=None):
+        """Encode and queue one message (encoding errors surface to the caller)."""
+        verb, body = next(iter(message.items())) if len(message) == 1 else ("", {})
+        body = body if isinstance(body, dict) else {}
+        if priority is None:
+            priority = default_priority(verb, body)
+        key = coalesce_key(verb, body)
+        frame = (json.dumps(message) + "\n").encode()
+        traces = (trace,) if trace is not None else ()
+        old = self._pending.get(key) if key else None
+        if old is not None and old.live:
+            old.live = False
+            self.coalesced += 1
+            entry = _Entry(min(priority, old.priority), next(self._seq), key, frame, old.queued_at, old.traces + traces)
+        else:
+            entry = _Entry(priority, next(self._seq), key, frame, time.perf_counter(), traces)
+            self.depth += 1
+        if key:
+            self._pending[key] = entry
+        heapq.heappush(self._heap, entry)
+        self.max_depth = max(self.max_depth, self.depth)
+
+    def pop_batch(self):
+        """Up to MAX_BATCH_FRAMES / MAX_BATCH_BYTES live entries, highest priority first."""
+        batch, size = [], 0
+        while self._heap and len(batch) < MAX_BATCH_FRAMES and size < MAX_BATCH_BYTES:
+            entry = heapq.heappop(self._heap)
+            if not entry.live:
+                continue
+            self.depth -= 1
+            if entry.key and self._pending.get(entry.key) is entry:
+                del self._pending[entry.key]
+            if entry.traces:
+                # registered before the write so a fast reply cannot arrive unmatched;
+                # a new*Vector is acknowledged by the server's next update of that property
+                acked = entry.key[1:] if entry.key and entry.key[0].startswith("new") else None
+                entry.ack = tracer.expect(entry.traces, acked)
+            batch.append(entry)
+            size += len(entry.frame)
+        return batch
+
+    def written(self, batch):
+        """Account for a batch that just went out in one write."""
+        done = time.perf_counter()
+        self.writes += 1
+        self.frames_sent += len(batch)
+        for e in batch:
+            if e.priority == PRIORITY_ABORT:
+                self.abort_latency_ms = round((done - e.queued_at) * 1e3, 3)
+                self.max_abort_latency_ms = max(self.max_abort_latency_ms, self.abort_latency_ms)
+            if e.ack is not None:
+                tracer.on_wire(e.ack)
+
+    def clear(self):
+        self._heap.clear()
+        self._pending.clear()
+        self.depth = 0
+
+    def __len__(self):
+        return self.depth
+
+    def stats(self):
+        return {
+            "queued": self.depth,
+            "max_depth": self.max_depth,
+            "frames_sent": self.frames_sent,
+            "writes": self.writes,
+            "frames_per_write": round(self.frames_sent / self.writes, 2) if self.writes else None,
+            "coalesced": self.coalesced,
+            "abort_latency_ms": self.abort_latency_ms,
+            "max_abort_latency_ms": self.max_abort_latency_ms,
+        }
+
+
+class CommandWriter:
+    """
+    send() encodes on the caller's thread, queues and returns at once. One
+    writer thread drains the CommandQueue and writes every ready frame in
+    one sendmsg() call.
+    """
+    def __init__(self, on_error=None):
+        self.on_error = on_error       # called with the exception when a write fails
+        self.queue = CommandQueue()
+        self._sock = None
+        self._cond = threading.Condition()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._thread = None
+
+    # ---- lifecycle ----
+    def attach(self, sock):
+        with self._cond:
+            self._sock = sock
+            self._clear()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def detach(self):
+        """Forget the socket and drop anything still queued (stale after a reconnect)."""
+        with self._cond:
+            self._sock = None
+            self._clear()
+            self._cond.notify()
+
+    def flush(self, timeout=1.0):
+        """Wait until the queue has drained; True if it did."""
+        return self._idle.wait(timeout)
+
+    # ---- intake ----
+    def send(self, message, priority=None, trace=None):
+        with self._cond:
+            self.queue.push(message, priority, trace)
+            self._idle.clear()
+            self._cond.notify()
+
+    # ---- writer thread ----
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._sock is None or not self.queue:
+                    if not self.queue:
+                        self._idle.set()
+                    self._cond.wait()
+                sock = self._sock
+                batch = self.queue.pop_batch()
+            if not batch:
+                continue
+            try:
+                self._write(sock, [e.frame for e in batch])
+            except OSError as e:
+                emit_log(f"[INDIGO] Write failed: {e}")
+                with self._cond:
+                    if self._sock is sock:
+                        self._sock = None
+                        self._clear()
+                if self.on_error:
+                    self.on_error(e)
+                continue
+            self.queue.written(batch)
+
+    @staticmethod
+    def _write(sock, frames):
+        if not hasattr(sock, "sendmsg"):   # e.g. Windows
+            sock.sendall(b"".join(frames))
+            return
+        views = [memoryview(f) for f in frames]
+        while views:
+            sent = sock.sendmsg(views)
+            while views and sent >= len(views[0]):
+                sent -= len(views[0])
+                views.pop(0)
+            if views and sent:
+                views[0] = views[0][sent:]
+
+    def _clear(self):
+        self.queue.clear()
+        self._idle.set()
+
+    def stats(self):
+        return self.queue.stats()
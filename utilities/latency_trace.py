@@ -0,0 +1,276 @@
+# Latency Trace
+# Per-command hop timestamps (UI event → MountControl → send → wire → INDIGO ack) and latency histograms
+
+import bisect
+import contextvars
+import functools
+import itertools
+import threading
+import time
+from collections import deque
+
+from utilities.config import TRACE_SLOW_MS, TRACE_TIMEOUT_SEC
+from utilities.logger import emit_log
+
+_socketio = None  # Module-level SocketIO reference (command_latency events)
+
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)  # histogram upper bounds (+ overflow)
+
+# (label, from hop, to hop); a missing "mount" hop (sent straight from the handler) falls back to "ui"
+SEGMENTS = (
+    ("dispatch", "ui", "mount"),     # SocketIO handler → MountControl executor picks it up
+    ("prepare", "mount", "queued"),  # → IndigoJSONClient.send()
+    ("queue", "queued", "wire"),     # → written to the socket (writer queue / lock / batch)
+    ("server", "wire", "ack"),       # → first reply (set*Vector) for a property it sent
+    ("total", "ui", "done"),         # → every property the command touched acknowledged
+)
+
+ACK_STATES = ("Busy", "Ok", "Alert")   # property states a server reply to a new*Vector carries
+
+_current = contextvars.ContextVar("command_trace", default=None)
+
+
+def set_socketio(instance):
+    global _socketio
+    _socketio = instance
+
+
+class Trace:
+    """One UI command: id, kind and perf_counter() time of each hop (first occurrence wins)."""
+    __slots__ = ("id", "kind", "t", "pending", "sent")
+
+    def __init__(self, id_, kind):
+        self.id = id_
+        self.kind = kind
+        self.t = {"ui": time.perf_counter()}
+        self.pending = 0    # frames on the wire still waiting for an acknowledgement
+        self.sent = 0
+
+    def mark(self, hop):
+        if hop not in self.t:
+            self.t[hop] = time.perf_counter()
+
+    def segments(self):
+        out = {}
+        for label, a, b in SEGMENTS:
+            start = self.t.get(a, self.t["ui"] if a == "mount" else None)
+            if start is not None and b in self.t:
+                out[label] = round((self.t[b] - start) * 1e3, 3)
+        return out
+
+
+class Frame:
+    """One written frame carrying traces; `key` is the (device, name) whose update acknowledges it."""
+    __slots__ = ("traces", "key", "wired")
+
+    def __init__(self, traces, key):
+        self.traces = tuple(traces)
+        self.key = key
+        self.wired = False
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (ms); quantiles are bucket upper bounds."""
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def quantile(self, q):
+        target, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target and n:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else round(self.max, 3)
+        return None
+
+    def stats(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "max_ms": round(self.max, 3),
+            "buckets": {f"<={b}": n for b, n in zip(BUCKETS_MS, self.counts)} | {f">{BUCKETS_MS[-1]}": self.counts[-1]},
+        }
+
+
+class LatencyTracer:
+    """
+    traced(kind) wraps a SocketIO handler: it opens a Trace and binds it to
+    the handler's context. MountControl carries that context onto its
+    executor, IndigoJSONClient.send() marks "queued", the writer marks "wire"
+    and the reader marks "ack" on the reply for each property sent. INDIGO
+    replies carry no command id, so updates of a property are matched to its
+    frames in the order they were written, and a number vector updated with
+    an unchanged Ok state (streamed telemetry) is not taken as a reply. Once
+    every frame is acknowledged the trace lands in the per-kind
+    histograms, the recent list and a `command_latency` event; slow ones are
+    logged. Traces that sent nothing, or are still open after
+    TRACE_TIMEOUT_SEC, are counted by outcome but kept out of the histograms.
+    """
+    def __init__(self, slow_ms=TRACE_SLOW_MS, timeout=TRACE_TIMEOUT_SEC, keep=200):
+        self.slow_ms = slow_ms
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._open = {}          # id -> Trace, oldest first
+        self.waiting = {}        # (device, name) -> deque of Frame awaiting acknowledgement
+        self.histograms = {}     # kind -> {segment: Histogram}
+        self.recent = deque(maxlen=keep)
+        self.outcomes = {}       # outcome -> traces closed that way
+
+    # ---------------- Context ----------------
+    def traced(self, kind):
+        """Decorator: trace every call of a handler as one `kind` command."""
+        def wrap(fn):
+            @functools.wraps(fn)
+            def handler(*args, **kwargs):
+                token = _current.set(self.begin(kind))
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    _current.reset(token)
+            return handler
+        return wrap
+
+    @staticmethod
+    def current():
+        return _current.get()
+
+    def begin(self, kind):
+        trace = Trace(next(self._ids), kind)
+        with self._lock:
+            self._open[trace.id] = trace
+        self._sweep()
+        return trace
+
+    # ---------------- Hops ----------------
+    def expect(self, traces, key):
+        """
+        Register a frame about to be written (writer, before the write, so a
+        fast reply cannot beat it). `key` is None for frames nothing answers
+        (getProperties, ...): those traces close at their wire time on timeout.
+        """
+        frame = Frame(traces, key)
+        if key is not None:
+            with self._lock:
+                for trace in frame.traces:
+                    trace.pending += 1
+                self.waiting.setdefault(key, deque()).append(frame)
+        return frame
+
+    def on_wire(self, frame):
+        """The frame's write returned."""
+        with self._lock:
+            if frame.wired:
+                return             # already stamped by a reply that beat us here
+            frame.wired = True
+            for trace in frame.traces:
+                trace.mark("wire")
+                trace.sent += 1
+
+    def on_update(self, device, name, state, previous, streamed):
+        """
+        A set*/def*Vector arrived (reader thread): acknowledge the oldest frame
+        waiting on it. `previous` is the mirrored state before the update;
+        `streamed` marks number vectors, which servers also push unprompted.
+        """
+        if not self.waiting:
+            return
+        if state not in ACK_STATES or (streamed and state == previous == "Ok"):
+            return
+        done = []
+        with self._lock:
+            frames = self.waiting.get((device, name))
+            if not frames:
+                return
+            frame = frames.popleft()
+            if not frames:
+                del self.waiting[(device, name)]
+            for trace in frame.traces:
+                if not frame.wired:    # reply read before the writer got back from the write
+                    trace.mark("wire")
+                    trace.sent += 1
+                trace.mark("ack")
+                trace.pending -= 1
+                if trace.pending == 0 and self._open.pop(trace.id, None) is not None:
+                    done.append(trace)
+            frame.wired = True
+        for trace in done:
+            self._finish(trace, "acked")
+        self._sweep()
+
+    def settle(self, trace):
+        """Close a trace that queued nothing (coalesced, rejected, no-op)."""
+        with self._lock:
+            if "queued" in trace.t or self._open.pop(trace.id, None) is None:
+                return
+        self._finish(trace, "nothing sent")
+
+    # ---------------- Completion ----------------
+    def _finish(self, trace, outcome):
+        trace.mark("done")
+        segments = trace.segments()
+        summary = {"id": trace.id, "kind": trace.kind, "outcome": outcome, "ms": segments}
+        with self._lock:
+            self.recent.append(summary)
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            if outcome in ("acked", "unanswered"):
+                hists = self.histograms.setdefault(trace.kind, {})
+                for label, ms in segments.items():
+                    hists.setdefault(label, Histogram()).add(ms)
+        total = segments.get("total", 0.0)
+        if outcome == "expired" and trace.sent:
+            emit_log(f"[TRACE] {trace.kind} #{trace.id}: no acknowledgement after {self.timeout:g}s ({segments})")
+        elif outcome == "acked" and total >= self.slow_ms:
+            worst = max((k for k in segments if k != "total"), key=segments.get, default="total")
+            emit_log(f"[TRACE] {trace.kind} #{trace.id} took {total:.0f} ms; {worst} {segments.get(worst, 0):.0f} ms")
+        if _socketio:
+            _socketio.emit("command_latency", summary)
+
+    def _sweep(self):
+        cutoff = time.perf_counter() - self.timeout
+        stale = []
+        with self._lock:
+            for trace_id, trace in self._open.items():
+                if trace.t["ui"] > cutoff:
+                    break
+                stale.append(trace)
+            for trace in stale:
+                del self._open[trace.id]
+            if stale:
+                # drop expired commands' frames so a later update cannot acknowledge them
+                ids = {t.id for t in stale}
+                for key, frames in list(self.waiting.items()):
+                    live = deque(f for f in frames if not all(t.id in ids for t in f.traces))
+                    if live:
+                        self.waiting[key] = live
+                    else:
+                        del self.waiting[key]
+        for trace in stale:
+            if trace.sent and not trace.pending:
+                trace.t["done"] = trace.t["wire"]   # only frames nothing answers (getProperties, ...)
+                self._finish(trace, "unanswered")
+            else:
+                self._finish(trace, "expired")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "kinds": {kind: {label: h.stats() for label, h in hists.items()}
+                          for kind, hists in self.histograms.items()},
+                "open": len(self._open),
+                "outcomes": dict(self.outcomes),
+                "recent": list(self.recent)[-20:],
+            }
+
+
+tracer = LatencyTracer()
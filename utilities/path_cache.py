@@ -0,0 +1,94 @@
+# Path Cache
+# Bounded LRU cache for computed sun/moon paths, with hit/miss counters
+
+import threading
+from collections import OrderedDict
+
+
+class PathCache:
+    """
+    Thread-safe LRU cache.
+    Keys are (site, target, observing_date, interval_minutes) tuples, so paths
+    for several sites and targets can live side by side.
+    """
+    def __init__(self, max_entries=32):
+        self.max_entries = max(1, int(max_entries))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}    # key -> Event set once the computing caller is done
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value, or compute it outside the lock and store it.
+        Concurrent callers for the same key wait for the first one's result
+        instead of computing it again.
+        """
+        while True:
+            value = self.get(key)
+            if value is not None:
+                return value
+            with self._lock:
+                if key in self._entries:      # stored since the miss above
+                    return self._entries[key]
+                pending = self._inflight.get(key)
+                if pending is None:
+                    pending = self._inflight[key] = threading.Event()
+                    break
+            pending.wait()     # then take its result, or compute if it stored nothing
+        try:
+            value = compute()
+            if value:
+                self.put(key, value)
+            return value
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            pending.set()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def evict(self, predicate):
+        """Drop the entries whose key matches predicate(key); returns how many."""
+        with self._lock:
+            keys = [k for k in self._entries if predicate(k)]
+            for k in keys:
+                del self._entries[k]
+        return len(keys)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 3) if total else None,
+            }
@@ -0,0 +1,248 @@
+# Property Mirror
+# Local copy of every INDIGO device/property/item seen on the wire
+
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+
+VECTOR_TYPES = ("Number", "Switch", "Text", "Light", "BLOB")
+DEF_VERBS = {f"def{t}Vector": t for t in VECTOR_TYPES}
+SET_VERBS = {f"set{t}Vector": t for t in VECTOR_TYPES}
+MIRRORED_VERBS = set(DEF_VERBS) | set(SET_VERBS) | {"deleteProperty"}
+
+# item fields that describe the item rather than its current value
+_ITEM_META = ("label", "min", "max", "step", "format", "target")
+
+
+# ---------------- Predicates for PropertyMirror.when() ----------------
+def state_in(*states):
+    """True once the property state is one of `states` (e.g. "Ok", "Alert")."""
+    return lambda prop: prop.state in states
+
+
+def items_near(targets, tolerance, wrap=None):
+    """
+    True once every item in `targets` ({item: value}) is within `tolerance`.
+    `wrap` maps item -> period for cyclic values (e.g. {"RA": 24}).
+    """
+    wrap = wrap or {}
+
+    def check(prop):
+        for item, target in targets.items():
+            value = prop.items.get(item)
+            if value is None:
+                return False
+            diff = abs(float(value) - target)
+            if item in wrap:
+                diff = min(diff, wrap[item] - diff % wrap[item])
+            if diff > tolerance:
+                return False
+        return True
+    return check
+
+
+class _Watch:
+    __slots__ = ("predicate", "future", "newer_than", "timer")
+
+    def __init__(self, predicate, future, newer_than):
+        self.predicate = predicate
+        self.future = future
+        self.newer_than = newer_than
+        self.timer = None
+
+
+class Property:
+    """
+    One INDIGO property as last reported. Treat as read-only: every update
+    replaces the object, so a reference is always a consistent snapshot.
+    """
+    __slots__ = ("device", "name", "type", "state", "perm", "group", "label",
+                 "items", "meta", "version", "updated")
+
+    def __init__(self, device, name, type_, state=None, perm=None, group=None, label=None,
+                 items=None, meta=None, version=1, updated=None):
+        self.device = device
+        self.name = name
+        self.type = type_
+        self.state = state
+        self.perm = perm
+        self.group = group
+        self.label = label
+        self.items = items or {}     # item name -> value
+        self.meta = meta or {}       # item name -> {"label", "min", "max", ...} from def
+        self.version = version
+        self.updated = updated or time.time()
+
+    def get(self, item, default=None):
+        return self.items.get(item, default)
+
+    def to_dict(self):
+        return {
+            "device": self.device, "name": self.name, "type": self.type,
+            "state": self.state, "perm": self.perm, "group": self.group, "label": self.label,
+            "items": dict(self.items), "version": self.version, "updated": self.updated,
+        }
+
+    def __repr__(self):
+        return f"Property({self.device}.{self.name} v{self.version} {self.state} {self.items})"
+
+
+class PropertyMirror:
+    """
+    Thread-safe mirror fed by apply(verb, body) for def*/set*Vector and
+    deleteProperty messages. Lookups by (device, name) are dict reads; each
+    property keeps a version counter and the time it last changed.
+    """
+    def __init__(self):
+        self._props = {}             # (device, name) -> Property
+        self._watches = {}           # (device, name) -> [_Watch]
+        self._cond = threading.Condition()
+        self.updates = 0
+
+    # ---- intake ----
+    def apply(self, verb, body):
+        """Fold one unwrapped INDIGO message into the mirror. Returns the new Property (or None)."""
+        device = body.get("device")
+        if device is None:
+            return None
+        name = body.get("name")
+        with self._cond:
+            if verb == "deleteProperty":
+                if name is None:
+                    for key in [k for k in self._props if k[0] == device]:
+                        del self._props[key]
+                else:
+                    self._props.pop((device, name), None)
+                prop = None
+            elif verb in DEF_VERBS:
+                prop = self._define(DEF_VERBS[verb], device, name, body)
+            elif verb in SET_VERBS:
+                prop = self._update(SET_VERBS[verb], device, name, body)
+            else:
+                return None
+            self.updates += 1
+            self._cond.notify_all()
+            watches = self._watches.get((device, name)) if prop is not None else None
+        if watches:
+            self._check(prop, list(watches))
+        return prop
+
+    def _define(self, type_, device, name, body):
+        old = self._props.get((device, name))
+        items, meta = {}, {}
+        for item in body.get("items", []):
+            items[item.get("name")] = item.get("value")
+            meta[item.get("name")] = {k: item[k] for k in _ITEM_META if k in item}
+        prop = Property(device, name, type_, body.get("state"), body.get("perm"), body.get("group"),
+                        body.get("label"), items, meta, version=(old.version + 1) if old else 1)
+        self._props[(device, name)] = prop
+        return prop
+
+    def _update(self, type_, device, name, body):
+        old = self._props.get((device, name))
+        items = dict(old.items) if old else {}
+        for item in body.get("items", []):
+            items[item.get("name")] = item.get("value")
+        if old is None:
+            prop = Property(device, name, type_, body.get("state"), items=items)
+        else:
+            prop = Property(device, name, old.type, body.get("state", old.state), old.perm, old.group,
+                            old.label, items, old.meta, version=old.version + 1)
+        self._props[(device, name)] = prop
+        return prop
+
+    # ---- lookups ----
+    def get(self, device, name):
+        return self._props.get((device, name))
+
+    def value(self, device, name, item, default=None):
+        prop = self._props.get((device, name))
+        return prop.items.get(item, default) if prop else default
+
+    def version(self, device, name):
+        prop = self._props.get((device, name))
+        return prop.version if prop else 0
+
+    def devices(self):
+        return sorted({device for device, _ in list(self._props)})
+
+    def properties(self, device):
+        return {name: prop for (dev, name), prop in list(self._props.items()) if dev == device}
+
+    def wait(self, device, name, newer_than=0, timeout=None):
+        """Block until (device, name) exists with version > newer_than; returns it or None on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                prop = self._props.get((device, name))
+                if prop is not None and prop.version > newer_than:
+                    return prop
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def when(self, device, name, predicate=None, timeout=None, newer_than=0):
+        """
+        Future resolving to the first Property for (device, name) with version >
+        newer_than that satisfies predicate(prop) (any update if None). It fails
+        with TimeoutError after `timeout` seconds. Callbacks added to it run on
+        the thread that applied the update, so keep them short.
+        """
+        future = Future()
+        watch = _Watch(predicate, future, newer_than)
+        key = (device, name)
+        with self._cond:
+            self._watches.setdefault(key, []).append(watch)
+            current = self._props.get(key)
+        future.add_done_callback(lambda _f: self._forget(key, watch))
+        if current is not None:
+            self._check(current, [watch])
+        if timeout is not None and not future.done():
+            watch.timer = threading.Timer(timeout, self._expire, (watch, device, name, timeout))
+            watch.timer.daemon = True
+            watch.timer.start()
+        return future
+
+    def _check(self, prop, watches):
+        for watch in watches:
+            if watch.future.done() or prop.version <= watch.newer_than:
+                continue
+            try:
+                matched = watch.predicate is None or watch.predicate(prop)
+            except Exception as e:
+                self._settle(watch, error=e)
+                continue
+            if matched:
+                self._settle(watch, result=prop)
+
+    def _expire(self, watch, device, name, timeout):
+        self._settle(watch, error=TimeoutError(f"{device}.{name}: condition not met within {timeout:g}s"))
+
+    @staticmethod
+    def _settle(watch, result=None, error=None):
+        try:
+            if error is not None:
+                watch.future.set_exception(error)
+            else:
+                watch.future.set_result(result)
+        except InvalidStateError:
+            pass  # already resolved, timed out or cancelled
+
+    def _forget(self, key, watch):
+        if watch.timer is not None:
+            watch.timer.cancel()
+        with self._cond:
+            watches = self._watches.get(key)
+            if watches and watch in watches:
+                watches.remove(watch)
+                if not watches:
+                    del self._watches[key]
+
+    def clear(self):
+        with self._cond:
+            self._props.clear()
+
+    def stats(self):
+        return {"devices": len(self.devices()), "properties": len(self._props), "updates": self.updates,
+                "watches": sum(len(w) for w in list(self._watches.values()))}
@@ -0,0 +1,56 @@
+# Publisher
+# Change-driven SocketIO emits: only fields that changed, with a version number
+
+import threading
+
+
+class DeltaPublisher:
+    """
+    Emits `event` with just the keys that differ from the last payload sent
+    (keys no longer present as None), plus {"version": n, "delta": True}.
+    `volatile` keys (timestamps) never count as a change on their own; they
+    ride along with any delta that is sent. snapshot() returns the full state
+    with "delta": False for clients that just connected or missed a version.
+    """
+    def __init__(self, socketio, event, source=None, volatile=()):
+        self.socketio = socketio
+        self.event = event
+        self.source = source          # callable returning the full payload
+        self.volatile = frozenset(volatile)
+        self.version = 0
+        self.sent = 0
+        self.skipped = 0
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def publish(self, payload=None, force=False):
+        """Diff against the last payload and emit the changed fields. Returns the delta."""
+        if payload is None:
+            if self.source is None:
+                return {}
+            payload = self.source()
+        with self._lock:
+            changed = {k: v for k, v in payload.items() if k not in self._last or self._last[k] != v}
+            changed.update((k, None) for k in self._last.keys() - payload.keys())
+            if not force and changed.keys() <= self.volatile:
+                self.skipped += 1
+                return {}
+            self._last = dict(payload)
+            self.version += 1
+            self.sent += 1
+            delta = {**changed, "version": self.version, "delta": True}
+            # emitted under the lock so clients see versions in order
+            if self.socketio:
+                self.socketio.emit(self.event, delta)
+        return delta
+
+    def snapshot(self):
+        """Full current payload (publishes first if anything changed)."""
+        if self.source is not None:
+            self.publish()
+        with self._lock:
+            return {**self._last, "version": self.version, "delta": False}
+
+    def stats(self):
+        with self._lock:
+            return {"event": self.event, "version": self.version, "sent": self.sent, "skipped": self.skipped}
@@ -0,0 +1,147 @@
+# Telemetry Buffer
+# Fixed-size NumPy ring buffer of timestamped samples with min/max/mean decimation for plotting
+
+import math
+import threading
+import time
+
+import numpy as np
+
+# Mount telemetry columns (MountControl.telemetry); "t" is always first (unix seconds)
+MOUNT_FIELDS = ("t", "ra", "dec", "alt", "az", "tracking", "state", "target_ra", "target_dec")
+
+# Angles that wrap: averaged/compared unwrapped, results reduced back into [0, period)
+WRAP = {"ra": 24.0, "target_ra": 24.0, "az": 360.0}
+
+
+class TelemetryRing:
+    """
+    Preallocated (capacity x fields) float64 array written round-robin, so
+    memory is fixed however long the app runs. Rows are appended in time
+    order, which keeps both halves of the ring sorted: a time window is two
+    searchsorted() calls and at most two slices, and decimate() reduces any
+    window to per-bucket min/max/mean with reduceat. Missing values are NaN.
+    """
+    def __init__(self, capacity, fields=MOUNT_FIELDS):
+        if fields[0] != "t":
+            raise ValueError("first field must be 't'")
+        self.capacity = max(1, int(capacity))
+        self.fields = tuple(fields)
+        self._col = {f: i for i, f in enumerate(self.fields)}
+        self._data = np.full((self.capacity, len(self.fields)), np.nan)
+        self._head = 0        # next row written
+        self._size = 0
+        self._lock = threading.Lock()
+        self.appended = 0
+
+    # ---------------- Writing ----------------
+    def append(self, t=None, **values):
+        """Record one sample at unix time t (now if None); fields not given are NaN."""
+        row = np.full(len(self.fields), np.nan)
+        row[0] = time.time() if t is None else t
+        for name, value in values.items():
+            if value is not None:
+                row[self._col[name]] = value
+        with self._lock:
+            if self._size and row[0] < self._data[(self._head - 1) % self.capacity, 0]:
+                row[0] = self._data[(self._head - 1) % self.capacity, 0]  # clock stepped back: keep order
+            self._data[self._head] = row
+            self._head = (self._head + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+            self.appended += 1
+
+    def clear(self):
+        with self._lock:
+            self._head = self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    # ---------------- Reading ----------------
+    def _segments(self):
+        """Oldest-first views of the filled rows (call with the lock held)."""
+        if self._size < self.capacity:
+            return (self._data[:self._size],)
+        return self._data[self._head:], self._data[:self._head]
+
+    def window(self, start=None, end=None, fields=None):
+        """Copy of the rows with start <= t <= end (oldest first), restricted to `fields`."""
+        cols = [0] + [self._col[f] for f in fields if f != "t"] if fields else slice(None)
+        with self._lock:
+            parts = []
+            for seg in self._segments():
+                t = seg[:, 0]
+                lo = 0 if start is None else np.searchsorted(t, start, "left")
+                hi = len(t) if end is None else np.searchsorted(t, end, "right")
+                if hi > lo:
+                    parts.append(seg[lo:hi, cols])
+        if not parts:
+            return np.empty((0, len(self.fields) if fields is None else len(cols)))
+        return parts[0].copy() if len(parts) == 1 else np.concatenate(parts)
+
+    def latest(self):
+        """Newest sample as {field: value} (None if empty)."""
+        with self._lock:
+            if not self._size:
+                return None
+            row = self._data[(self._head - 1) % self.capacity].copy()
+        return {f: (None if math.isnan(v) else float(v)) for f, v in zip(self.fields, row)}
+
+    def decimate(self, start=None, end=None, buckets=500, fields=None):
+        """
+        Reduce [start, end] to at most `buckets` equal time buckets. Returns
+        {"t": bucket start times, "count": samples per bucket, field:
+        {"min", "max", "mean"}} with only non-empty buckets; NaN samples are
+        ignored and empty results are NaN. Wrapping angles (RA, azimuth) are
+        reduced unwrapped, so a bucket crossing 0h may report min > max.
+        """
+        fields = [f for f in (fields or self.fields) if f != "t"]
+        rows = self.window(start, end, fields)
+        out = {"t": np.empty(0), "count": np.empty(0, dtype=int)}
+        if not len(rows):
+            for f in fields:
+                out[f] = {"min": np.empty(0), "max": np.empty(0), "mean": np.empty(0)}
+            return out
+
+        t = rows[:, 0]
+        t0 = t[0] if start is None else start
+        t1 = t[-1] if end is None else end
+        width = max(t1 - t0, 1e-9) / max(1, int(buckets))
+        # first row of each non-empty bucket
+        bucket = np.minimum(((t - t0) / width).astype(np.int64), int(buckets) - 1)
+        first = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        out["t"] = t0 + bucket[first] * width
+        out["count"] = np.diff(np.r_[first, len(t)])
+
+        for j, f in enumerate(fields, start=1):
+            x = rows[:, j]
+            period = WRAP.get(f)
+            valid = ~np.isnan(x)
+            if period is not None and valid.any():
+                x = x.copy()
+                x[valid] = np.unwrap(x[valid], period=period)
+            n = np.add.reduceat(valid, first)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = np.add.reduceat(np.where(valid, x, 0.0), first) / n
+                lo = np.fmin.reduceat(x, first)
+                hi = np.fmax.reduceat(x, first)
+            if period is not None:
+                lo, hi, mean = lo % period, hi % period, mean % period
+            out[f] = {"min": lo, "max": hi, "mean": mean}
+        return out
+
+    def stats(self):
+        with self._lock:
+            oldest = self._head if self._size == self.capacity else 0
+            span = float(self._data[(self._head - 1) % self.capacity, 0] - self._data[oldest, 0]) if self._size else 0.0
+        return {"capacity": self.capacity, "size": self._size, "appended": self.appended,
+                "bytes": self._data.nbytes, "span_sec": round(span, 1)}
+
+
+def to_json(result):
+    """decimate() output with NaN → None and arrays → lists (jsonify cannot encode NaN)."""
+    def clean(a):
+        a = np.asarray(a, dtype=float)
+        return [None if math.isnan(v) else v for v in a.tolist()]
+    return {k: (clean(v) if k == "t" else np.asarray(v).tolist() if k == "count"
+                else {s: clean(arr) for s, arr in v.items()}) for k, v in result.items()}